@@ -20,13 +20,15 @@ class EntraUsers:
     def __init__(
         self,
         graph_api: GraphApi,
+        workers: int = 8,
     ) -> None:
         self.graph_api = graph_api
         self.logger = get_logger()
+        self.workers = workers
 
     def add(self, new_users: Sequence[ResearchUser]) -> None:
         """
-        Add list of users to Entra ID
+        Add list of users to Entra ID, creating batches of users concurrently
 
         Raises:
             DataSafeHavenEntraIDError if any user could not be created
@@ -37,6 +39,7 @@ class EntraUsers:
                 for domain in self.graph_api.read_domains()
                 if domain["isVerified"]
             }
+            user_details = []
             for user in new_users:
                 if user.domain not in available_domains:
                     msg = f"Domain '[green]{user.domain}[/]' is not verified."
@@ -58,9 +61,12 @@ class EntraUsers:
                 if not user.phone_number:
                     msg = f"User '[green]{user.username}[/]' is missing a phone number."
                     raise DataSafeHavenTypeError(msg)
-                self.graph_api.create_user(
-                    request_json, user.email_address, user.phone_number
+                user_details.append(
+                    (request_json, user.email_address, user.phone_number)
                 )
+            # Create all users using concurrent batched requests
+            self.graph_api.create_users(user_details, workers=self.workers)
+            for user in new_users:
                 self.logger.info(
                     f"Ensured user '[green]{user.preferred_username}[/]' exists in Entra ID"
                 )
@@ -76,24 +82,24 @@ class EntraUsers:
             DataSafeHavenEntraIDError if users could not be loaded
         """
         try:
-            user_list = self.graph_api.read_users()
+            # Only changes since the previous listing are requested from Entra ID
+            user_list = self.graph_api.read_users_delta()
+            # Changed objects may only include the properties that changed, so
+            # missing properties take their default values
             return [
                 ResearchUser(
-                    account_enabled=user_details["accountEnabled"],
-                    email_address=user_details["mail"],
-                    given_name=user_details["givenName"],
-                    phone_number=(
-                        user_details["businessPhones"][0]
-                        if len(user_details["businessPhones"])
-                        else None
+                    account_enabled=user_details.get("accountEnabled"),
+                    email_address=user_details.get("mail"),
+                    given_name=user_details.get("givenName"),
+                    phone_number=next(
+                        iter(user_details.get("businessPhones") or []), None
                     ),
                     sam_account_name=(
-                        user_details["onPremisesSamAccountName"]
-                        if user_details["onPremisesSamAccountName"]
-                        else user_details["mailNickname"]
+                        user_details.get("onPremisesSamAccountName")
+                        or user_details.get("mailNickname")
                     ),
-                    surname=user_details["surname"],
-                    user_principal_name=user_details["userPrincipalName"],
+                    surname=user_details.get("surname"),
+                    user_principal_name=user_details.get("userPrincipalName"),
                 )
                 for user_details in user_list
             ]
@@ -103,32 +109,37 @@ class EntraUsers:
 
     def register(self, sre_name: str, usernames: Sequence[str]) -> None:
         """
-        Add usernames to SRE group in Entra ID
+        Add usernames to SRE group in Entra ID, adding chunks of users concurrently
 
         Raises:
             DataSafeHavenEntraIDError if any user could not be added to the group.
         """
         try:
             group_name = f"Data Safe Haven SRE {sre_name} Users"
-            for username in usernames:
-                self.graph_api.add_user_to_group(username, group_name)
+            self.graph_api.add_users_to_group(
+                usernames, group_name, workers=self.workers
+            )
         except DataSafeHavenError as exc:
             msg = f"Unable to add users to group '{group_name}'."
             raise DataSafeHavenEntraIDError(msg) from exc
 
     def remove(self, users: Sequence[ResearchUser]) -> None:
         """
-        Remove list of users from Entra ID
+        Remove list of users from Entra ID, removing users concurrently
 
         Raises:
             DataSafeHavenEntraIDError if any user could not be removed.
         """
         try:
-            for user in filter(
-                lambda existing_user: any(existing_user == user for user in users),
-                self.list(),
-            ):
-                self.graph_api.remove_user(user.username)
+            users_to_remove = [
+                existing_user
+                for existing_user in self.list()
+                if any(existing_user == user for user in users)
+            ]
+            self.graph_api.remove_users(
+                [user.username for user in users_to_remove], workers=self.workers
+            )
+            for user in users_to_remove:
                 self.logger.info(f"Removed '{user.preferred_username}'.")
         except DataSafeHavenError as exc:
             msg = "Unable to remove users from Entra ID."
@@ -159,8 +170,7 @@ class EntraUsers:
         """
         try:
             group_name = f"Data Safe Haven SRE {sre_name}"
-            for username in usernames:
-                self.graph_api.remove_user_from_group(username, group_name)
+            self.graph_api.remove_users_from_group(usernames, group_name)
         except DataSafeHavenError as exc:
             msg = f"Unable to remove users from group {group_name}."
             raise DataSafeHavenEntraIDError(msg) from exc
@@ -1,11 +1,18 @@
 """Command line entrypoint for Data Safe Haven application"""
 
+from logging import DEBUG
 from typing import Annotated, Optional
 
 import typer
 
 from data_safe_haven import __version__, console
-from data_safe_haven.logging import set_console_level, show_console_level
+from data_safe_haven.external import RequestMetrics
+from data_safe_haven.logging import (
+    get_console_handler,
+    get_logger,
+    set_console_level,
+    show_console_level,
+)
 
 from .config import config_command_group
 from .context import context_command_group
@@ -96,4 +103,12 @@ application.add_typer(
 
 def main() -> None:
     """Run the application"""
-    application()
+    try:
+        application()
+    finally:
+        # Summarise requests made to remote APIs, showing a table in verbose mode.
+        # Failing to write metrics must not change the outcome of the command.
+        try:
+            RequestMetrics.report(show_table=get_console_handler().level <= DEBUG)
+        except OSError as exc:
+            get_logger().debug(f"Could not write request metrics: {exc}")
@@ -32,6 +32,8 @@ def show() -> None:
         console.print(
             f"\tAdmin group name: [blue]{current_context.admin_group_name}[/]",
             f"\tDescription: [blue]{current_context.description}[/]",
+            f"\tEntra storage authentication: [blue]{current_context.entra_storage_auth}[/]",
+            f"\tPulumi parallelism: [blue]{current_context.pulumi_parallelism or 'default'}[/]",
             f"\tSubscription name: [blue]{current_context.subscription_name}[/]",
             sep="\n",
         )
@@ -61,7 +63,7 @@ def available() -> None:
 
 @context_command_group.command()
 def switch(
-    name: Annotated[str, typer.Argument(help="Name of the context to switch to.")]
+    name: Annotated[str, typer.Argument(help="Name of the context to switch to.")],
 ) -> None:
     """Switch the currently selected context."""
     logger = get_logger()
@@ -137,6 +139,13 @@ def update(
             help="The human friendly name to give this Data Safe Haven deployment.",
         ),
     ] = None,
+    entra_storage_auth: Annotated[
+        Optional[bool],  # noqa: UP007
+        typer.Option(
+            "--entra-storage-auth/--no-entra-storage-auth",
+            help="Whether to access configuration storage with your Entra identity rather than the storage account keys.",
+        ),
+    ] = None,
     name: Annotated[
         Optional[str],  # noqa: UP007
         typer.Option(
@@ -144,6 +153,13 @@ def update(
             callback=validators.typer_safe_string,
         ),
     ] = None,
+    pulumi_parallelism: Annotated[
+        Optional[int],  # noqa: UP007
+        typer.Option(
+            help="The number of resource operations that Pulumi runs at once. By default, refresh and preview run one at a time.",
+            min=1,
+        ),
+    ] = None,
     subscription: Annotated[
         Optional[str],  # noqa: UP007
         typer.Option(
@@ -165,7 +181,9 @@ def update(
     manager.update(
         admin_group_name=admin_group_name,
         description=description,
+        entra_storage_auth=entra_storage_auth,
         name=name,
+        pulumi_parallelism=pulumi_parallelism,
         subscription_name=subscription,
     )
     manager.write()
@@ -55,3 +55,6 @@ def run(
 
     stdout = project.run_pulumi_command(command)
     console.print(stdout)
+
+    # Upload Pulumi config to blob storage, as cached outputs may have been removed
+    pulumi_config.upload(context)
@@ -1,23 +1,80 @@
 """Command-line application for managing SRE infrastructure."""
 
-from typing import Annotated
+from collections.abc import Callable
+from typing import Annotated, Any, Optional
 
 import typer
 
-from data_safe_haven.config import ContextManager, DSHPulumiConfig, SHMConfig, SREConfig
+from data_safe_haven.config import ContextManager, DSHPulumiConfig, SHMConfig
 from data_safe_haven.exceptions import DataSafeHavenConfigError, DataSafeHavenError
 from data_safe_haven.external import GraphApi
-from data_safe_haven.functions import current_ip_address, ip_address_in_list
-from data_safe_haven.infrastructure import SREProjectManager
 from data_safe_haven.logging import get_logger
-from data_safe_haven.provisioning import SREProvisioningManager
+
+from .sre_fleet import SREFleet, deploy_sre, teardown_sre
 
 sre_command_group = typer.Typer()
 
 
+def select_sre_names(
+    name: str | None,
+    names: str | None,
+    *,
+    all_names: Callable[[], list[str]] | None = None,
+) -> list[str]:
+    """
+    Choose SREs from exactly one of a name, a comma-separated list or all known SREs
+
+    Raises:
+        DataSafeHavenConfigError if the SREs were not chosen in exactly one way
+    """
+    if [name, names, all_names].count(None) != 2:  # noqa: PLR2004
+        msg = "Specify exactly one of an SRE name, '--names' or '--all'."
+        raise DataSafeHavenConfigError(msg)
+    if name is not None:
+        return [name]
+    if names is not None:
+        selected = [sre_name.strip() for sre_name in names.split(",")]
+    elif all_names is not None:
+        selected = all_names()
+    if not (selected := [sre_name for sre_name in selected if sre_name]):
+        msg = "No SREs were selected."
+        raise DataSafeHavenConfigError(msg)
+    return list(dict.fromkeys(selected))
+
+
 @sre_command_group.command()
 def deploy(
-    name: Annotated[str, typer.Argument(help="Name of SRE to deploy")],
+    name: Annotated[
+        Optional[str],  # noqa: UP007
+        typer.Argument(help="Name of SRE to deploy"),
+    ] = None,
+    all_: Annotated[  # noqa: FBT002
+        bool,
+        typer.Option(
+            "--all",
+            help="Deploy every SRE that has previously been deployed.",
+        ),
+    ] = False,
+    names: Annotated[
+        Optional[str],  # noqa: UP007
+        typer.Option(
+            help="Comma-separated names of SREs to deploy at the same time.",
+        ),
+    ] = None,
+    max_workers: Annotated[
+        int,
+        typer.Option(
+            help="The maximum number of SREs to deploy at the same time.",
+            min=1,
+        ),
+    ] = 4,
+    fast: Annotated[  # noqa: FBT002
+        bool,
+        typer.Option(
+            "--fast",
+            help="Skip refresh and preview if nothing has changed since the last deployment.",
+        ),
+    ] = False,
     force: Annotated[  # noqa: FBT002
         bool,
         typer.Option(
@@ -26,12 +83,37 @@ def deploy(
             help="Force this operation, cancelling any others that are in progress.",
         ),
     ] = False,
+    preview: Annotated[  # noqa: FBT002
+        bool,
+        typer.Option(
+            "--preview/--no-preview",
+            help="Preview changes before applying them.",
+        ),
+    ] = True,
+    parallelism: Annotated[
+        Optional[int],  # noqa: UP007
+        typer.Option(
+            help="The number of resource operations that Pulumi runs at once. Defaults to the context setting.",
+            min=1,
+        ),
+    ] = None,
 ) -> None:
-    """Deploy a Secure Research Environment"""
+    """Deploy one or more Secure Research Environments"""
     logger = get_logger()
+    description = name or names or "all SREs"
     try:
-        # Load context and SHM config
+        # Load context
         context = ContextManager.from_file().assert_context()
+
+        # Choose which SREs to deploy
+        def all_names() -> list[str]:
+            return DSHPulumiConfig.from_remote_or_create(
+                context, encrypted_key=None, projects={}
+            ).project_names
+
+        sre_names = select_sre_names(name, names, all_names=all_names if all_ else None)
+
+        # Load SHM config
         shm_config = SHMConfig.from_remote(context)
 
         # Load GraphAPI
@@ -45,85 +127,44 @@ def deploy(
             tenant_id=shm_config.shm.entra_tenant_id,
         )
 
-        # Load Pulumi and SRE configs
-        pulumi_config = DSHPulumiConfig.from_remote_or_create(
-            context, encrypted_key=None, projects={}
-        )
-        sre_config = SREConfig.from_remote_by_name(context, name)
-
-        # Check whether current IP address is authorised to take administrator actions
-        if not ip_address_in_list(sre_config.sre.admin_ip_addresses):
-            logger.warning(
-                f"IP address '{current_ip_address()}' is not authorised to deploy SRE '{sre_config.description}'."
-            )
-            msg = "Check that 'admin_ip_addresses' is set correctly in your SRE config file."
-            raise DataSafeHavenConfigError(msg)
-
-        # Initialise Pulumi stack
         # Note that requesting a GraphApi token will trigger possible user-interaction
-        stack = SREProjectManager(
-            context=context,
-            config=sre_config,
-            pulumi_config=pulumi_config,
-            create_project=True,
-            graph_api_token=graph_api.token,
-        )
-        # Set Azure options
-        stack.add_option(
-            "azure-native:location", sre_config.azure.location, replace=False
-        )
-        stack.add_option(
-            "azure-native:subscriptionId",
-            sre_config.azure.subscription_id,
-            replace=False,
-        )
-        stack.add_option(
-            "azure-native:tenantId", sre_config.azure.tenant_id, replace=False
-        )
-        # Load SHM outputs
-        stack.add_option(
-            "shm-admin-group-id",
-            shm_config.shm.admin_group_id,
-            replace=True,
-        )
-        stack.add_option(
-            "shm-entra-tenant-id",
-            shm_config.shm.entra_tenant_id,
-            replace=True,
-        )
-        stack.add_option(
-            "shm-fqdn",
-            shm_config.shm.fqdn,
-            replace=True,
-        )
-
-        # Deploy Azure infrastructure with Pulumi
-        try:
-            stack.deploy(force=force)
-        finally:
-            # Upload Pulumi config to blob storage
-            pulumi_config.upload(context)
-
-        # Provision SRE with anything that could not be done in Pulumi
-        manager = SREProvisioningManager(
-            graph_api_token=graph_api.token,
-            location=sre_config.azure.location,
-            sre_name=sre_config.name,
-            sre_stack=stack,
-            subscription_name=context.subscription_name,
-            timezone=sre_config.sre.timezone,
-        )
-        manager.run()
+        options: dict[str, Any] = {
+            "fast": fast,
+            "force": force,
+            "parallelism": parallelism,
+            "preview": preview,
+        }
+        if name:
+            deploy_sre(context, shm_config, name, graph_api.token, **options)
+        else:
+            fleet = SREFleet(context, graph_api.token, max_workers=max_workers)
+            fleet.deploy(sre_names, **options)
     except DataSafeHavenError as exc:
         logger.critical(
-            f"Could not deploy Secure Research Environment '[green]{name}[/]'."
+            f"Could not deploy Secure Research Environment '[green]{description}[/]'."
         )
         raise typer.Exit(code=1) from exc
 
 
 @sre_command_group.command()
 def teardown(
-    name: Annotated[str, typer.Argument(help="Name of SRE to teardown.")],
+    name: Annotated[
+        Optional[str],  # noqa: UP007
+        typer.Argument(help="Name of SRE to teardown."),
+    ] = None,
+    names: Annotated[
+        Optional[str],  # noqa: UP007
+        typer.Option(
+            help="Comma-separated names of SREs to teardown at the same time.",
+        ),
+    ] = None,
+    max_workers: Annotated[
+        int,
+        typer.Option(
+            help="The maximum number of SREs to teardown at the same time.",
+            min=1,
+        ),
+    ] = 4,
     force: Annotated[  # noqa: FBT002
         bool,
         typer.Option(
@@ -132,12 +173,21 @@ def teardown(
             help="Force this operation, cancelling any others that are in progress.",
         ),
     ] = False,
+    parallelism: Annotated[
+        Optional[int],  # noqa: UP007
+        typer.Option(
+            help="The number of resource operations that Pulumi runs at once. Defaults to the context setting.",
+            min=1,
+        ),
+    ] = None,
 ) -> None:
-    """Tear down a deployed a Secure Research Environment."""
+    """Tear down one or more deployed Secure Research Environments."""
     logger = get_logger()
+    description = name or names
     try:
         # Load context and SHM config
         context = ContextManager.from_file().assert_context()
+        sre_names = select_sre_names(name, names)
         shm_config = SHMConfig.from_remote(context)
 
         # Load GraphAPI as this may require user-interaction
@@ -146,37 +196,14 @@ def teardown(
             tenant_id=shm_config.shm.entra_tenant_id,
         )
 
-        # Load Pulumi and SRE configs
-        pulumi_config = DSHPulumiConfig.from_remote(context)
-        sre_config = SREConfig.from_remote_by_name(context, name)
-
-        # Check whether current IP address is authorised to take administrator actions
-        if not ip_address_in_list(sre_config.sre.admin_ip_addresses):
-            logger.warning(
-                f"IP address '{current_ip_address()}' is not authorised to teardown SRE '{sre_config.description}'."
-            )
-            msg = "Check that 'admin_ip_addresses' is set correctly in your SRE config file."
-            raise DataSafeHavenConfigError(msg)
-
-        # Remove infrastructure deployed with Pulumi
-        # N.B. We allow the creation of a project (which is immediately removed)
-        # to stop Pulumi operations from crashing due to a missing stack
-        stack = SREProjectManager(
-            context=context,
-            config=sre_config,
-            pulumi_config=pulumi_config,
-            graph_api_token=graph_api.token,
-            create_project=True,
-        )
-        stack.teardown(force=force)
-
-        # Remove Pulumi project from Pulumi config file
-        del pulumi_config[name]
-
-        # Upload Pulumi config to blob storage
-        pulumi_config.upload(context)
+        options: dict[str, Any] = {"force": force, "parallelism": parallelism}
+        if name:
+            teardown_sre(context, name, graph_api.token, **options)
+        else:
+            fleet = SREFleet(context, graph_api.token, max_workers=max_workers)
+            fleet.teardown(sre_names, **options)
     except DataSafeHavenError as exc:
         logger.critical(
-            f"Could not teardown Secure Research Environment '[green]{name}[/]'."
+            f"Could not teardown Secure Research Environment '[green]{description}[/]'."
         )
         raise typer.Exit(1) from exc
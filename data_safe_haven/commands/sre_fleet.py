@@ -0,0 +1,421 @@
+"""Deploy or tear down Secure Research Environments, one at a time or concurrently."""
+
+import logging
+import pathlib
+import queue
+from collections.abc import Callable, Sequence
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, wait
+from datetime import UTC, datetime
+from multiprocessing import Manager, get_context
+from typing import Any
+
+from rich.progress import Progress, SpinnerColumn, TextColumn, TimeElapsedColumn
+
+from data_safe_haven import console
+from data_safe_haven.config import Context, DSHPulumiConfig, SHMConfig, SREConfig
+from data_safe_haven.directories import log_dir
+from data_safe_haven.exceptions import (
+    DataSafeHavenConfigError,
+    DataSafeHavenError,
+    DataSafeHavenPulumiError,
+)
+from data_safe_haven.external import AzureVmSkuCatalogue, RequestMetrics
+from data_safe_haven.external.api.credentials import DeferredCredential
+from data_safe_haven.functions import current_ip_address, ip_address_in_list
+from data_safe_haven.infrastructure import SREProjectManager
+from data_safe_haven.logging import get_console_handler, get_logger
+from data_safe_haven.logging.plain_file_handler import PlainFileHandler
+from data_safe_haven.provisioning import SREProvisioningManager
+
+
+def deploy_sre(
+    context: Context,
+    shm_config: SHMConfig,
+    name: str,
+    graph_api_token: str,
+    *,
+    fast: bool = False,
+    force: bool = False,
+    parallelism: int | None = None,
+    preview: bool = True,
+    on_stage: Callable[[str], None] | None = None,
+) -> None:
+    """
+    Deploy a single Secure Research Environment
+
+    Raises:
+        DataSafeHavenError if the SRE could not be deployed
+    """
+    logger = get_logger()
+    report = on_stage or (lambda _: None)
+
+    # Load Pulumi and SRE configs
+    report("loading configuration")
+    pulumi_config = DSHPulumiConfig.from_remote_or_create(
+        context, encrypted_key=None, projects={}
+    )
+    sre_config = SREConfig.from_remote_by_name(context, name)
+
+    # Check whether current IP address is authorised to take administrator actions
+    if not ip_address_in_list(sre_config.sre.admin_ip_addresses):
+        logger.warning(
+            f"IP address '{current_ip_address()}' is not authorised to deploy SRE '{sre_config.description}'."
+        )
+        msg = (
+            "Check that 'admin_ip_addresses' is set correctly in your SRE config file."
+        )
+        raise DataSafeHavenConfigError(msg)
+
+    # Check workspace SKUs against the cached catalogue for this location
+    location = sre_config.azure.location
+    if sre_config.sre.workspace_skus:
+        skus = AzureVmSkuCatalogue.read(location, max_age=AzureVmSkuCatalogue.ttl)
+        if skus is None:
+            logger.warning(
+                f"Could not check workspace SKUs as the VM SKU catalogue for '[green]{location}[/]' is missing or out of date."
+            )
+        elif unavailable := [
+            sku for sku in sre_config.sre.workspace_skus if sku not in skus
+        ]:
+            msg = f"Workspace SKUs {unavailable} are not available in '{location}'."
+            raise DataSafeHavenConfigError(msg)
+
+    # Initialise Pulumi stack
+    stack = SREProjectManager(
+        context=context,
+        config=sre_config,
+        pulumi_config=pulumi_config,
+        create_project=True,
+        graph_api_token=graph_api_token,
+        parallelism=parallelism,
+    )
+    # Set Azure options
+    stack.add_option("azure-native:location", sre_config.azure.location, replace=False)
+    stack.add_option(
+        "azure-native:subscriptionId",
+        sre_config.azure.subscription_id,
+        replace=False,
+    )
+    stack.add_option("azure-native:tenantId", sre_config.azure.tenant_id, replace=False)
+    # Load SHM outputs
+    stack.add_option(
+        "shm-admin-group-id",
+        shm_config.shm.admin_group_id,
+        replace=True,
+    )
+    stack.add_option(
+        "shm-entra-tenant-id",
+        shm_config.shm.entra_tenant_id,
+        replace=True,
+    )
+    stack.add_option(
+        "shm-fqdn",
+        shm_config.shm.fqdn,
+        replace=True,
+    )
+
+    # Deploy Azure infrastructure with Pulumi
+    report("deploying infrastructure")
+    try:
+        stack.deploy(fast=fast, force=force, preview=preview)
+    finally:
+        # Upload Pulumi config to blob storage
+        pulumi_config.upload(context)
+
+    # Provision SRE with anything that could not be done in Pulumi
+    report("provisioning")
+    manager = SREProvisioningManager(
+        graph_api_token=graph_api_token,
+        location=sre_config.azure.location,
+        sre_name=sre_config.name,
+        sre_stack=stack,
+        subscription_name=context.subscription_name,
+        timezone=sre_config.sre.timezone,
+    )
+    manager.run()
+
+
+def teardown_sre(
+    context: Context,
+    name: str,
+    graph_api_token: str,
+    *,
+    force: bool = False,
+    parallelism: int | None = None,
+    on_stage: Callable[[str], None] | None = None,
+) -> None:
+    """
+    Tear down a single Secure Research Environment
+
+    Raises:
+        DataSafeHavenError if the SRE could not be torn down
+    """
+    logger = get_logger()
+    report = on_stage or (lambda _: None)
+
+    # Load Pulumi and SRE configs
+    report("loading configuration")
+    pulumi_config = DSHPulumiConfig.from_remote(context)
+    sre_config = SREConfig.from_remote_by_name(context, name)
+
+    # Check whether current IP address is authorised to take administrator actions
+    if not ip_address_in_list(sre_config.sre.admin_ip_addresses):
+        logger.warning(
+            f"IP address '{current_ip_address()}' is not authorised to teardown SRE '{sre_config.description}'."
+        )
+        msg = (
+            "Check that 'admin_ip_addresses' is set correctly in your SRE config file."
+        )
+        raise DataSafeHavenConfigError(msg)
+
+    # Remove infrastructure deployed with Pulumi
+    # N.B. We allow the creation of a project (which is immediately removed)
+    # to stop Pulumi operations from crashing due to a missing stack
+    report("removing infrastructure")
+    stack = SREProjectManager(
+        context=context,
+        config=sre_config,
+        pulumi_config=pulumi_config,
+        graph_api_token=graph_api_token,
+        create_project=True,
+        parallelism=parallelism,
+    )
+    stack.teardown(force=force)
+
+    # Remove Pulumi project from Pulumi config file
+    del pulumi_config[name]
+
+    # Upload Pulumi config to blob storage
+    pulumi_config.upload(context)
+
+
+def init_worker(confirmed_credentials: set[tuple[str, str]]) -> None:
+    """Prepare a worker process, which cannot interact with the user"""
+    # Credentials were confirmed by the user before the workers started
+    DeferredCredential.cache_.update(confirmed_credentials)
+    # Messages go to per-SRE log files instead of the shared console
+    logger = get_logger()
+    for handler in logger.handlers[:]:
+        if isinstance(handler, PlainFileHandler):
+            logger.removeHandler(handler)
+    get_console_handler().setLevel(logging.CRITICAL + 1)
+
+
+def run_worker(
+    operation: str,
+    *,
+    context_dict: dict[str, Any],
+    name: str,
+    graph_api_token: str,
+    options: dict[str, Any],
+    log_path: pathlib.Path,
+    events: "queue.Queue[tuple[str, str]]",
+) -> str | None:
+    """
+    Run an operation on one SRE in a worker process, logging to its own file
+
+    Returns:
+        str | None: A description of the failure, or None if the operation succeeded
+    """
+    logger = get_logger()
+    file_handler = PlainFileHandler(log_path, delay=True, encoding="utf8", mode="a")
+    file_handler.setFormatter(
+        logging.Formatter(r"%(asctime)s - %(levelname)s - %(message)s")
+    )
+    logger.addHandler(file_handler)
+    try:
+        context = Context(**context_dict)
+
+        def on_stage(stage: str) -> None:
+            events.put((name, stage))
+
+        if operation == "deploy":
+            shm_config = SHMConfig.from_remote(context)
+            deploy_sre(
+                context,
+                shm_config,
+                name,
+                graph_api_token,
+                on_stage=on_stage,
+                **options,
+            )
+        else:
+            teardown_sre(context, name, graph_api_token, on_stage=on_stage, **options)
+        return None
+    except DataSafeHavenError as exc:
+        # Errors are returned as text, as DataSafeHavenErrors log themselves when
+        # they are unpickled in the main process
+        logger.exception(f"Failed to {operation} SRE [green]{name}[/].")
+        return str(exc)
+    finally:
+        # Each worker reports the requests it made for this SRE
+        RequestMetrics.report(show_table=False)
+        RequestMetrics.reset()
+        logger.removeHandler(file_handler)
+        file_handler.close()
+
+
+class SREFleet:
+    """
+    Deploy or tear down several SREs at once
+
+    Each SRE is handled by a separate worker process with its own Pulumi workspace,
+    logging to its own file. At most `max_workers` SREs are handled at the same time.
+    The shared Pulumi configuration is updated by each worker with conditional
+    writes, but the first SRE that is deployed also sets the Pulumi encryption key,
+    so it is deployed before any others. If any SRE in a batch fails, later batches
+    are not run.
+    """
+
+    def __init__(
+        self,
+        context: Context,
+        graph_api_token: str,
+        *,
+        max_workers: int = 4,
+    ) -> None:
+        self.context = context
+        self.graph_api_token = graph_api_token
+        self.logger = get_logger()
+        self.max_workers = max_workers
+        self.log_directory = (
+            log_dir() / f"sre-fleet-{datetime.now(UTC).strftime('%Y%m%dT%H%M%S')}"
+        )
+
+    def deploy(self, names: Sequence[str], **options: Any) -> None:
+        """
+        Deploy several SREs
+
+        Raises:
+            DataSafeHavenPulumiError if any SRE could not be deployed
+        """
+        pulumi_config = DSHPulumiConfig.from_remote_or_create(
+            self.context, encrypted_key=None, projects={}
+        )
+        batches = [list(names)]
+        if not pulumi_config.encrypted_key:
+            batches = [list(names[:1]), list(names[1:])]
+        self.run("deploy", batches, options)
+
+    def teardown(self, names: Sequence[str], **options: Any) -> None:
+        """
+        Tear down several SREs
+
+        Raises:
+            DataSafeHavenPulumiError if any SRE could not be torn down
+        """
+        self.run("teardown", [list(names)], options)
+
+    def executor(self) -> Executor:
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=get_context("spawn"),
+            initializer=init_worker,
+            initargs=(set(DeferredCredential.cache_),),
+        )
+
+    def run(
+        self, operation: str, batches: list[list[str]], options: dict[str, Any]
+    ) -> None:
+        """Run an operation on batches of SREs, stopping after a batch with failures"""
+        self.log_directory.mkdir(parents=True, exist_ok=True)
+        self.logger.info(
+            f"Logs for each SRE will be written to [green]{self.log_directory}[/]."
+        )
+        failures: dict[str, str] = {}
+        skipped: list[str] = []
+        with (
+            Manager() as manager,
+            self.executor() as executor,
+            Progress(
+                SpinnerColumn(),
+                TextColumn("[bold]{task.description}"),
+                TextColumn("{task.fields[stage]}"),
+                TimeElapsedColumn(),
+                console=get_console_handler().console,
+            ) as progress,
+        ):
+            events = manager.Queue()
+            tasks = {
+                name: progress.add_task(name, stage="queued", start=False)
+                for batch in batches
+                for name in batch
+            }
+            for batch in batches:
+                # Later batches may depend on earlier ones, e.g. for the encryption key
+                if failures:
+                    for name in batch:
+                        skipped.append(name)
+                        progress.update(tasks[name], stage="[yellow]not run[/]")
+                    continue
+                futures: dict[Future[str | None], str] = {
+                    executor.submit(
+                        run_worker,
+                        operation,
+                        context_dict=self.context.model_dump(),
+                        name=name,
+                        graph_api_token=self.graph_api_token,
+                        options=options,
+                        log_path=self.log_directory / f"{name}.log",
+                        events=events,
+                    ): name
+                    for name in batch
+                }
+                pending = set(futures)
+                while pending:
+                    done, pending = wait(pending, timeout=0.5)
+                    while True:
+                        try:
+                            name, stage = events.get_nowait()
+                        except queue.Empty:
+                            break
+                        progress.start_task(tasks[name])
+                        progress.update(tasks[name], stage=stage)
+                    for future in done:
+                        name = futures[future]
+                        try:
+                            error = future.result()
+                        except Exception as exc:
+                            error = str(exc) or type(exc).__name__
+                        if error:
+                            failures[name] = error
+                            stage = "[red]failed[/]"
+                        else:
+                            stage = "[green]succeeded[/]"
+                        progress.update(tasks[name], stage=stage)
+                        progress.stop_task(tasks[name])
+        self.summarise(operation, list(tasks), failures, skipped)
+
+    def summarise(
+        self,
+        operation: str,
+        names: Sequence[str],
+        failures: dict[str, str],
+        skipped: Sequence[str] = (),
+    ) -> None:
+        """
+        Show the result for each SRE
+
+        Raises:
+            DataSafeHavenPulumiError if any SRE failed or was not run
+        """
+
+        def result(name: str) -> str:
+            if name in failures:
+                return f"[red]failed: {failures[name]}[/]"
+            if name in skipped:
+                return "[yellow]not run: an earlier SRE failed[/]"
+            return "[green]succeeded[/]"
+
+        console.tabulate(
+            header=["SRE", "Result", "Log file"],
+            rows=[
+                [name, result(name), str(self.log_directory / f"{name}.log")]
+                for name in names
+            ],
+        )
+        if failures:
+            msg = f"Failed to {operation} SREs {sorted(failures)}."
+            if skipped:
+                msg += f" SREs {sorted(skipped)} were not run."
+            raise DataSafeHavenPulumiError(msg)
@@ -5,7 +5,7 @@ from typing import ClassVar
 
 import yaml
 from azure.keyvault.keys import KeyVaultKey
-from pydantic import BaseModel
+from pydantic import BaseModel, PositiveInt
 
 from data_safe_haven import __version__
 from data_safe_haven.directories import config_dir
@@ -18,7 +18,10 @@ from data_safe_haven.types import AzureSubscriptionName, EntraGroupName, SafeStr
 class Context(ContextBase, BaseModel, validate_assignment=True):
     admin_group_name: EntraGroupName
     description: str
+    # Authenticate to blob storage with Entra tokens rather than account keys
+    entra_storage_auth: bool = False
     name: SafeString
+    pulumi_parallelism: PositiveInt | None = None
     subscription_name: AzureSubscriptionName
     storage_container_name: ClassVar[str] = "config"
     pulumi_storage_container_name: ClassVar[str] = "pulumi"
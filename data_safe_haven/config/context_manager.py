@@ -88,7 +88,9 @@ class ContextManager(YAMLSerialisableModel):
         *,
         admin_group_name: str | None = None,
         description: str | None = None,
+        entra_storage_auth: bool | None = None,
         name: str | None = None,
+        pulumi_parallelism: int | None = None,
         subscription_name: str | None = None,
     ) -> None:
         context = self.assert_context()
@@ -108,6 +110,16 @@ class ContextManager(YAMLSerialisableModel):
                 f"Updating name from '{context.name}' to '[green]{name}[/]'."
             )
             context.name = name
+        if entra_storage_auth is not None:
+            self.logger.debug(
+                f"Updating Entra storage authentication from '{context.entra_storage_auth}' to '[green]{entra_storage_auth}[/]'."
+            )
+            context.entra_storage_auth = entra_storage_auth
+        if pulumi_parallelism:
+            self.logger.debug(
+                f"Updating Pulumi parallelism from '{context.pulumi_parallelism}' to '[green]{pulumi_parallelism}[/]'."
+            )
+            context.pulumi_parallelism = pulumi_parallelism
         if subscription_name:
             self.logger.debug(
                 f"Updating subscription name from '{context.subscription_name}' to '[green]{subscription_name}[/]'."
@@ -1,10 +1,45 @@
 from __future__ import annotations
 
-from typing import ClassVar
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, ClassVar, Self
 
-from data_safe_haven.serialisers import AzureSerialisableModel
+from pydantic import Field, PrivateAttr, model_validator
 
-from .dsh_pulumi_project import DSHPulumiProject
+from data_safe_haven.exceptions import DataSafeHavenConfigError
+from data_safe_haven.external import AzureSdk
+from data_safe_haven.serialisers import AzureSerialisableModel, ContextBase
+
+from .dsh_pulumi_project import DSHPulumiProject, pulumi_project_config_name
+
+
+class DSHPulumiIndex(AzureSerialisableModel):
+    """
+    Index of DSH Pulumi projects, each of which is stored in its own file
+
+    Older versions stored every project inline in the index and only read the
+    'projects' mapping. Indexes written by older versions are still read, and their
+    projects are written to their own files the next time the configuration is
+    uploaded. Until support for older versions is removed in the next release, a
+    copy of every project is also kept in the index so that they can still read it.
+    """
+
+    config_type: ClassVar[str] = "Pulumi"
+    default_filename: ClassVar[str] = "pulumi.yaml"
+    encrypted_key: str | None
+    project_names: list[str] = Field(default_factory=list)
+    projects: dict[str, DSHPulumiProject] = Field(default_factory=dict)
+    # Whether the projects were stored inline by an older version
+    inline: bool = Field(default=False, exclude=True)
+
+    @model_validator(mode="before")
+    @classmethod
+    def project_names_from_projects(cls, data: Any) -> Any:
+        if isinstance(data, dict):
+            data = data | {"inline": "project_names" not in data}
+            if data["inline"]:
+                data["project_names"] = list(data.get("projects") or {})
+        return data
 
 
 class DSHPulumiConfig(AzureSerialisableModel):
@@ -14,6 +49,13 @@ class DSHPulumiConfig(AzureSerialisableModel):
     default_filename: ClassVar[str] = "pulumi.yaml"
     encrypted_key: str | None
     projects: dict[str, DSHPulumiProject]
+    # State of the remote configuration when it was loaded
+    _remote_encrypted_key: str | None = PrivateAttr(default=None)
+    _remote_projects: dict[str, DSHPulumiProject] = PrivateAttr(default_factory=dict)
+    # Projects that are stored inline in the index by an older version
+    _inline_project_names: set[str] = PrivateAttr(default_factory=set)
+    # Projects as written to their own files during the current upload
+    _uploaded_projects: dict[str, DSHPulumiProject] = PrivateAttr(default_factory=dict)
 
     def __getitem__(self, key: str) -> DSHPulumiProject:
         if not isinstance(key, str):
@@ -61,3 +103,168 @@ class DSHPulumiConfig(AzureSerialisableModel):
         if project_name not in self.project_names:
             self[project_name] = DSHPulumiProject(stack_config={})
         return self[project_name]
+
+    @classmethod
+    def from_remote(
+        cls: type[Self], context: ContextBase, *, filename: str | None = None
+    ) -> Self:
+        """
+        Construct a DSHPulumiConfig from its index and project files in Azure storage.
+
+        Raises:
+            DataSafeHavenAzureError: if the files cannot be loaded
+            DataSafeHavenAzureStorageError: if the storage account does not exist
+        """
+        index = DSHPulumiIndex.from_remote(context, filename=filename)
+        inline_projects = index.projects if index.inline else {}
+
+        def load_project(project_name: str) -> DSHPulumiProject:
+            if project_name in inline_projects:
+                return inline_projects[project_name]
+            return DSHPulumiProject.from_remote(
+                context, filename=pulumi_project_config_name(project_name)
+            )
+
+        with ThreadPoolExecutor() as executor:
+            projects = dict(
+                zip(
+                    index.project_names,
+                    executor.map(load_project, index.project_names),
+                    strict=True,
+                )
+            )
+        pulumi_config = cls(encrypted_key=index.encrypted_key, projects=projects)
+        pulumi_config._remote_encrypted_key = index.encrypted_key
+        pulumi_config._remote_projects = {
+            name: project.model_copy(deep=True) for name, project in projects.items()
+        }
+        pulumi_config._inline_project_names = set(inline_projects)
+        return pulumi_config
+
+    def upload(self, context: ContextBase, *, filename: str | None = None) -> None:
+        """
+        Upload the projects that have changed since this configuration was loaded.
+
+        Each project is stored in its own file, so configurations for different
+        projects can be uploaded concurrently. Every write is conditional on the file
+        not having changed since it was read. Changes from other clients are merged
+        with local changes, unless both changed the same setting.
+
+        Raises:
+            DataSafeHavenAzureError: if the files cannot be uploaded
+            DataSafeHavenConfigError: if the same setting was changed concurrently
+        """
+        azure_sdk = AzureSdk(
+            subscription_name=context.subscription_name,
+            entra_storage_auth=context.entra_storage_auth,
+        )
+        blob_location = (
+            context.resource_group_name,
+            context.storage_account_name,
+            context.storage_container_name,
+        )
+        changed_names = sorted(
+            name
+            for name in set(self.projects) | set(self._remote_projects)
+            if self.projects.get(name) != self._remote_projects.get(name)
+            or name in self._inline_project_names
+        )
+        # Write new projects before they are added to the index, and only remove
+        # projects after they have been removed from it
+        self._uploaded_projects = {}
+        for name in (name for name in changed_names if name in self.projects):
+            azure_sdk.update_blob(
+                pulumi_project_config_name(name),
+                *blob_location,
+                partial(self.merge_project, name),
+            )
+        azure_sdk.update_blob(
+            filename or self.default_filename, *blob_location, self.merge_index
+        )
+        for name in (name for name in changed_names if name not in self.projects):
+            azure_sdk.update_blob(
+                pulumi_project_config_name(name),
+                *blob_location,
+                partial(self.merge_project, name),
+            )
+        self._remote_encrypted_key = self.encrypted_key
+        self._remote_projects = {
+            name: project.model_copy(deep=True)
+            for name, project in self.projects.items()
+        }
+        self._inline_project_names = set()
+
+    def merge_index(self, remote_yaml: str | None) -> str:
+        """Apply local changes to the remote index"""
+        remote = (
+            DSHPulumiIndex.from_yaml(remote_yaml)
+            if remote_yaml
+            else DSHPulumiIndex(encrypted_key=None)
+        )
+        encrypted_key = remote.encrypted_key
+        if self.encrypted_key != self._remote_encrypted_key:
+            if encrypted_key not in (self._remote_encrypted_key, self.encrypted_key):
+                msg = "Pulumi encryption key was changed by another client."
+                raise DataSafeHavenConfigError(msg)
+            encrypted_key = self.encrypted_key
+        added = set(self.projects) - set(self._remote_projects)
+        removed = set(self._remote_projects) - set(self.projects)
+        project_names = sorted((set(remote.project_names) | added) - removed)
+        # Keep a copy of each project for older versions, which only read the index
+        remote_projects = remote.projects | self._uploaded_projects
+        return DSHPulumiIndex(
+            encrypted_key=encrypted_key,
+            project_names=project_names,
+            projects={
+                name: remote_projects[name]
+                for name in project_names
+                if name in remote_projects
+            },
+        ).to_yaml()
+
+    def merge_project(self, project_name: str, remote_yaml: str | None) -> str | None:
+        """Apply local changes to a remote project"""
+        if project_name not in self.projects:
+            return None
+        base = self._remote_projects.get(
+            project_name, DSHPulumiProject(stack_config={})
+        )
+        local = self.projects[project_name]
+        # Projects stored inline by an older version replace their project files, as
+        # the older version will have written them most recently
+        if not remote_yaml or project_name in self._inline_project_names:
+            self._uploaded_projects[project_name] = local.model_copy(deep=True)
+            return local.to_yaml()
+        remote = DSHPulumiProject.from_yaml(remote_yaml)
+        stack_config = remote.stack_config
+        missing = object()
+        for key in set(base.stack_config) | set(local.stack_config):
+            base_value = base.stack_config.get(key, missing)
+            local_value = local.stack_config.get(key, missing)
+            if local_value == base_value:
+                continue
+            if stack_config.get(key, missing) not in (base_value, local_value):
+                msg = f"Setting '{key}' of Pulumi project '{project_name}' was changed by another client."
+                raise DataSafeHavenConfigError(msg)
+            if local_value is missing:
+                stack_config.pop(key, None)
+            else:
+                stack_config[key] = local_value
+        # The most recent deployment determines the fingerprint
+        deploy_fingerprint = remote.deploy_fingerprint
+        if local.deploy_fingerprint != base.deploy_fingerprint:
+            deploy_fingerprint = local.deploy_fingerprint
+        # Stack outputs come from the most recent update, unless removed locally
+        outputs = remote
+        if (local.stack_outputs_version or 0) > (remote.stack_outputs_version or 0) or (
+            local.stack_outputs_version != base.stack_outputs_version
+            and local.stack_outputs_version is None
+        ):
+            outputs = local
+        self._uploaded_projects[project_name] = DSHPulumiProject(
+            stack_config=stack_config,
+            deploy_fingerprint=deploy_fingerprint,
+            stack_outputs=outputs.stack_outputs,
+            stack_outputs_version=outputs.stack_outputs_version,
+        )
+        return self._uploaded_projects[project_name].to_yaml()
@@ -1,19 +1,38 @@
 from __future__ import annotations
 
-from typing import Any
+from typing import Any, ClassVar
 
-from pydantic import BaseModel
+from pydantic import Field
 
+from data_safe_haven.functions import json_safe
+from data_safe_haven.serialisers import AzureSerialisableModel
 
-class DSHPulumiProject(BaseModel, validate_assignment=True):
+
+def pulumi_project_config_name(project_name: str) -> str:
+    """Construct a safe YAML filename given an input Pulumi project name."""
+    return f"pulumi-{json_safe(project_name)}.yaml"
+
+
+class DSHPulumiProject(AzureSerialisableModel):
     """Container for DSH Pulumi Project persistent information"""
 
+    config_type: ClassVar[str] = "Pulumi project"
     stack_config: dict[str, Any]
+    # Fingerprint of the inputs to the last successful deployment
+    deploy_fingerprint: str | None = None
+    # Non-secret stack outputs and the version of the update that produced them
+    stack_outputs: dict[str, Any] = Field(default_factory=dict)
+    stack_outputs_version: int | None = None
 
     def __eq__(self, other: object) -> bool:
         if not isinstance(other, DSHPulumiProject):
             return NotImplemented
-        return self.stack_config == other.stack_config
+        return (
+            self.stack_config == other.stack_config
+            and self.deploy_fingerprint == other.deploy_fingerprint
+            and self.stack_outputs == other.stack_outputs
+            and self.stack_outputs_version == other.stack_outputs_version
+        )
 
     def __hash__(self) -> int:
         return hash(self.stack_config)
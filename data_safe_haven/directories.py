@@ -1,5 +1,7 @@
+import os
 from os import getenv
 from pathlib import Path
+from threading import get_ident
 
 import appdirs
 
@@ -23,3 +25,24 @@ def log_dir() -> Path:
         log_directory.mkdir(parents=True, exist_ok=True)
 
     return log_directory
+
+
+def write_private_file(path: Path, content: str) -> None:
+    """
+    Write a file that only the current user can read
+
+    Any existing file is replaced atomically, so concurrent readers never see a
+    partially-written file.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}-{get_ident()}")
+    try:
+        with open(
+            os.open(tmp_path, os.O_CREAT | os.O_TRUNC | os.O_WRONLY, 0o600),
+            "w",
+            encoding="utf-8",
+        ) as f_tmp:
+            f_tmp.write(content)
+        tmp_path.replace(path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
@@ -1,15 +1,25 @@
+from .api.async_azure_sdk import AsyncAzureSdk
+from .api.azure_blob_cache import AzureBlobCache
+from .api.azure_lro_waiter import AzureLROWaiter
 from .api.azure_sdk import AzureSdk
+from .api.azure_vm_sku_catalogue import AzureVmSkuCatalogue
 from .api.graph_api import GraphApi
+from .api.request_metrics import RequestMetrics
 from .interface.azure_container_instance import AzureContainerInstance
 from .interface.azure_ipv4_range import AzureIPv4Range
 from .interface.azure_postgresql_database import AzurePostgreSQLDatabase
 from .interface.pulumi_account import PulumiAccount
 
 __all__ = [
+    "AsyncAzureSdk",
+    "AzureBlobCache",
     "AzureSdk",
     "AzureContainerInstance",
     "AzureIPv4Range",
+    "AzureLROWaiter",
     "AzurePostgreSQLDatabase",
+    "AzureVmSkuCatalogue",
     "GraphApi",
     "PulumiAccount",
+    "RequestMetrics",
 ]
@@ -0,0 +1,432 @@
+"""Asynchronous interface to the Azure Python SDK"""
+
+import asyncio
+import time
+from collections.abc import Callable
+from types import TracebackType
+from typing import Any, Self, TypeVar, cast
+
+import aiohttp
+from azure.core.exceptions import AzureError, ResourceNotFoundError
+from azure.core.pipeline.transport import AioHttpTransport
+from azure.keyvault.secrets.aio import SecretClient
+from azure.mgmt.containerinstance.aio import ContainerInstanceManagementClient
+from azure.mgmt.containerinstance.models import ContainerGroup
+from azure.mgmt.dns.v2018_05_01.aio import DnsManagementClient
+from azure.mgmt.dns.v2018_05_01.models import RecordSet, RecordType, TxtRecord
+from azure.mgmt.storage.v2021_08_01.aio import StorageManagementClient
+from azure.mgmt.storage.v2021_08_01.models import StorageAccountKey
+from azure.storage.blob.aio import BlobClient, BlobServiceClient
+
+from data_safe_haven.exceptions import (
+    DataSafeHavenAzureError,
+    DataSafeHavenAzureStorageError,
+)
+from data_safe_haven.types import AzureSdkCredentialScope
+
+from .azure_lro_waiter import AzureLROWaiter
+from .azure_sdk import AzureSdk
+from .credentials import AsyncAzureSdkCredential
+
+ClientT = TypeVar("ClientT")
+
+
+class AsyncAzureSdk:
+    """
+    Asynchronous interface to commonly used parts of the Azure Python SDK
+
+    Clients come from the azure.*.aio packages and share one aiohttp session, so that
+    independent requests can overlap inside a single event loop. Subscription
+    details, credentials and cached storage keys are shared with AzureSdk.
+
+    Use this as an asynchronous context manager so that its clients are closed:
+
+        async with AsyncAzureSdk(subscription_name) as azure_sdk:
+            await asyncio.gather(...)
+    """
+
+    def __init__(
+        self,
+        subscription_name: str,
+        *,
+        disable_logging: bool = False,
+        entra_storage_auth: bool = False,
+    ) -> None:
+        self.azure_sdk = AzureSdk(
+            subscription_name,
+            disable_logging=disable_logging,
+            entra_storage_auth=entra_storage_auth,
+        )
+        self.logger = self.azure_sdk.logger
+        self.clients_: dict[tuple[Callable[..., Any], str], Any] = {}
+        self.session_: aiohttp.ClientSession | None = None
+
+    async def __aenter__(self) -> Self:
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """Close all clients and the shared aiohttp session"""
+        await asyncio.gather(*(client.close() for client in self.clients_.values()))
+        self.clients_.clear()
+        if self.session_:
+            await self.session_.close()
+            self.session_ = None
+
+    def credential(
+        self, scope: AzureSdkCredentialScope = AzureSdkCredentialScope.DEFAULT
+    ) -> AsyncAzureSdkCredential:
+        return AsyncAzureSdkCredential(self.azure_sdk.credential(scope))
+
+    def transport(self) -> AioHttpTransport:
+        """Create a transport that sends requests through the shared aiohttp session"""
+        if not self.session_:
+            self.session_ = aiohttp.ClientSession()
+        return AioHttpTransport(session=self.session_, session_owner=False)
+
+    async def subscription_id(self) -> str:
+        return await asyncio.to_thread(lambda: self.azure_sdk.subscription_id)
+
+    async def management_client(self, client_class: Callable[..., ClientT]) -> ClientT:
+        """Get an asynchronous Azure management client, reusing one if possible"""
+        subscription_id = await self.subscription_id()
+        key = (client_class, subscription_id)
+        if key not in self.clients_:
+            self.clients_[key] = client_class(
+                self.credential(),
+                subscription_id,
+                per_retry_policies=AzureSdk.metrics_policies,
+                polling_interval=AzureLROWaiter.polling_interval,
+                transport=self.transport(),
+            )
+        return cast(ClientT, self.clients_[key])
+
+    def keyvault_client(
+        self, client_class: Callable[..., ClientT], key_vault_name: str
+    ) -> ClientT:
+        """Get an asynchronous Azure Key Vault client, reusing one if possible"""
+        vault_url = f"https://{key_vault_name}.vault.azure.net"
+        key = (client_class, vault_url)
+        if key not in self.clients_:
+            self.clients_[key] = client_class(
+                vault_url=vault_url,
+                credential=self.credential(),
+                transport=self.transport(),
+            )
+        return cast(ClientT, self.clients_[key])
+
+    async def blob_client(
+        self,
+        resource_group_name: str,
+        storage_account_name: str,
+        storage_container_name: str,
+        blob_name: str,
+    ) -> BlobClient:
+        """Construct a client for a blob which may exist or not"""
+        key = (BlobServiceClient, storage_account_name)
+        if key not in self.clients_:
+            if self.azure_sdk.entra_storage_auth:
+                # Use an Entra token, which does not need the account keys
+                self.clients_[key] = BlobServiceClient(
+                    account_url=f"https://{storage_account_name}.blob.core.windows.net",
+                    credential=self.credential(AzureSdkCredentialScope.STORAGE),
+                    transport=self.transport(),
+                )
+            else:
+                storage_account_keys = await self.get_storage_account_keys(
+                    resource_group_name, storage_account_name
+                )
+                self.clients_[key] = BlobServiceClient.from_connection_string(
+                    f"DefaultEndpointsProtocol=https;AccountName={storage_account_name};AccountKey={storage_account_keys[0].value};EndpointSuffix=core.windows.net",
+                    transport=self.transport(),
+                )
+        blob_service_client = cast(BlobServiceClient, self.clients_[key])
+        return blob_service_client.get_blob_client(
+            container=storage_container_name, blob=blob_name
+        )
+
+    async def blob_exists(
+        self,
+        blob_name: str,
+        resource_group_name: str,
+        storage_account_name: str,
+        storage_container_name: str,
+    ) -> bool:
+        """Find out whether a blob file exists in Azure storage
+
+        Returns:
+            bool: Whether or not the blob exists
+        """
+        try:
+            blob_client = await self.blob_client(
+                resource_group_name,
+                storage_account_name,
+                storage_container_name,
+                blob_name,
+            )
+            exists = bool(await blob_client.exists())
+        except (AzureError, DataSafeHavenAzureError):
+            exists = False
+        response = "exists" if exists else "does not exist"
+        self.logger.debug(
+            f"File [green]{blob_name}[/] {response} in blob storage.",
+        )
+        return exists
+
+    async def download_blob(
+        self,
+        blob_name: str,
+        resource_group_name: str,
+        storage_account_name: str,
+        storage_container_name: str,
+    ) -> str:
+        """Download a blob file from Azure storage
+
+        Returns:
+            str: The contents of the blob
+
+        Raises:
+            DataSafeHavenAzureError if the blob could not be downloaded
+        """
+        try:
+            blob_client = await self.blob_client(
+                resource_group_name,
+                storage_account_name,
+                storage_container_name,
+                blob_name,
+            )
+            # Download the requested file
+            downloader = await blob_client.download_blob(encoding="utf-8")
+            blob_content = await downloader.readall()
+            self.logger.debug(
+                f"Downloaded file [green]{blob_name}[/] from blob storage.",
+            )
+            return str(blob_content)
+        except AzureError as exc:
+            msg = f"Blob file '{blob_name}' could not be downloaded from '{storage_account_name}'."
+            raise DataSafeHavenAzureError(msg) from exc
+
+    async def ensure_dns_txt_record(
+        self,
+        record_name: str,
+        record_value: str,
+        resource_group_name: str,
+        zone_name: str,
+        ttl: int = 30,
+    ) -> RecordSet:
+        """Ensure that a DNS TXT record exists in a DNS zone
+
+        Returns:
+            RecordSet: The DNS record set
+
+        Raises:
+            DataSafeHavenAzureError if the record could not be created
+        """
+        try:
+            # Connect to Azure clients
+            dns_client = await self.management_client(DnsManagementClient)
+
+            # Ensure that record exists
+            self.logger.debug(
+                f"Ensuring that DNS TXT record [green]{record_name}[/] exists in zone [bold]{zone_name}[/]...",
+            )
+            record_set = await dns_client.record_sets.create_or_update(
+                parameters=RecordSet(
+                    ttl=ttl, txt_records=[TxtRecord(value=[record_value])]
+                ),
+                record_type=RecordType.TXT,
+                relative_record_set_name=record_name,
+                resource_group_name=resource_group_name,
+                zone_name=zone_name,
+            )
+            self.logger.info(
+                f"Ensured that DNS TXT record [green]{record_name}[/] exists in zone [bold]{zone_name}[/].",
+            )
+            return record_set
+        except AzureError as exc:
+            msg = f"Failed to create DNS TXT record {record_name} in zone {zone_name}."
+            raise DataSafeHavenAzureError(msg) from exc
+
+    async def get_container_group(
+        self, resource_group_name: str, container_group_name: str
+    ) -> ContainerGroup:
+        """Get a container group
+
+        Raises:
+            DataSafeHavenAzureError if the container group could not be loaded
+        """
+        try:
+            aci_client = await self.management_client(ContainerInstanceManagementClient)
+            return await aci_client.container_groups.get(
+                resource_group_name, container_group_name
+            )
+        except AzureError as exc:
+            msg = f"Could not load container group {container_group_name}."
+            raise DataSafeHavenAzureError(msg) from exc
+
+    async def get_keyvault_secret(self, key_vault_name: str, secret_name: str) -> str:
+        """Read a secret from the KeyVault
+
+        Returns:
+            str: The secret value
+
+        Raises:
+            DataSafeHavenAzureError if the secret could not be read
+        """
+        # Connect to Azure clients
+        secret_client = self.keyvault_client(SecretClient, key_vault_name)
+        # Ensure that secret exists
+        try:
+            secret = await secret_client.get_secret(secret_name)
+            if secret.value:
+                return str(secret.value)
+            msg = f"Secret {secret_name} has no value."
+            raise DataSafeHavenAzureError(msg)
+        except AzureError as exc:
+            msg = f"Failed to retrieve secret {secret_name}."
+            raise DataSafeHavenAzureError(msg) from exc
+
+    async def get_storage_account_keys(
+        self, resource_group_name: str, storage_account_name: str
+    ) -> list[StorageAccountKey]:
+        """Retrieve the storage account keys for an existing storage account
+
+        Keys are shared with AzureSdk, which caches them for a short time.
+
+        Returns:
+            List[StorageAccountKey]: The keys for this storage account
+
+        Raises:
+            DataSafeHavenAzureError if the keys could not be loaded
+        """
+        msg_sa = f"storage account '{storage_account_name}'"
+        msg_rg = f"resource group '{resource_group_name}'"
+        key = (await self.subscription_id(), resource_group_name, storage_account_name)
+        with AzureSdk.lock_:
+            expiry, cached_keys = AzureSdk.storage_keys_.get(key, (0.0, []))
+        if cached_keys and (time.monotonic() < expiry):
+            return cached_keys
+        try:
+            # Connect to Azure client
+            storage_client = await self.management_client(StorageManagementClient)
+            storage_keys = await storage_client.storage_accounts.list_keys(
+                resource_group_name,
+                storage_account_name,
+            )
+            keys = cast(list[StorageAccountKey], storage_keys.keys)
+            if not keys:
+                msg = f"No keys were retrieved for {msg_sa} in {msg_rg}."
+                raise DataSafeHavenAzureStorageError(msg)
+            with AzureSdk.lock_:
+                AzureSdk.storage_keys_[key] = (
+                    time.monotonic() + AzureSdk.storage_cache_ttl,
+                    keys,
+                )
+            return keys
+        except AzureError as exc:
+            msg = f"Keys could not be loaded for {msg_sa} in {msg_rg}."
+            raise DataSafeHavenAzureStorageError(msg) from exc
+
+    async def remove_dns_txt_record(
+        self,
+        record_name: str,
+        resource_group_name: str,
+        zone_name: str,
+    ) -> None:
+        """Remove a DNS record if it exists in a DNS zone
+
+        Raises:
+            DataSafeHavenAzureError if the record could not be removed
+        """
+        try:
+            # Connect to Azure clients
+            dns_client = await self.management_client(DnsManagementClient)
+            # Check whether resource currently exists
+            try:
+                await dns_client.record_sets.get(
+                    record_type=RecordType.TXT,
+                    relative_record_set_name=record_name,
+                    resource_group_name=resource_group_name,
+                    zone_name=zone_name,
+                )
+            except ResourceNotFoundError:
+                self.logger.warning(
+                    f"DNS record [green]{record_name}[/] does not exist in zone [green]{zone_name}[/].",
+                )
+                return
+            # Ensure that record is removed
+            self.logger.debug(
+                f"Ensuring that DNS record [green]{record_name}[/] is removed from zone [green]{zone_name}[/]...",
+            )
+            await dns_client.record_sets.delete(
+                record_type=RecordType.TXT,
+                relative_record_set_name=record_name,
+                resource_group_name=resource_group_name,
+                zone_name=zone_name,
+            )
+            self.logger.info(
+                f"Ensured that DNS record [green]{record_name}[/] is removed from zone [green]{zone_name}[/].",
+            )
+        except AzureError as exc:
+            msg = f"Failed to remove DNS record {record_name} from zone {zone_name}."
+            raise DataSafeHavenAzureError(msg) from exc
+
+    async def restart_container_group(
+        self, resource_group_name: str, container_group_name: str
+    ) -> None:
+        """Restart a container group and wait for it to finish restarting
+
+        Raises:
+            DataSafeHavenAzureError if the container group could not be restarted
+        """
+        try:
+            aci_client = await self.management_client(ContainerInstanceManagementClient)
+            self.logger.debug(
+                f"Restarting container group [green]{container_group_name}[/]...",
+            )
+            poller = await aci_client.container_groups.begin_restart(
+                resource_group_name, container_group_name
+            )
+            await poller.result()
+            self.logger.info(
+                f"Restarted container group [green]{container_group_name}[/].",
+            )
+        except AzureError as exc:
+            msg = f"Could not restart container group {container_group_name}."
+            raise DataSafeHavenAzureError(msg) from exc
+
+    async def upload_blob(
+        self,
+        blob_data: bytes | str,
+        blob_name: str,
+        resource_group_name: str,
+        storage_account_name: str,
+        storage_container_name: str,
+    ) -> None:
+        """Upload a file to Azure blob storage
+
+        Raises:
+            DataSafeHavenAzureError if the blob could not be uploaded
+        """
+        try:
+            blob_client = await self.blob_client(
+                resource_group_name,
+                storage_account_name,
+                storage_container_name,
+                blob_name,
+            )
+            # Upload the created file
+            await blob_client.upload_blob(blob_data, overwrite=True)
+            self.logger.debug(
+                f"Uploaded file [green]{blob_name}[/] to blob storage.",
+            )
+        except AzureError as exc:
+            msg = f"Blob file '{blob_name}' could not be uploaded to '{storage_account_name}'."
+            raise DataSafeHavenAzureError(msg) from exc
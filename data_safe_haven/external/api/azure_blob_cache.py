@@ -0,0 +1,74 @@
+"""Local cache of blobs downloaded from Azure storage"""
+
+import json
+import pathlib
+from contextlib import suppress
+from typing import Any
+
+from data_safe_haven.directories import config_dir, write_private_file
+
+
+class AzureBlobCache:
+    """
+    Store the contents and ETag of downloaded blobs in the config directory
+
+    Cached blobs are keyed by storage account, container and blob name. A cached
+    copy is only used after Azure has confirmed, via a conditional request with its
+    ETag, that the blob has not changed since it was downloaded.
+    """
+
+    @classmethod
+    def path(
+        cls, storage_account_name: str, storage_container_name: str, blob_name: str
+    ) -> pathlib.Path:
+        return (
+            config_dir()
+            / "cache"
+            / storage_account_name
+            / storage_container_name
+            / f"{blob_name}.json"
+        )
+
+    @classmethod
+    def read(
+        cls, storage_account_name: str, storage_container_name: str, blob_name: str
+    ) -> dict[str, Any] | None:
+        """Load the cached content and ETag of a blob, if there are any"""
+        with suppress(OSError, ValueError):
+            with open(
+                cls.path(storage_account_name, storage_container_name, blob_name),
+                encoding="utf-8",
+            ) as f_cache:
+                cached = dict(json.load(f_cache))
+            if isinstance(cached.get("content"), str) and cached.get("etag"):
+                return cached
+        return None
+
+    @classmethod
+    def remove(
+        cls, storage_account_name: str, storage_container_name: str, blob_name: str
+    ) -> None:
+        """Remove a blob from the cache"""
+        with suppress(OSError):
+            cls.path(storage_account_name, storage_container_name, blob_name).unlink()
+
+    @classmethod
+    def write(
+        cls,
+        storage_account_name: str,
+        storage_container_name: str,
+        blob_name: str,
+        *,
+        content: str,
+        etag: str | None,
+    ) -> None:
+        """Store the content and ETag of a blob, replacing any existing file atomically"""
+        if not etag:
+            cls.remove(storage_account_name, storage_container_name, blob_name)
+            return
+        # Configuration files may contain secrets, so are only readable by the user
+        with suppress(OSError):
+            write_private_file(
+                cls.path(storage_account_name, storage_container_name, blob_name),
+                json.dumps({"content": content, "etag": etag}),
+            )
@@ -0,0 +1,85 @@
+"""Wait for Azure long-running operations to finish"""
+
+import time
+from collections.abc import Callable, Iterator
+from typing import Any, ClassVar
+
+from azure.core.polling import LROPoller
+
+from data_safe_haven.exceptions import DataSafeHavenAzureError
+
+
+class AzureLROWaiter:
+    """
+    Wait for Azure long-running operations without fixed sleeps
+
+    Each LROPoller polls Azure in its own background thread, following any
+    Retry-After header sent by the service, so waiting on several pollers takes only
+    as long as the slowest one. Clients should be created with `polling_interval` so
+    that operations which finish quickly are noticed quickly when the service does
+    not say how long to wait.
+
+    Conditions that are not backed by a poller are checked with a short initial
+    interval that backs off exponentially.
+    """
+
+    # Seconds between polls when the service does not send a Retry-After header
+    polling_interval: ClassVar[float] = 2
+
+    def __init__(
+        self,
+        *,
+        initial_interval: float = 0.5,
+        max_interval: float = 10,
+        timeout: float | None = None,
+    ) -> None:
+        self.initial_interval = initial_interval
+        self.max_interval = max_interval
+        self.timeout = timeout
+
+    def intervals(self) -> Iterator[float]:
+        """Intervals between checks, doubling up to the maximum interval"""
+        interval = self.initial_interval
+        while True:
+            yield interval
+            interval = min(interval * 2, self.max_interval)
+
+    def wait(self, *pollers: LROPoller[Any]) -> None:
+        """
+        Wait for one or more long-running operations to finish
+
+        Raises:
+            DataSafeHavenAzureError if the operations did not finish before the timeout
+            Any exception raised by a failed operation
+        """
+        deadline = self.deadline()
+        for poller in pollers:
+            while not poller.done():
+                poller.wait(self.time_left(deadline))
+
+    def until(self, condition: Callable[[], bool], description: str) -> None:
+        """
+        Wait until a condition holds, checking it with increasing intervals
+
+        Raises:
+            DataSafeHavenAzureError if the condition did not hold before the timeout
+        """
+        deadline = self.deadline()
+        for interval in self.intervals():
+            if condition():
+                return
+            time.sleep(min(interval, self.time_left(deadline, description)))
+
+    def deadline(self) -> float | None:
+        return None if self.timeout is None else time.monotonic() + self.timeout
+
+    def time_left(
+        self, deadline: float | None, description: str = "operation to finish"
+    ) -> float:
+        """How long to wait for before checking for completion again"""
+        if deadline is None:
+            return self.max_interval
+        if (time_left := deadline - time.monotonic()) <= 0:
+            msg = f"Timed out after {self.timeout} seconds waiting for {description}."
+            raise DataSafeHavenAzureError(msg)
+        return min(time_left, self.max_interval)
@@ -1,14 +1,21 @@
 """Interface to the Azure Python SDK"""
 
 import time
+from collections.abc import Callable, Mapping, Sequence
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from contextlib import suppress
-from typing import Any, cast
+from contextvars import copy_context
+from http import HTTPStatus
+from threading import RLock
+from typing import Any, ClassVar, TypeVar, cast
 
+from azure.core import MatchConditions
 from azure.core.exceptions import (
     AzureError,
     ClientAuthenticationError,
     HttpResponseError,
     ResourceExistsError,
+    ResourceModifiedError,
     ResourceNotFoundError,
     ServiceRequestError,
 )
@@ -69,18 +76,59 @@ from data_safe_haven.exceptions import (
 from data_safe_haven.logging import get_logger, get_null_logger
 from data_safe_haven.types import AzureSdkCredentialScope
 
+from .azure_blob_cache import AzureBlobCache
+from .azure_lro_waiter import AzureLROWaiter
+from .azure_subscription_cache import AzureSubscriptionCache
+from .azure_vm_sku_catalogue import AzureVmSkuCatalogue
 from .credentials import AzureSdkCredential
 from .graph_api import GraphApi
+from .request_metrics import RequestMetrics, RequestMetricsPolicy
 
+ClientT = TypeVar("ClientT")
 
+
+@RequestMetrics.instrument("AzureSdk")
 class AzureSdk:
     """Interface to the Azure Python SDK"""
 
+    # Record each management API request attempt
+    metrics_policies: ClassVar[list[RequestMetricsPolicy]] = [
+        RequestMetricsPolicy("AzureSdk")
+    ]
+    # Clients and credentials are shared between all instances in this process
+    # Clients are keyed by client class, the scope and confirmation setting of their
+    # credential, and subscription or vault
+    clients_: ClassVar[
+        dict[tuple[Callable[..., Any], AzureSdkCredentialScope, bool, str], Any]
+    ] = {}
+    credentials_: ClassVar[
+        dict[tuple[AzureSdkCredentialScope, bool], AzureSdkCredential]
+    ] = {}
+    lock_: ClassVar[RLock] = RLock()
+    # Storage account keys and blob service clients are reused for a short time
+    storage_cache_ttl: ClassVar[float] = 300
+    storage_keys_: ClassVar[
+        dict[tuple[str, str, str], tuple[float, list[StorageAccountKey]]]
+    ] = {}
+    blob_service_clients_: ClassVar[
+        dict[tuple[str, str, str, bool, bool], tuple[float, BlobServiceClient]]
+    ] = {}
+    # Storage accounts that exist are remembered for the rest of the command. Missing
+    # ones are not, as they may be created by another process in the meantime.
+    storage_exists_: ClassVar[set[tuple[str, str]]] = set()
+    # Each VM can only run one command at a time, so commands for a VM are queued
+    vm_command_locks_: ClassVar[dict[tuple[str, str, str], RLock]] = {}
+
     def __init__(
-        self, subscription_name: str, *, disable_logging: bool = False
+        self,
+        subscription_name: str,
+        *,
+        disable_logging: bool = False,
+        entra_storage_auth: bool = False,
     ) -> None:
-        self._credentials: dict[AzureSdkCredentialScope, AzureSdkCredential] = {}
         self.disable_logging = disable_logging
+        # Authenticate to blob storage with Entra tokens rather than account keys
+        self.entra_storage_auth = entra_storage_auth
         self.logger = get_null_logger() if disable_logging else get_logger()
         self.subscription_name = subscription_name
         self.subscription_id_: str | None = None
@@ -93,19 +141,24 @@ class AzureSdk:
     @property
     def subscription_id(self) -> str:
         if not self.subscription_id_:
-            self.subscription_id_ = str(
-                self.get_subscription(self.subscription_name).subscription_id
-            )
+            self.subscription_id_, self.tenant_id_ = self.subscription_ids()
         return self.subscription_id_
 
     @property
     def tenant_id(self) -> str:
         if not self.tenant_id_:
-            self.tenant_id_ = str(
-                self.get_subscription(self.subscription_name).tenant_id
-            )
+            self.subscription_id_, self.tenant_id_ = self.subscription_ids()
         return self.tenant_id_
 
+    def subscription_ids(self) -> tuple[str, str]:
+        """Get the subscription ID and tenant ID, using the on-disk cache if possible"""
+
+        def loader() -> tuple[str, str]:
+            subscription = self.get_subscription(self.subscription_name)
+            return (str(subscription.subscription_id), str(subscription.tenant_id))
+
+        return AzureSubscriptionCache.lookup(self.subscription_name, loader)
+
     def blob_client(
         self,
         resource_group_name: str,
@@ -114,19 +167,10 @@ class AzureSdk:
         blob_name: str,
     ) -> BlobClient:
         """Construct a client for a blob which may exist or not"""
-        # Connect to Azure client
-        storage_account_keys = self.get_storage_account_keys(
+        blob_service_client = self.blob_service_client(
             resource_group_name, storage_account_name
         )
 
-        # Load blob service client
-        blob_service_client = BlobServiceClient.from_connection_string(
-            f"DefaultEndpointsProtocol=https;AccountName={storage_account_name};AccountKey={storage_account_keys[0].value};EndpointSuffix=core.windows.net"
-        )
-        if not isinstance(blob_service_client, BlobServiceClient):
-            msg = f"Could not connect to storage account '{storage_account_name}'."
-            raise DataSafeHavenAzureStorageError(msg)
-
         # Get the blob client
         blob_client = blob_service_client.get_blob_client(
             container=storage_container_name, blob=blob_name
@@ -146,7 +190,9 @@ class AzureSdk:
             bool: Whether or not the blob exists
         """
 
-        if not self.storage_exists(storage_account_name):
+        if not self.storage_exists(
+            storage_account_name, resource_group_name=resource_group_name
+        ):
             msg = f"Storage account '{storage_account_name}' does not exist."
             raise DataSafeHavenAzureStorageError(msg)
         try:
@@ -165,14 +211,61 @@ class AzureSdk:
         )
         return exists
 
+    def blob_service_client(
+        self, resource_group_name: str, storage_account_name: str
+    ) -> BlobServiceClient:
+        """Get a client for a storage account, reusing a recent one if possible
+
+        Raises:
+            DataSafeHavenAzureStorageError if the client could not be constructed
+        """
+        key = (
+            self.subscription_id,
+            resource_group_name,
+            storage_account_name,
+            self.entra_storage_auth,
+            self.disable_logging,
+        )
+        with AzureSdk.lock_:
+            expiry, blob_service_client = AzureSdk.blob_service_clients_.get(
+                key, (0.0, None)
+            )
+        if blob_service_client and (time.monotonic() < expiry):
+            return blob_service_client
+
+        if self.entra_storage_auth:
+            # Use an Entra token, which does not need the account keys
+            blob_service_client = BlobServiceClient(
+                account_url=f"https://{storage_account_name}.blob.core.windows.net",
+                credential=self.credential(AzureSdkCredentialScope.STORAGE),
+            )
+        else:
+            storage_account_keys = self.get_storage_account_keys(
+                resource_group_name, storage_account_name
+            )
+            blob_service_client = BlobServiceClient.from_connection_string(
+                f"DefaultEndpointsProtocol=https;AccountName={storage_account_name};AccountKey={storage_account_keys[0].value};EndpointSuffix=core.windows.net"
+            )
+        if not isinstance(blob_service_client, BlobServiceClient):
+            msg = f"Could not connect to storage account '{storage_account_name}'."
+            raise DataSafeHavenAzureStorageError(msg)
+        with AzureSdk.lock_:
+            AzureSdk.blob_service_clients_[key] = (
+                time.monotonic() + self.storage_cache_ttl,
+                blob_service_client,
+            )
+        return blob_service_client
+
     def credential(
         self, scope: AzureSdkCredentialScope = AzureSdkCredentialScope.DEFAULT
     ) -> AzureSdkCredential:
-        if scope not in self._credentials:
-            self._credentials[scope] = AzureSdkCredential(
-                scope, skip_confirmation=self.disable_logging
-            )
-        return self._credentials[scope]
+        key = (scope, self.disable_logging)
+        with AzureSdk.lock_:
+            if key not in AzureSdk.credentials_:
+                AzureSdk.credentials_[key] = AzureSdkCredential(
+                    scope, skip_confirmation=self.disable_logging
+                )
+            return AzureSdk.credentials_[key]
 
     def download_blob(
         self,
@@ -196,12 +289,10 @@ class AzureSdk:
                 storage_container_name,
                 blob_name,
             )
-            # Download the requested file
-            blob_content = blob_client.download_blob(encoding="utf-8").readall()
-            self.logger.debug(
-                f"Downloaded file [green]{blob_name}[/] from blob storage.",
+            blob_content, _ = self.read_blob(
+                blob_client, storage_account_name, storage_container_name
             )
-            return str(blob_content)
+            return blob_content
         except AzureError as exc:
             msg = f"Blob file '{blob_name}' could not be downloaded from '{storage_account_name}'."
             raise DataSafeHavenAzureError(msg) from exc
@@ -226,12 +317,25 @@ class AzureSdk:
         """
         try:
             # Connect to Azure clients
-            dns_client = DnsManagementClient(self.credential(), self.subscription_id)
+            dns_client = self.management_client(DnsManagementClient)
 
             # Ensure that record exists
             self.logger.debug(
                 f"Ensuring that DNS CAA record [green]{record_name}[/] exists in zone [bold]{zone_name}[/]...",
             )
+            # Return early if an identical record already exists
+            with suppress(ResourceNotFoundError):
+                record_set = dns_client.record_sets.get(
+                    resource_group_name, zone_name, record_name, RecordType.CAA
+                )
+                if record_set.ttl == ttl and [
+                    (record.flags, record.tag, record.value)
+                    for record in record_set.caa_records or []
+                ] == [(record_flags, record_tag, record_value)]:
+                    self.logger.info(
+                        f"DNS CAA record [green]{record_name}[/] already exists in zone [bold]{zone_name}[/].",
+                    )
+                    return record_set
             record_set = dns_client.record_sets.create_or_update(
                 parameters=RecordSet(
                     ttl=ttl,
@@ -272,12 +376,24 @@ class AzureSdk:
         """
         try:
             # Connect to Azure clients
-            dns_client = DnsManagementClient(self.credential(), self.subscription_id)
+            dns_client = self.management_client(DnsManagementClient)
 
             # Ensure that record exists
             self.logger.debug(
                 f"Ensuring that DNS TXT record [green]{record_name}[/] exists in zone [bold]{zone_name}[/]...",
             )
+            # Return early if an identical record already exists
+            with suppress(ResourceNotFoundError):
+                record_set = dns_client.record_sets.get(
+                    resource_group_name, zone_name, record_name, RecordType.TXT
+                )
+                if record_set.ttl == ttl and [
+                    record.value for record in record_set.txt_records or []
+                ] == [[record_value]]:
+                    self.logger.info(
+                        f"DNS TXT record [green]{record_name}[/] already exists in zone [bold]{zone_name}[/].",
+                    )
+                    return record_set
             record_set = dns_client.record_sets.create_or_update(
                 parameters=RecordSet(
                     ttl=ttl, txt_records=[TxtRecord(value=[record_value])]
@@ -311,12 +427,23 @@ class AzureSdk:
         """
         try:
             # Connect to Azure clients
-            dns_client = DnsManagementClient(self.credential(), self.subscription_id)
+            dns_client = self.management_client(DnsManagementClient)
 
             # Ensure that record exists
             self.logger.debug(
                 f"Ensuring that DNS zone {zone_name} exists...",
             )
+            # Return early if a matching zone already exists
+            with suppress(ResourceNotFoundError):
+                zone = dns_client.zones.get(resource_group_name, zone_name)
+                if (
+                    self.resource_matches(zone, location="Global", tags=tags)
+                    and zone.zone_type == ZoneType.PUBLIC
+                ):
+                    self.logger.info(
+                        f"DNS zone [green]{zone_name}[/] already exists.",
+                    )
+                    return zone
             zone = dns_client.zones.create_or_update(
                 parameters=Zone(
                     location="Global",
@@ -356,11 +483,85 @@ class AzureSdk:
             tenant_id = tenant_id if tenant_id else self.tenant_id
 
             # Connect to Azure clients
-            key_vault_client = KeyVaultManagementClient(
-                self.credential(), self.subscription_id
-            )
+            key_vault_client = self.management_client(KeyVaultManagementClient)
+            access_policies = [
+                AccessPolicyEntry(
+                    tenant_id=tenant_id,
+                    object_id=admin_group_id,
+                    permissions=Permissions(
+                        keys=[
+                            "GET",
+                            "LIST",
+                            "CREATE",
+                            "DECRYPT",
+                            "ENCRYPT",
+                        ],
+                        secrets=["GET", "LIST", "SET"],
+                        certificates=["GET", "LIST", "CREATE"],
+                    ),
+                ),
+                AccessPolicyEntry(
+                    tenant_id=tenant_id,
+                    object_id=str(managed_identity.principal_id),
+                    permissions=Permissions(
+                        secrets=["GET", "LIST"],
+                        certificates=["GET", "LIST"],
+                    ),
+                ),
+            ]
+            sku = KeyVaultSku(name="standard", family="A")
+
+            def policy_summary(
+                policies: list[AccessPolicyEntry] | None,
+            ) -> list[tuple[str, ...]]:
+                # Azure may change the case and order of permissions
+                return sorted(
+                    (
+                        str(policy.tenant_id),
+                        str(policy.object_id),
+                        *(
+                            ",".join(
+                                sorted(
+                                    str(permission).lower()
+                                    for permission in getattr(
+                                        policy.permissions, kind, None
+                                    )
+                                    or []
+                                )
+                            )
+                            for kind in ("keys", "secrets", "certificates")
+                        ),
+                    )
+                    for policy in policies or []
+                )
+
+            def sku_summary(vault_sku: KeyVaultSku | None) -> tuple[str, ...]:
+                # Azure returns SKU names and families as case-insensitive enums
+                if not vault_sku:
+                    return ()
+                return tuple(
+                    str(getattr(value, "value", value)).lower()
+                    for value in (vault_sku.name, vault_sku.family)
+                )
+
+            # Return early if a matching key vault already exists
+            with suppress(ResourceNotFoundError):
+                key_vault = key_vault_client.vaults.get(
+                    resource_group_name, key_vault_name
+                )
+                if (
+                    self.resource_matches(key_vault, location=location, tags=tags)
+                    and str(key_vault.properties.tenant_id) == str(tenant_id)
+                    and sku_summary(key_vault.properties.sku) == sku_summary(sku)
+                    and policy_summary(key_vault.properties.access_policies)
+                    == policy_summary(access_policies)
+                ):
+                    self.logger.info(
+                        f"Key vault [green]{key_vault_name}[/] already exists.",
+                    )
+                    return key_vault
             # Ensure that key vault exists
-            key_vault_client.vaults.begin_create_or_update(
+            key_vault = key_vault_client.vaults.begin_create_or_update(
                 resource_group_name,
                 key_vault_name,
                 VaultCreateOrUpdateParameters(
@@ -368,45 +569,15 @@ class AzureSdk:
                     tags=tags,
                     properties=VaultProperties(
                         tenant_id=tenant_id,
-                        sku=KeyVaultSku(name="standard", family="A"),
-                        access_policies=[
-                            AccessPolicyEntry(
-                                tenant_id=tenant_id,
-                                object_id=admin_group_id,
-                                permissions=Permissions(
-                                    keys=[
-                                        "GET",
-                                        "LIST",
-                                        "CREATE",
-                                        "DECRYPT",
-                                        "ENCRYPT",
-                                    ],
-                                    secrets=["GET", "LIST", "SET"],
-                                    certificates=["GET", "LIST", "CREATE"],
-                                ),
-                            ),
-                            AccessPolicyEntry(
-                                tenant_id=tenant_id,
-                                object_id=str(managed_identity.principal_id),
-                                permissions=Permissions(
-                                    secrets=["GET", "LIST"],
-                                    certificates=["GET", "LIST"],
-                                ),
-                            ),
-                        ],
+                        sku=sku,
+                        access_policies=access_policies,
                     ),
                 ),
-            )
-            # Cast to correct spurious type hint in Azure libraries
-            key_vaults = [
-                kv
-                for kv in cast(list[Vault], key_vault_client.vaults.list())
-                if kv.name == key_vault_name
-            ]
+            ).result()
             self.logger.info(
-                f"Ensured that key vault [green]{key_vaults[0].name}[/] exists.",
+                f"Ensured that key vault [green]{key_vault.name}[/] exists.",
             )
-            return key_vaults[0]
+            return key_vault
         except AzureError as exc:
             msg = f"Failed to create key vault {key_vault_name}."
             raise DataSafeHavenAzureError(msg) from exc
@@ -426,10 +597,7 @@ class AzureSdk:
         """
         try:
             # Connect to Azure clients
-            key_client = KeyClient(
-                credential=self.credential(AzureSdkCredentialScope.KEY_VAULT),
-                vault_url=f"https://{key_vault_name}.vault.azure.net",
-            )
+            key_client = self.keyvault_client(KeyClient, key_vault_name)
 
             # Ensure that key exists
             self.logger.debug(f"Ensuring that key [green]{key_name}[/] exists...")
@@ -465,9 +633,19 @@ class AzureSdk:
             self.logger.debug(
                 f"Ensuring that managed identity [green]{identity_name}[/] exists...",
             )
-            msi_client = ManagedServiceIdentityClient(
-                self.credential(), self.subscription_id
-            )
+            msi_client = self.management_client(ManagedServiceIdentityClient)
+            # Return early if a matching managed identity already exists
+            with suppress(ResourceNotFoundError):
+                managed_identity = msi_client.user_assigned_identities.get(
+                    resource_group_name, identity_name
+                )
+                if self.resource_matches(
+                    managed_identity, location=location, tags=None
+                ):
+                    self.logger.info(
+                        f"Managed identity [green]{identity_name}[/] already exists.",
+                    )
+                    return managed_identity
             managed_identity = msi_client.user_assigned_identities.create_or_update(
                 resource_group_name,
                 identity_name,
@@ -494,31 +672,32 @@ class AzureSdk:
         """
         try:
             # Connect to Azure clients
-            resource_client = ResourceManagementClient(
-                self.credential(), self.subscription_id
-            )
+            resource_client = self.management_client(ResourceManagementClient)
 
             # Ensure that resource group exists
             self.logger.debug(
                 f"Ensuring that resource group [green]{resource_group_name}[/] exists...",
             )
-            resource_client.resource_groups.create_or_update(
+            # Return early if a matching resource group already exists
+            with suppress(ResourceNotFoundError):
+                resource_group = resource_client.resource_groups.get(
+                    resource_group_name
+                )
+                if self.resource_matches(resource_group, location=location, tags=tags):
+                    self.logger.info(
+                        f"Resource group [green]{resource_group_name}[/] already exists"
+                        f" in [green]{resource_group.location}[/].",
+                    )
+                    return resource_group
+            resource_group = resource_client.resource_groups.create_or_update(
                 resource_group_name,
                 ResourceGroup(location=location, tags=tags),
             )
-            # Cast to correct spurious type hint in Azure libraries
-            resource_groups = [
-                rg
-                for rg in cast(
-                    list[ResourceGroup], resource_client.resource_groups.list()
-                )
-                if rg.name == resource_group_name
-            ]
             self.logger.info(
-                f"Ensured that resource group [green]{resource_groups[0].name}[/] exists"
-                f" in [green]{resource_groups[0].location}[/].",
+                f"Ensured that resource group [green]{resource_group.name}[/] exists"
+                f" in [green]{resource_group.location}[/].",
             )
-            return resource_groups[0]
+            return resource_group
         except AzureError as exc:
             msg = f"Failed to create resource group {resource_group_name}."
             raise DataSafeHavenAzureError(msg) from exc
@@ -540,12 +719,29 @@ class AzureSdk:
         """
         try:
             # Connect to Azure clients
-            storage_client = StorageManagementClient(
-                self.credential(), self.subscription_id
-            )
+            storage_client = self.management_client(StorageManagementClient)
             self.logger.debug(
                 f"Ensuring that storage account [green]{storage_account_name}[/] exists...",
             )
+            # Return early if a matching storage account already exists
+            with suppress(ResourceNotFoundError):
+                storage_account = storage_client.storage_accounts.get_properties(
+                    resource_group_name, storage_account_name
+                )
+                if (
+                    self.resource_matches(storage_account, location=location, tags=tags)
+                    and storage_account.kind == StorageAccountKind.STORAGE_V2
+                    and storage_account.sku
+                    and storage_account.sku.name == "Standard_LRS"
+                ):
+                    with self.lock_:
+                        self.storage_exists_.add(
+                            (self.subscription_id, storage_account_name)
+                        )
+                    self.logger.info(
+                        f"Storage account [green]{storage_account_name}[/] already exists.",
+                    )
+                    return storage_account
             poller = storage_client.storage_accounts.begin_create(
                 resource_group_name,
                 storage_account_name,
@@ -557,6 +753,8 @@ class AzureSdk:
                 ),
             )
             storage_account = poller.result()
+            with self.lock_:
+                self.storage_exists_.add((self.subscription_id, storage_account_name))
             self.logger.info(
                 f"Ensured that storage account [green]{storage_account.name}[/] exists.",
             )
@@ -580,14 +778,22 @@ class AzureSdk:
             DataSafeHavenAzureError if the existence of the certificate could not be verified
         """
         # Connect to Azure clients
-        storage_client = StorageManagementClient(
-            self.credential(), self.subscription_id
-        )
+        storage_client = self.management_client(StorageManagementClient)
 
         self.logger.debug(
             f"Ensuring that storage container [green]{container_name}[/] exists...",
         )
         try:
+            # Return early if a private container already exists
+            with suppress(ResourceNotFoundError):
+                container = storage_client.blob_containers.get(
+                    resource_group_name, storage_account_name, container_name
+                )
+                if container.public_access in (None, PublicAccess.NONE):
+                    self.logger.info(
+                        f"Storage container [green]{container_name}[/] already exists.",
+                    )
+                    return container
             container = storage_client.blob_containers.create(
                 resource_group_name,
                 storage_account_name,
@@ -602,6 +808,17 @@ class AzureSdk:
             msg = f"Failed to create storage container '{container_name}'."
             raise DataSafeHavenAzureStorageError(msg) from exc
 
+    @staticmethod
+    def resource_matches(resource: Any, *, location: str, tags: Any) -> bool:
+        """Whether an existing resource has the expected location and tags"""
+
+        def normalise(name: str) -> str:
+            return name.replace(" ", "").lower()
+
+        return normalise(str(resource.location)) == normalise(location) and (
+            resource.tags or {}
+        ) == (tags or {})
+
     def get_keyvault_certificate(
         self, certificate_name: str, key_vault_name: str
     ) -> KeyVaultCertificate:
@@ -614,10 +831,7 @@ class AzureSdk:
             DataSafeHavenAzureError if the secret could not be read
         """
         # Connect to Azure clients
-        certificate_client = CertificateClient(
-            credential=self.credential(AzureSdkCredentialScope.KEY_VAULT),
-            vault_url=f"https://{key_vault_name}.vault.azure.net",
-        )
+        certificate_client = self.keyvault_client(CertificateClient, key_vault_name)
         # Ensure that certificate exists
         try:
             return certificate_client.get_certificate(certificate_name)
@@ -635,10 +849,7 @@ class AzureSdk:
             DataSafeHavenAzureError if the secret could not be read
         """
         # Connect to Azure clients
-        key_client = KeyClient(
-            credential=self.credential(AzureSdkCredentialScope.KEY_VAULT),
-            vault_url=f"https://{key_vault_name}.vault.azure.net",
-        )
+        key_client = self.keyvault_client(KeyClient, key_vault_name)
         # Ensure that certificate exists
         try:
             return key_client.get_key(key_name)
@@ -656,10 +867,7 @@ class AzureSdk:
             DataSafeHavenAzureError if the secret could not be read
         """
         # Connect to Azure clients
-        secret_client = SecretClient(
-            credential=self.credential(AzureSdkCredentialScope.KEY_VAULT),
-            vault_url=f"https://{key_vault_name}.vault.azure.net",
-        )
+        secret_client = self.keyvault_client(SecretClient, key_vault_name)
         # Ensure that secret exists
         try:
             secret = secret_client.get_secret(secret_name)
@@ -678,7 +886,9 @@ class AzureSdk:
             List[str]: Names of Azure locations
         """
         try:
-            subscription_client = SubscriptionClient(self.credential())
+            subscription_client = self.management_client(
+                SubscriptionClient, subscription_scoped=False
+            )
             return [
                 str(location.name)
                 for location in cast(
@@ -705,11 +915,14 @@ class AzureSdk:
         """
         msg_sa = f"storage account '{storage_account_name}'"
         msg_rg = f"resource group '{resource_group_name}'"
+        key = (self.subscription_id, resource_group_name, storage_account_name)
+        with AzureSdk.lock_:
+            expiry, cached_keys = AzureSdk.storage_keys_.get(key, (0.0, []))
+        if cached_keys and (time.monotonic() < expiry):
+            return cached_keys
         try:
             # Connect to Azure client
-            storage_client = StorageManagementClient(
-                self.credential(), self.subscription_id
-            )
+            storage_client = self.management_client(StorageManagementClient)
             storage_keys = None
             for _ in range(attempts):
                 with suppress(HttpResponseError):
@@ -727,6 +940,11 @@ class AzureSdk:
             if not keys or not isinstance(keys, list) or len(keys) == 0:
                 msg = f"No keys were retrieved for {msg_sa} in {msg_rg}."
                 raise DataSafeHavenAzureStorageError(msg)
+            with AzureSdk.lock_:
+                AzureSdk.storage_keys_[key] = (
+                    time.monotonic() + self.storage_cache_ttl,
+                    keys,
+                )
             return keys
         except AzureError as exc:
             msg = f"Keys could not be loaded for {msg_sa} in {msg_rg}."
@@ -735,7 +953,9 @@ class AzureSdk:
     def get_subscription(self, subscription_name: str) -> Subscription:
         """Get an Azure subscription by name."""
         try:
-            subscription_client = SubscriptionClient(self.credential())
+            subscription_client = self.management_client(
+                SubscriptionClient, subscription_scoped=False
+            )
             for subscription in subscription_client.subscriptions.list():
                 if subscription.display_name == subscription_name:
                     return subscription
@@ -761,10 +981,7 @@ class AzureSdk:
         """
         try:
             # Connect to Azure clients
-            certificate_client = CertificateClient(
-                credential=self.credential(AzureSdkCredentialScope.KEY_VAULT),
-                vault_url=f"https://{key_vault_name}.vault.azure.net",
-            )
+            certificate_client = self.keyvault_client(CertificateClient, key_vault_name)
             # Import the certificate, overwriting any existing certificate with the same name
             self.logger.debug(
                 f"Importing certificate [green]{certificate_name}[/]...",
@@ -789,34 +1006,91 @@ class AzureSdk:
             msg = f"Failed to import certificate '{certificate_name}'."
             raise DataSafeHavenAzureError(msg) from exc
 
+    def keyvault_client(
+        self, client_class: Callable[..., ClientT], key_vault_name: str
+    ) -> ClientT:
+        """Get a Key Vault data-plane client, reusing an existing one if possible"""
+        vault_url = f"https://{key_vault_name}.vault.azure.net"
+        key = (
+            client_class,
+            AzureSdkCredentialScope.KEY_VAULT,
+            self.disable_logging,
+            vault_url,
+        )
+        with AzureSdk.lock_:
+            if key not in AzureSdk.clients_:
+                AzureSdk.clients_[key] = client_class(
+                    credential=self.credential(AzureSdkCredentialScope.KEY_VAULT),
+                    vault_url=vault_url,
+                )
+            return cast(ClientT, AzureSdk.clients_[key])
+
     def list_available_vm_skus(self, location: str) -> dict[str, dict[str, Any]]:
-        try:
+        """List the virtual machine SKUs available in a location
+
+        Only SKUs for the requested location are downloaded and the results are cached
+        on disk by AzureVmSkuCatalogue.
+
+        Returns:
+            dict[str, dict[str, Any]]: the number of GPUs, memory and vCPUs of each SKU
+
+        Raises:
+            DataSafeHavenAzureError if the SKUs could not be loaded
+        """
+
+        def loader() -> dict[str, dict[str, Any]]:
             # Connect to Azure client
-            compute_client = ComputeManagementClient(
-                self.credential(), self.subscription_id
-            )
+            compute_client = self.management_client(ComputeManagementClient)
             # Construct SKU information
-            skus = {}
-            for resource_sku in compute_client.resource_skus.list():
-                if (
-                    resource_sku.locations
-                    and (location in resource_sku.locations)
-                    and (resource_sku.resource_type == "virtualMachines")
+            skus: dict[str, dict[str, Any]] = {}
+            for resource_sku in compute_client.resource_skus.list(
+                filter=f"location eq '{location}'"
+            ):
+                if resource_sku.name and (
+                    resource_sku.resource_type == "virtualMachines"
                 ):
-                    skus[resource_sku.name] = {
-                        "GPUs": 0
-                    }  # default to 0 GPUs, overriding if appropriate
-                    if resource_sku.capabilities:
-                        # Cast to correct spurious type hint in Azure libraries
-                        for capability in cast(
-                            list[ResourceSkuCapabilities], resource_sku.capabilities
-                        ):
-                            skus[resource_sku.name][capability.name] = capability.value
+                    # Default to 0 GPUs, overriding if appropriate
+                    skus[resource_sku.name] = {"GPUs": 0}
+                    # Cast to correct spurious type hint in Azure libraries
+                    for capability in cast(
+                        list[ResourceSkuCapabilities], resource_sku.capabilities or []
+                    ):
+                        skus[resource_sku.name][capability.name] = capability.value
             return skus
+
+        try:
+            return AzureVmSkuCatalogue.lookup(location, loader)
         except AzureError as exc:
             msg = f"Failed to load available VM sizes for Azure location {location}."
             raise DataSafeHavenAzureError(msg) from exc
 
+    def management_client(
+        self, client_class: Callable[..., ClientT], *, subscription_scoped: bool = True
+    ) -> ClientT:
+        """Get an Azure management client, reusing an existing one if possible
+
+        Args:
+            client_class: the type of management client
+            subscription_scoped: whether the client is for this subscription
+        """
+        subscription_id = self.subscription_id if subscription_scoped else ""
+        key = (
+            client_class,
+            AzureSdkCredentialScope.DEFAULT,
+            self.disable_logging,
+            subscription_id,
+        )
+        with AzureSdk.lock_:
+            if key not in AzureSdk.clients_:
+                args = [subscription_id] if subscription_scoped else []
+                AzureSdk.clients_[key] = client_class(
+                    self.credential(),
+                    *args,
+                    per_retry_policies=self.metrics_policies,
+                    polling_interval=AzureLROWaiter.polling_interval,
+                )
+            return cast(ClientT, AzureSdk.clients_[key])
+
     def purge_keyvault(
         self,
         key_vault_name: str,
@@ -833,9 +1107,7 @@ class AzureSdk:
         """
         try:
             # Connect to Azure clients
-            key_vault_client = KeyVaultManagementClient(
-                self.credential(), self.subscription_id
-            )
+            key_vault_client = self.management_client(KeyVaultManagementClient)
 
             # Check whether a deleted Key Vault exists
             try:
@@ -856,12 +1128,12 @@ class AzureSdk:
                 )
 
                 # Keep polling until purge is finished
-                poller = key_vault_client.vaults.begin_purge_deleted(
-                    vault_name=key_vault_name,
-                    location=location,
+                AzureLROWaiter().wait(
+                    key_vault_client.vaults.begin_purge_deleted(
+                        vault_name=key_vault_name,
+                        location=location,
+                    )
                 )
-                while not poller.done():
-                    poller.wait(10)
 
             # Check whether the Key Vault is still in deleted state
             with suppress(HttpResponseError):
@@ -889,10 +1161,7 @@ class AzureSdk:
         """
         try:
             # Connect to Azure clients
-            certificate_client = CertificateClient(
-                credential=self.credential(AzureSdkCredentialScope.KEY_VAULT),
-                vault_url=f"https://{key_vault_name}.vault.azure.net",
-            )
+            certificate_client = self.keyvault_client(CertificateClient, key_vault_name)
             # Ensure that record is removed
             self.logger.debug(
                 f"Purging certificate [green]{certificate_name}[/] from Key Vault [green]{key_vault_name}[/]...",
@@ -900,13 +1169,18 @@ class AzureSdk:
             # Purge the certificate
             with suppress(HttpResponseError):
                 certificate_client.purge_deleted_certificate(certificate_name)
+
             # Wait until certificate no longer exists
-            while True:
+            def certificate_purged() -> bool:
                 try:
-                    time.sleep(10)
                     certificate_client.get_deleted_certificate(certificate_name)
+                    return False
                 except ResourceNotFoundError:
-                    break
+                    return True
+
+            AzureLROWaiter().until(
+                certificate_purged, f"certificate '{certificate_name}' to be purged"
+            )
             self.logger.info(
                 f"Purged certificate [green]{certificate_name}[/] from Key Vault [green]{key_vault_name}[/].",
             )
@@ -914,6 +1188,50 @@ class AzureSdk:
             msg = f"Failed to remove certificate '{certificate_name}' from Key Vault '{key_vault_name}'."
             raise DataSafeHavenAzureError(msg) from exc
 
+    def read_blob(
+        self,
+        blob_client: BlobClient,
+        storage_account_name: str,
+        storage_container_name: str,
+    ) -> tuple[str, str | None]:
+        """Read a blob file, only downloading it if it has changed since it was cached
+
+        Returns:
+            tuple[str, str | None]: The contents of the blob and its ETag
+
+        Raises:
+            AzureError if the blob could not be read
+        """
+        cache_key = (
+            storage_account_name,
+            storage_container_name,
+            blob_client.blob_name,
+        )
+        if cached := AzureBlobCache.read(*cache_key):
+            try:
+                downloader = blob_client.download_blob(
+                    encoding="utf-8",
+                    etag=cached["etag"],
+                    match_condition=MatchConditions.IfModified,
+                )
+            except HttpResponseError as exc:
+                if exc.status_code != HTTPStatus.NOT_MODIFIED:
+                    raise
+                self.logger.debug(
+                    f"Using cached copy of unchanged file [green]{blob_client.blob_name}[/].",
+                )
+                return (str(cached["content"]), str(cached["etag"]))
+        else:
+            downloader = blob_client.download_blob(encoding="utf-8")
+        blob_content = str(downloader.readall())
+        AzureBlobCache.write(
+            *cache_key, content=blob_content, etag=downloader.properties.etag
+        )
+        self.logger.debug(
+            f"Downloaded file [green]{blob_client.blob_name}[/] from blob storage.",
+        )
+        return (blob_content, downloader.properties.etag)
+
     def remove_blob(
         self,
         blob_name: str,
@@ -930,21 +1248,17 @@ class AzureSdk:
             DataSafeHavenAzureError if the blob could not be removed
         """
         try:
-            # Connect to Azure client
-            storage_account_keys = self.get_storage_account_keys(
-                resource_group_name, storage_account_name
-            )
-            blob_service_client = BlobServiceClient.from_connection_string(
-                f"DefaultEndpointsProtocol=https;AccountName={storage_account_name};AccountKey={storage_account_keys[0].value};EndpointSuffix=core.windows.net"
-            )
-            if not isinstance(blob_service_client, BlobServiceClient):
-                msg = f"Could not connect to storage account '{storage_account_name}'."
-                raise DataSafeHavenAzureStorageError(msg)
             # Remove the requested blob
-            blob_client = blob_service_client.get_blob_client(
-                container=storage_container_name, blob=blob_name
+            blob_client = self.blob_client(
+                resource_group_name,
+                storage_account_name,
+                storage_container_name,
+                blob_name,
             )
             blob_client.delete_blob(delete_snapshots="include")
+            AzureBlobCache.remove(
+                storage_account_name, storage_container_name, blob_name
+            )
             self.logger.info(
                 f"Removed file [green]{blob_name}[/] from blob storage.",
             )
@@ -965,7 +1279,7 @@ class AzureSdk:
         """
         try:
             # Connect to Azure clients
-            dns_client = DnsManagementClient(self.credential(), self.subscription_id)
+            dns_client = self.management_client(DnsManagementClient)
             # Check whether resource currently exists
             try:
                 dns_client.record_sets.get(
@@ -1008,10 +1322,7 @@ class AzureSdk:
         """
         try:
             # Connect to Azure clients
-            certificate_client = CertificateClient(
-                credential=self.credential(AzureSdkCredentialScope.KEY_VAULT),
-                vault_url=f"https://{key_vault_name}.vault.azure.net",
-            )
+            certificate_client = self.keyvault_client(CertificateClient, key_vault_name)
             self.logger.debug(
                 f"Removing certificate [green]{certificate_name}[/] from Key Vault [green]{key_vault_name}[/]...",
             )
@@ -1023,20 +1334,26 @@ class AzureSdk:
             )
             with suppress(ResourceNotFoundError, ServiceRequestError):
                 # Keep polling until deletion is finished
-                poller = certificate_client.begin_delete_certificate(certificate_name)
-                while not poller.done():
-                    poller.wait(10)
+                AzureLROWaiter().wait(
+                    certificate_client.begin_delete_certificate(certificate_name)
+                )
 
             # Wait until the certificate shows up as deleted
             self.logger.debug(
                 f"Waiting for deletion to complete for certificate [green]{certificate_name}[/]..."
             )
-            while True:
+
+            def certificate_deleted() -> bool:
                 # Keep polling until deleted certificate is available
                 with suppress(ResourceNotFoundError):
-                    if certificate_client.get_deleted_certificate(certificate_name):
-                        break
-                time.sleep(10)
+                    return bool(
+                        certificate_client.get_deleted_certificate(certificate_name)
+                    )
+                return False
+
+            AzureLROWaiter().until(
+                certificate_deleted, f"certificate '{certificate_name}' to be deleted"
+            )
 
             # Now attempt to remove a certificate that has been deleted but not purged
             self.logger.debug(
@@ -1069,9 +1386,7 @@ class AzureSdk:
         """
         try:
             # Connect to Azure clients
-            resource_client = ResourceManagementClient(
-                self.credential(), self.subscription_id
-            )
+            resource_client = self.management_client(ResourceManagementClient)
 
             if not resource_client.resource_groups.check_existence(resource_group_name):
                 self.logger.warning(
@@ -1082,11 +1397,14 @@ class AzureSdk:
             self.logger.debug(
                 f"Attempting to remove resource group [green]{resource_group_name}[/]",
             )
-            poller = resource_client.resource_groups.begin_delete(
-                resource_group_name,
+            AzureLROWaiter().wait(
+                resource_client.resource_groups.begin_delete(
+                    resource_group_name,
+                )
             )
-            while not poller.done():
-                poller.wait(10)
+            # Forget about any storage accounts that may have been removed
+            with self.lock_:
+                self.storage_exists_.clear()
             # Cast to correct spurious type hint in Azure libraries
             resource_groups = [
                 rg
@@ -1122,9 +1440,7 @@ class AzureSdk:
         """
         try:
             # Connect to Azure clients
-            compute_client = ComputeManagementClient(
-                self.credential(), self.subscription_id
-            )
+            compute_client = self.management_client(ComputeManagementClient)
             vm = compute_client.virtual_machines.get(resource_group_name, vm_name)
             if not vm.os_profile:
                 msg = f"No OSProfile available for VM {vm_name}"
@@ -1146,11 +1462,12 @@ class AzureSdk:
                 ],
             )
             # Run the command and wait until finished
-            poller = compute_client.virtual_machines.begin_run_command(
-                resource_group_name, vm_name, run_command_parameters
-            )
-            # Cast to correct spurious type hint in Azure libraries
-            result = cast(RunCommandResult, poller.result())
+            with self.vm_command_lock(resource_group_name, vm_name):
+                poller = compute_client.virtual_machines.begin_run_command(
+                    resource_group_name, vm_name, run_command_parameters
+                )
+                # Cast to correct spurious type hint in Azure libraries
+                result = cast(RunCommandResult, poller.result())
             # Return any stdout/stderr from the command
             return str(result.value[0].message) if result.value else ""
         except AzureError as exc:
@@ -1172,26 +1489,86 @@ class AzureSdk:
         Raises:
             DataSafeHavenAzureError if running the script failed
         """
+        # Commands started by other processes are waited for with increasing intervals
+        intervals = AzureLROWaiter(initial_interval=1).intervals()
         while True:
             try:
-                script_output = self.run_remote_script(
+                return self.run_remote_script(
                     resource_group_name=resource_group_name,
                     script=script,
                     script_parameters=script_parameters,
                     vm_name=vm_name,
                 )
-                break
-            except AzureError as exc:
+            except DataSafeHavenAzureError as exc:
                 if all(
-                    reason not in str(exc)
+                    reason not in str(exc.__cause__)
                     for reason in (
                         "The request failed due to conflict with a concurrent request",
                         "Run command extension execution is in progress",
                     )
                 ):
                     raise
-                time.sleep(5)
-        return script_output
+                time.sleep(next(intervals))
+
+    def run_remote_scripts(
+        self,
+        resource_group_name: str,
+        vm_scripts: Mapping[str, Sequence[tuple[str, dict[str, str]]]],
+        *,
+        max_workers: int = 16,
+        on_output: Callable[[str, str], None] | None = None,
+    ) -> dict[str, list[str] | DataSafeHavenAzureError]:
+        """Run scripts on several remote virtual machines at the same time
+
+        Scripts for different VMs run concurrently. Each VM can only run one command at
+        a time, so the scripts for each VM are queued and run in order. A failure on
+        one VM stops the remaining scripts for that VM, but not for any other VM.
+
+        Args:
+            resource_group_name: the resource group containing the VMs
+            vm_scripts: map of VM name to the scripts and their parameters
+            max_workers: the maximum number of VMs to run scripts on at once
+            on_output: called with the VM name and output as each script finishes
+
+        Returns:
+            dict[str, list[str] | DataSafeHavenAzureError]: for each VM, either the
+                output of each script or the error that stopped its scripts
+        """
+
+        def run_queue(vm_name: str) -> list[str]:
+            outputs = []
+            for script, script_parameters in vm_scripts[vm_name]:
+                output = self.run_remote_script_waiting(
+                    resource_group_name, script, script_parameters, vm_name
+                )
+                if on_output:
+                    on_output(vm_name, output)
+                self.logger.debug(f"Ran script on VM [green]{vm_name}[/].")
+                outputs.append(output)
+            return outputs
+
+        results: dict[str, list[str] | DataSafeHavenAzureError] = {}
+        with ThreadPoolExecutor(max_workers=max(max_workers, 1)) as executor:
+            futures = {
+                executor.submit(copy_context().run, run_queue, vm_name): vm_name
+                for vm_name in vm_scripts
+            }
+            for future in as_completed(futures):
+                vm_name = futures[future]
+                try:
+                    results[vm_name] = future.result()
+                    continue
+                except DataSafeHavenAzureError as exc:
+                    error = exc
+                except Exception as exc:
+                    msg = f"Failed to run scripts on '{vm_name}'."
+                    error = DataSafeHavenAzureError(msg)
+                    error.__cause__ = exc
+                self.logger.error(
+                    f"Failed to run scripts on VM [green]{vm_name}[/]: {error.__cause__ or error}"
+                )
+                results[vm_name] = error
+        return {vm_name: results[vm_name] for vm_name in vm_scripts}
 
     def set_blob_container_acl(
         self,
@@ -1207,9 +1584,7 @@ class AzureSdk:
         """
         try:
             # Ensure that storage container exists in the storage account
-            storage_client = StorageManagementClient(
-                self.credential(), self.subscription_id
-            )
+            storage_client = self.management_client(StorageManagementClient)
             try:
                 container = storage_client.blob_containers.get(
                     resource_group_name, storage_account_name, container_name
@@ -1242,18 +1617,119 @@ class AzureSdk:
     def storage_exists(
         self,
         storage_account_name: str,
+        *,
+        resource_group_name: str | None = None,
     ) -> bool:
         """Find out whether a named storage account exists in the Azure subscription
 
+        If the resource group is known, the storage account is retrieved directly.
+        Otherwise all storage accounts in the subscription are listed. Storage accounts
+        that exist are remembered for the rest of this command, but missing ones are
+        looked up again each time.
+
         Returns:
             bool: Whether or not the storage account exists
         """
+        key = (self.subscription_id, storage_account_name)
+        with self.lock_:
+            if key in self.storage_exists_:
+                return True
 
-        storage_client = StorageManagementClient(
-            self.credential(), self.subscription_id
-        )
-        storage_account_names = {s.name for s in storage_client.storage_accounts.list()}
-        return storage_account_name in storage_account_names
+        storage_client = self.management_client(StorageManagementClient)
+        if resource_group_name:
+            try:
+                storage_client.storage_accounts.get_properties(
+                    resource_group_name, storage_account_name
+                )
+                exists = True
+            except ResourceNotFoundError:
+                exists = False
+        else:
+            storage_account_names = {
+                s.name for s in storage_client.storage_accounts.list()
+            }
+            exists = storage_account_name in storage_account_names
+        if exists:
+            with self.lock_:
+                self.storage_exists_.add(key)
+        return exists
+
+    def update_blob(
+        self,
+        blob_name: str,
+        resource_group_name: str,
+        storage_account_name: str,
+        storage_container_name: str,
+        update: Callable[[str | None], str | None],
+        *,
+        max_attempts: int = 5,
+    ) -> None:
+        """Update a blob file in Azure storage without overwriting concurrent changes
+
+        The current contents of the blob, or None if it does not exist, are passed to
+        `update`, which returns the new contents, or None to remove the blob. Writes
+        are conditional on the blob's ETag, so if another client changes the blob in
+        the meantime it is read again and `update` is retried.
+
+        Returns:
+            None
+
+        Raises:
+            DataSafeHavenAzureError if the blob could not be updated
+        """
+        try:
+            blob_client = self.blob_client(
+                resource_group_name,
+                storage_account_name,
+                storage_container_name,
+                blob_name,
+            )
+            for _ in range(max_attempts):
+                try:
+                    current, etag = self.read_blob(
+                        blob_client, storage_account_name, storage_container_name
+                    )
+                except ResourceNotFoundError:
+                    current, etag = None, None
+                if (blob_data := update(current)) == current:
+                    return
+                conditions: dict[str, Any] = (
+                    {"etag": etag, "match_condition": MatchConditions.IfNotModified}
+                    if etag
+                    else {"match_condition": MatchConditions.IfMissing}
+                )
+                try:
+                    if blob_data is None:
+                        blob_client.delete_blob(
+                            delete_snapshots="include", **conditions
+                        )
+                        AzureBlobCache.remove(
+                            storage_account_name, storage_container_name, blob_name
+                        )
+                    else:
+                        properties = blob_client.upload_blob(
+                            blob_data, overwrite=True, **conditions
+                        )
+                        AzureBlobCache.write(
+                            storage_account_name,
+                            storage_container_name,
+                            blob_name,
+                            content=blob_data,
+                            etag=properties.get("etag"),
+                        )
+                    self.logger.debug(
+                        f"Updated file [green]{blob_name}[/] in blob storage.",
+                    )
+                    return
+                except (ResourceExistsError, ResourceModifiedError):
+                    self.logger.debug(
+                        f"File [green]{blob_name}[/] was changed by another client, retrying.",
+                    )
+        except AzureError as exc:
+            msg = f"Blob file '{blob_name}' could not be updated in '{storage_account_name}'."
+            raise DataSafeHavenAzureError(msg) from exc
+        msg = f"Blob file '{blob_name}' in '{storage_account_name}' was changed by another client {max_attempts} times while it was being updated."
+        raise DataSafeHavenAzureError(msg)
 
     def upload_blob(
         self,
@@ -1279,10 +1755,28 @@ class AzureSdk:
                 blob_name,
             )
             # Upload the created file
-            blob_client.upload_blob(blob_data, overwrite=True)
+            properties = blob_client.upload_blob(blob_data, overwrite=True)
+            if isinstance(blob_data, str):
+                AzureBlobCache.write(
+                    storage_account_name,
+                    storage_container_name,
+                    blob_name,
+                    content=blob_data,
+                    etag=properties.get("etag"),
+                )
+            else:
+                AzureBlobCache.remove(
+                    storage_account_name, storage_container_name, blob_name
+                )
             self.logger.debug(
                 f"Uploaded file [green]{blob_name}[/] to blob storage.",
             )
         except AzureError as exc:
             msg = f"Blob file '{blob_name}' could not be uploaded to '{storage_account_name}'."
             raise DataSafeHavenAzureError(msg) from exc
+
+    def vm_command_lock(self, resource_group_name: str, vm_name: str) -> RLock:
+        """Get the lock that queues commands for a virtual machine"""
+        key = (self.subscription_id, resource_group_name, vm_name)
+        with self.lock_:
+            return self.vm_command_locks_.setdefault(key, RLock())
@@ -0,0 +1,131 @@
+"""Persistent cache of Azure subscription and tenant IDs"""
+
+import json
+import pathlib
+import time
+from collections.abc import Callable
+from contextlib import suppress
+from os import getenv
+from threading import Lock
+from typing import Any, ClassVar
+
+from data_safe_haven.directories import config_dir, write_private_file
+
+
+class AzureSubscriptionCache:
+    """
+    Map Azure subscription names to their subscription and tenant IDs
+
+    Entries are stored in the config directory, so they are shared between commands
+    and with the Pulumi dynamic provider processes. Subscription names are only unique
+    within what an account can see, so entries are keyed by the Azure CLI account and
+    tenant as well as the subscription name. Once an entry is older than its
+    time-to-live, it is looked up again by the caller before it is used.
+    """
+
+    filename: ClassVar[str] = ".azure-subscriptions.json"
+    ttl: ClassVar[float] = 24 * 60 * 60
+    entries_: ClassVar[dict[str, tuple[str, str]]] = {}
+    lock_: ClassVar[Lock] = Lock()
+
+    @classmethod
+    def path(cls) -> pathlib.Path:
+        return config_dir() / cls.filename
+
+    @classmethod
+    def profile_path(cls) -> pathlib.Path:
+        """Path to the Azure CLI profile, which records the logged-in accounts"""
+        azure_config_dir = getenv("AZURE_CONFIG_DIR")
+        return (
+            pathlib.Path(azure_config_dir)
+            if azure_config_dir
+            else pathlib.Path.home() / ".azure"
+        ) / "azureProfile.json"
+
+    @classmethod
+    def key(cls, subscription_name: str) -> str:
+        """
+        Identify a subscription as seen by the current Azure CLI account
+
+        The account is read from the Azure CLI profile, so no requests are needed.
+        """
+        account = ""
+        with suppress(OSError, ValueError, KeyError, TypeError):
+            # The Azure CLI writes its profile with a byte order mark
+            with open(cls.profile_path(), encoding="utf-8-sig") as f_profile:
+                profile = json.load(f_profile)
+            default = next(
+                subscription
+                for subscription in profile["subscriptions"]
+                if subscription.get("isDefault")
+            )
+            account = f"{default['user']['name']}@{default['tenantId']}"
+        return f"{account}/{subscription_name}"
+
+    @classmethod
+    def lookup(
+        cls,
+        subscription_name: str,
+        loader: Callable[[], tuple[str, str]],
+    ) -> tuple[str, str]:
+        """
+        Get the subscription ID and tenant ID for a named subscription
+
+        Args:
+            subscription_name: the display name of the subscription
+            loader: function that looks up the IDs for this subscription in Azure
+
+        Returns:
+            tuple[str, str]: the subscription ID and the tenant ID
+        """
+        key = cls.key(subscription_name)
+        with cls.lock_:
+            if key in cls.entries_:
+                return cls.entries_[key]
+        entry = cls.read().get(key, None)
+        if entry and time.time() - float(entry["timestamp"]) <= cls.ttl:
+            ids = (str(entry["subscription_id"]), str(entry["tenant_id"]))
+        else:
+            # Look up missing or stale entries on this thread, as the loader may
+            # need to ask the user to confirm their credentials
+            try:
+                ids = loader()
+            except Exception:
+                if entry:
+                    cls.write(key, None)
+                raise
+            cls.write(key, ids)
+        with cls.lock_:
+            cls.entries_[key] = ids
+        return ids
+
+    @classmethod
+    def invalidate(cls, subscription_name: str) -> None:
+        """Forget a subscription both in this process and on disk"""
+        key = cls.key(subscription_name)
+        with cls.lock_:
+            cls.entries_.pop(key, None)
+        cls.write(key, None)
+
+    @classmethod
+    def read(cls) -> dict[str, dict[str, Any]]:
+        """Load all cached entries, ignoring a missing or unreadable cache file"""
+        with suppress(OSError, ValueError):
+            with open(cls.path(), encoding="utf-8") as f_cache:
+                return dict(json.load(f_cache))
+        return {}
+
+    @classmethod
+    def write(cls, key: str, ids: tuple[str, str] | None) -> None:
+        """Update or remove one entry, replacing the cache file atomically"""
+        entries = cls.read()
+        if ids:
+            entries[key] = {
+                "subscription_id": ids[0],
+                "tenant_id": ids[1],
+                "timestamp": time.time(),
+            }
+        else:
+            entries.pop(key, None)
+        with suppress(OSError):
+            write_private_file(cls.path(), json.dumps(entries, indent=2))
@@ -0,0 +1,97 @@
+"""Persistent catalogue of the virtual machine SKUs available in each Azure location"""
+
+import json
+import pathlib
+import time
+from collections.abc import Callable
+from contextlib import suppress
+from threading import Lock
+from typing import Any, ClassVar
+
+from data_safe_haven.directories import config_dir, write_private_file
+
+
+class AzureVmSkuCatalogue:
+    """
+    Index of virtual machine SKUs and their sizes for each Azure location
+
+    Only the capabilities needed by Data Safe Haven are kept for each SKU. Each
+    location is stored as a small JSON file in the config directory and is reloaded
+    from Azure once it is older than its time-to-live. Cached catalogues can also be
+    read without contacting Azure, for example when validating a config file.
+    """
+
+    capabilities: ClassVar[tuple[str, ...]] = ("GPUs", "MemoryGB", "vCPUs")
+    ttl: ClassVar[float] = 7 * 24 * 60 * 60
+    catalogues_: ClassVar[dict[str, dict[str, dict[str, Any]]]] = {}
+    lock_: ClassVar[Lock] = Lock()
+
+    @classmethod
+    def path(cls, location: str) -> pathlib.Path:
+        return config_dir() / f".azure-vm-skus-{location}.json"
+
+    @classmethod
+    def lookup(
+        cls,
+        location: str,
+        loader: Callable[[], dict[str, dict[str, Any]]],
+    ) -> dict[str, dict[str, Any]]:
+        """
+        Get the virtual machine SKUs available in a location
+
+        Args:
+            location: the Azure location
+            loader: function that lists the SKUs for this location in Azure
+
+        Returns:
+            dict[str, dict[str, Any]]: the capabilities of each SKU, keyed by SKU name
+        """
+        with cls.lock_:
+            if location in cls.catalogues_:
+                return cls.catalogues_[location]
+        skus = cls.read(location, max_age=cls.ttl)
+        if skus is None:
+            skus = {
+                name: {
+                    capability: value
+                    for capability, value in sku.items()
+                    if capability in cls.capabilities
+                }
+                for name, sku in loader().items()
+            }
+            cls.write(location, skus)
+        with cls.lock_:
+            cls.catalogues_[location] = skus
+        return skus
+
+    @classmethod
+    def read(
+        cls, location: str, *, max_age: float | None = None
+    ) -> dict[str, dict[str, Any]] | None:
+        """
+        Load a cached catalogue without contacting Azure
+
+        Args:
+            location: the Azure location
+            max_age: ignore catalogues older than this many seconds
+
+        Returns:
+            dict[str, dict[str, Any]] | None: the cached catalogue, if there is one
+        """
+        with suppress(KeyError, OSError, ValueError):
+            with open(cls.path(location), encoding="utf-8") as f_catalogue:
+                catalogue = json.load(f_catalogue)
+            if (max_age is None) or (
+                time.time() - float(catalogue["timestamp"]) < max_age
+            ):
+                return dict(catalogue["skus"])
+        return None
+
+    @classmethod
+    def write(cls, location: str, skus: dict[str, dict[str, Any]]) -> None:
+        """Store a catalogue, replacing any existing file atomically"""
+        with suppress(OSError):
+            write_private_file(
+                cls.path(location),
+                json.dumps({"skus": skus, "timestamp": time.time()}),
+            )
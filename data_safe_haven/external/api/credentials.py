@@ -1,12 +1,16 @@
 """Classes related to Azure credentials"""
 
+import asyncio
 from abc import abstractmethod
 from collections.abc import Sequence
 from datetime import UTC, datetime
+from threading import RLock
+from types import TracebackType
 from typing import Any, ClassVar
 
 import jwt
 from azure.core.credentials import AccessToken, TokenCredential
+from azure.core.credentials_async import AsyncTokenCredential
 from azure.identity import (
     AuthenticationRecord,
     AzureCliCredential,
@@ -27,6 +31,7 @@ class DeferredCredential(TokenCredential):
 
     tokens_: ClassVar[dict[str, AccessToken]] = {}
     cache_: ClassVar[set[tuple[str, str]]] = set()
+    lock_: ClassVar[RLock] = RLock()
 
     def __init__(
         self,
@@ -101,14 +106,22 @@ class DeferredCredential(TokenCredential):
         # Require at least 10 minutes of remaining validity
         # The 'expires_on' property is a Unix timestamp integer in seconds
         validity_cutoff = datetime.now(tz=UTC).timestamp() + 10 * 60
-        if not DeferredCredential.tokens_.get(combined_scopes, None) or (
-            DeferredCredential.tokens_[combined_scopes].expires_on < validity_cutoff
-        ):
-            # Generate a new token and store it at class-level token
-            DeferredCredential.tokens_[combined_scopes] = (
-                self.get_credential().get_token(*scopes, **kwargs)
-            )
-        return DeferredCredential.tokens_[combined_scopes]
+
+        def valid_token() -> AccessToken | None:
+            token = DeferredCredential.tokens_.get(combined_scopes, None)
+            return token if token and token.expires_on >= validity_cutoff else None
+
+        if token := valid_token():
+            return token
+        # Only one thread generates each token. Pulumi runs dynamic providers in
+        # parallel threads, which would otherwise each start an Azure CLI process or
+        # device code flow at the same time and contend for the shared token cache.
+        with DeferredCredential.lock_:
+            if not (token := valid_token()):
+                # Generate a new token and store it at class-level token
+                token = self.get_credential().get_token(*scopes, **kwargs)
+                DeferredCredential.tokens_[combined_scopes] = token
+            return token
 
 
 class AzureSdkCredential(DeferredCredential):
@@ -148,6 +161,32 @@ class AzureSdkCredential(DeferredCredential):
         return credential
 
 
+class AsyncAzureSdkCredential(AsyncTokenCredential):
+    """
+    Credential loader used by AsyncAzureSdk
+
+    Tokens are requested from an AzureSdkCredential in a worker thread, so they share
+    its token cache and any interactive confirmation.
+    """
+
+    def __init__(self, credential: AzureSdkCredential) -> None:
+        self.credential = credential
+
+    async def get_token(self, *scopes: str, **kwargs: Any) -> AccessToken:
+        return await asyncio.to_thread(self.credential.get_token, *scopes, **kwargs)
+
+    async def close(self) -> None:
+        pass
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None = None,
+        exc_value: BaseException | None = None,
+        traceback: TracebackType | None = None,
+    ) -> None:
+        await self.close()
+
+
 class GraphApiCredential(DeferredCredential):
     """
     Credential loader used by GraphApi
@@ -1,17 +1,23 @@
 """Interface to the Microsoft Graph API"""
 
 import datetime
+import email.utils
 import json
+import random
 import time
-from collections.abc import Sequence
+from collections.abc import Callable, Iterator, Sequence
+from concurrent.futures import Future, ThreadPoolExecutor
 from contextlib import suppress
+from contextvars import copy_context
 from typing import Any, ClassVar, Self
 
 import requests
 import typer
 from dns import resolver
+from requests.adapters import HTTPAdapter
 
 from data_safe_haven import console
+from data_safe_haven.directories import config_dir, write_private_file
 from data_safe_haven.exceptions import (
     DataSafeHavenMicrosoftGraphError,
     DataSafeHavenValueError,
@@ -20,8 +26,11 @@ from data_safe_haven.functions import alphanumeric
 from data_safe_haven.logging import get_logger, get_null_logger
 
 from .credentials import DeferredCredential, GraphApiCredential
+from .graph_directory_index import GraphDirectoryIndex
+from .request_metrics import RequestMetrics
 
 
+@RequestMetrics.instrument("GraphApi")
 class GraphApi:
     """Interface to the Microsoft Graph REST API"""
 
@@ -48,16 +57,47 @@ class GraphApi:
         "GroupMember.Read.All": "bc024368-1153-4739-b217-4326f2e966d0",
         "User.Read.All": "a154be20-db9c-4678-8ab7-66f6cc099a59",
     }
+    # Throttled (429) and transiently unavailable responses should be retried, but
+    # POST requests are only retried when the server did not process them
+    # See https://learn.microsoft.com/en-us/graph/throttling for details.
+    retry_status_codes: ClassVar[frozenset[int]] = frozenset(
+        {
+            requests.codes.TOO_MANY_REQUESTS,
+            requests.codes.INTERNAL_SERVER_ERROR,
+            requests.codes.BAD_GATEWAY,
+            requests.codes.SERVICE_UNAVAILABLE,
+            requests.codes.GATEWAY_TIMEOUT,
+        }
+    )
+    # Maximum number of requests that can be combined into a single JSON batch
+    max_batch_size: ClassVar[int] = 20
+    # Maximum number of members that can be added to a group in a single request
+    max_bind_members: ClassVar[int] = 20
+    # Largest page of users, groups or applications that can be requested with $top
+    page_size: ClassVar[int] = 999
+    # Directory indices are shared between all instances connected to the same tenant
+    directory_indices_: ClassVar[dict[str, GraphDirectoryIndex]] = {}
 
     def __init__(
         self,
         *,
         credential: DeferredCredential,
         disable_logging: bool = False,
+        max_retries: int = 6,
+        pool_size: int = 10,
     ):
         self.base_endpoint = "https://graph.microsoft.com/v1.0"
         self.credential = credential
         self.logger = get_null_logger() if disable_logging else get_logger()
+        self.max_retries = max_retries
+        self.backoff_base = 1.0
+        self.backoff_max = 60.0
+        # Use a single pooled session so that connections are kept alive
+        self.session = requests.Session()
+        self.session.mount(
+            "https://",
+            HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size),
+        )
 
     @classmethod
     def from_scopes(
@@ -66,23 +106,30 @@ class GraphApi:
         scopes: Sequence[str],
         tenant_id: str,
         disable_logging: bool = False,
+        pool_size: int = 10,
     ) -> "GraphApi":
         return cls(
             credential=GraphApiCredential(
                 scopes=scopes, tenant_id=tenant_id, skip_confirmation=disable_logging
             ),
             disable_logging=disable_logging,
+            pool_size=pool_size,
         )
 
     @classmethod
     def from_token(
-        cls: type[Self], auth_token: str, *, disable_logging: bool = False
+        cls: type[Self],
+        auth_token: str,
+        *,
+        disable_logging: bool = False,
+        pool_size: int = 10,
     ) -> "GraphApi":
         """Construct a GraphApi from an existing authentication token."""
         try:
             decoded = DeferredCredential.decode_token(auth_token)
             return cls.from_scopes(
                 disable_logging=disable_logging,
+                pool_size=pool_size,
                 scopes=str(decoded["scp"]).split(),
                 tenant_id=decoded["tid"],
             )
@@ -90,6 +137,14 @@ class GraphApi:
             msg = "Could not construct GraphApi from provided token."
             raise DataSafeHavenValueError(msg) from exc
 
+    @property
+    def directory(self) -> GraphDirectoryIndex:
+        """Index of users and groups in this tenant, shared across instances"""
+        tenant_id = str(self.credential.tenant_id)
+        if tenant_id not in GraphApi.directory_indices_:
+            GraphApi.directory_indices_[tenant_id] = GraphDirectoryIndex()
+        return GraphApi.directory_indices_[tenant_id]
+
     @property
     def token(self) -> str:
         return self.credential.token
@@ -141,11 +196,11 @@ class GraphApi:
         try:
             user_id = self.get_id_from_username(username)
             group_id = self.get_id_from_groupname(group_name)
-            json_response = self.http_get(
-                f"{self.base_endpoint}/groups/{group_id}/members",
-            ).json()
+            if not (user_id and group_id):
+                msg = f"Could not find user '{username}' or group '{group_name}'."
+                raise DataSafeHavenMicrosoftGraphError(msg)
             # If user already belongs to group then do nothing further
-            if any(user_id == member["id"] for member in json_response["value"]):
+            if self.is_group_member(user_id, group_id):
                 self.logger.info(
                     f"User [green]'{username}'[/] is already a member of group [green]'{group_name}'[/]."
                 )
@@ -165,6 +220,123 @@ class GraphApi:
             msg = f"Could not add user '{username}' to group '{group_name}'."
             raise DataSafeHavenMicrosoftGraphError(msg) from exc
 
+    def add_users_to_group(
+        self,
+        usernames: Sequence[str],
+        group_name: str,
+        *,
+        workers: int = 1,
+    ) -> None:
+        """Add several users to a group
+
+        Users are added in chunks using 'members@odata.bind', which are processed by a
+        pool of worker threads. Chunks that are rejected, for example because they
+        contain an existing member, are retried one user at a time.
+
+        Args:
+            usernames: the users to add
+            group_name: the group to add them to
+            workers: the number of chunks to add at the same time
+
+        Raises:
+            DataSafeHavenMicrosoftGraphError if any user could not be added to the group.
+        """
+        try:
+            if not usernames:
+                return
+            group_id = self.get_id_from_groupname(group_name)
+            if not group_id:
+                msg = f"Could not find group '{group_name}'."
+                raise DataSafeHavenMicrosoftGraphError(msg)
+            user_ids = self.get_ids_from_usernames(usernames)
+            if missing_usernames := [name for name, id_ in user_ids.items() if not id_]:
+                msg = f"Could not find users {missing_usernames}."
+                raise DataSafeHavenMicrosoftGraphError(msg)
+            # Add members in chunks, each of which is a single PATCH request
+            user_id_items = list(user_ids.items())
+            chunks = [
+                dict(user_id_items[idx : idx + self.max_bind_members])
+                for idx in range(0, len(user_id_items), self.max_bind_members)
+            ]
+
+            def add_chunk(chunk: dict[str, str | None]) -> dict[str, str | None]:
+                response = self.http_request(
+                    "PATCH",
+                    f"{self.base_endpoint}/groups/{group_id}",
+                    json={
+                        "members@odata.bind": [
+                            f"{self.base_endpoint}/directoryObjects/{user_id}"
+                            for user_id in chunk.values()
+                        ]
+                    },
+                )
+                if self.http_is_success(response.status_code):
+                    for username in chunk:
+                        self.logger.info(
+                            f"Added user [green]'{username}'[/] to group [green]'{group_name}'[/]."
+                        )
+                    return {}
+                # The whole chunk is rejected if any user is already a member
+                return chunk
+
+            rejected_user_ids: dict[str, str | None] = {}
+            with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+                for rejected in executor.map(
+                    lambda chunk: copy_context().run(add_chunk, chunk), chunks
+                ):
+                    rejected_user_ids |= rejected
+            if rejected_user_ids:
+                self.add_users_to_group_individually(
+                    rejected_user_ids, group_id, group_name
+                )
+        except DataSafeHavenMicrosoftGraphError as exc:
+            msg = f"Could not add users to group '{group_name}'."
+            raise DataSafeHavenMicrosoftGraphError(msg) from exc
+
+    def add_users_to_group_individually(
+        self,
+        user_ids: dict[str, str | None],
+        group_id: str,
+        group_name: str,
+    ) -> None:
+        """Add users to a group one at a time, using batched requests
+
+        Unlike adding several members in one request, this succeeds for users who are
+        already members of the group.
+
+        Raises:
+            DataSafeHavenMicrosoftGraphError if any user could not be added to the group.
+        """
+        responses = self.http_batch(
+            [
+                {
+                    "id": username,
+                    "method": "POST",
+                    "url": f"/groups/{group_id}/members/$ref",
+                    "body": {
+                        "@odata.id": f"{self.base_endpoint}/directoryObjects/{user_id}"
+                    },
+                }
+                for username, user_id in user_ids.items()
+            ]
+        )
+        failed_usernames = []
+        for username, response in responses.items():
+            if self.http_is_success(response["status"]):
+                self.logger.info(
+                    f"Added user [green]'{username}'[/] to group [green]'{group_name}'[/]."
+                )
+            # Adding an existing member is reported as a bad request
+            elif "already exist" in json.dumps(response["body"]):
+                self.logger.info(
+                    f"User [green]'{username}'[/] is already a member of group [green]'{group_name}'[/]."
+                )
+            else:
+                failed_usernames.append(username)
+        if failed_usernames:
+            msg = f"Could not add users {failed_usernames}."
+            raise DataSafeHavenMicrosoftGraphError(msg)
+
     def create_application(
         self,
         application_name: str,
@@ -341,6 +513,7 @@ class GraphApi:
                 f"{self.base_endpoint}/groups",
                 json=request_json,
             ).json()
+            self.directory.invalidate("groups")
             self.logger.info(
                 f"Created Entra group '[green]{group_name}[/]'.",
             )
@@ -348,6 +521,19 @@ class GraphApi:
             msg = f"Could not create Entra group '{group_name}'."
             raise DataSafeHavenMicrosoftGraphError(msg) from exc
 
+    def create_groups(self, group_names: Sequence[str], *, workers: int = 1) -> None:
+        """Create several Entra groups using a pool of worker threads
+
+        Raises:
+            DataSafeHavenMicrosoftGraphError if any group could not be created
+        """
+        self.run_concurrently(
+            self.create_group,
+            {group_name: (group_name,) for group_name in group_names},
+            "create groups",
+            workers=workers,
+        )
+
     def ensure_application_service_principal(
         self, application_name: str
     ) -> dict[str, Any]:
@@ -368,9 +554,13 @@ class GraphApi:
                 if not application_json:
                     msg = f"Could not retrieve application '{application_name}'"
                     raise DataSafeHavenMicrosoftGraphError(msg)
+                # Newly-created applications may not yet be visible to this endpoint,
+                # which is reported as a bad request, so retry a few times
                 self.http_post(
                     f"{self.base_endpoint}/servicePrincipals",
                     json={"appId": application_json["appId"]},
+                    max_retries=3,
+                    retry_status_codes=[requests.codes.BAD_REQUEST],
                 ).json()
                 self.logger.info(
                     f"Created service principal for application '[green]{application_name}[/]'.",
@@ -417,56 +607,213 @@ class GraphApi:
                     json=request_json,
                 ).json()
                 user_id = json_response["id"]
-            # Set the authentication email address
-            try:
-                response = self.http_get(
-                    f"https://graph.microsoft.com/beta/users/{user_id}/authentication/emailMethods"
+                self.directory.invalidate("users")
+            # Authentication methods and account status are independent of each
+            # other, so they are set concurrently
+            with ThreadPoolExecutor(max_workers=3) as executor:
+                futures: list[Future[Any]] = [
+                    executor.submit(
+                        copy_context().run,
+                        self.ensure_authentication_method,
+                        user_id,
+                        username,
+                        "emailMethods",
+                        {"emailAddress": email_address},
+                    ),
+                    executor.submit(
+                        copy_context().run,
+                        self.ensure_authentication_method,
+                        user_id,
+                        username,
+                        "phoneMethods",
+                        {"phoneNumber": phone_number, "phoneType": "mobile"},
+                    ),
+                    # Ensure user is enabled
+                    executor.submit(
+                        copy_context().run,
+                        self.http_patch,
+                        f"{self.base_endpoint}/users/{user_id}",
+                        json={"accountEnabled": True},
+                    ),
+                ]
+                for future in futures:
+                    future.result()
+            self.logger.info(
+                f"{final_verb}d Entra user '[green]{username}[/]'.",
+            )
+        except DataSafeHavenMicrosoftGraphError as exc:
+            msg = f"Could not {final_verb.lower()} user {username}."
+            raise DataSafeHavenMicrosoftGraphError(msg) from exc
+
+    def create_users(
+        self,
+        users: Sequence[tuple[dict[str, Any], str, str]],
+        *,
+        workers: int = 1,
+    ) -> None:
+        """Create or update several Entra users using batched requests
+
+        Each user is given as a tuple of (request_json, email_address, phone_number)
+        with the same meaning as the arguments to `create_user`. Users are split into
+        batches, which are processed by a pool of worker threads.
+
+        Args:
+            users: details of each user
+            workers: the number of batches to process at the same time
+
+        Raises:
+            DataSafeHavenMicrosoftGraphError if any user could not be created
+        """
+        batches = [
+            users[idx : idx + self.max_batch_size]
+            for idx in range(0, len(users), self.max_batch_size)
+        ]
+        with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+            failed_usernames = set().union(
+                *executor.map(
+                    lambda batch: copy_context().run(self.create_users_batch, batch),
+                    batches,
                 )
-                if existing_email_addresses := [
-                    item["emailAddress"] for item in response.json()["value"]
-                ]:
-                    self.logger.warning(
-                        f"Email authentication is already set up for Entra user '[green]{username}[/]' using {existing_email_addresses}."
+            )
+        if failed_usernames:
+            msg = f"Could not create/update users {sorted(failed_usernames)}."
+            raise DataSafeHavenMicrosoftGraphError(msg)
+
+    def create_users_batch(
+        self,
+        users: Sequence[tuple[dict[str, Any], str, str]],
+    ) -> set[str]:
+        """Create or update a batch of Entra users, reporting failures for each user
+
+        Returns:
+            set[str]: the usernames of any users that could not be created or updated
+        """
+        beta_endpoint = "https://graph.microsoft.com/beta"
+        failed_usernames: set[str] = set()
+
+        def fail(username: str, action: str, response: dict[str, Any]) -> None:
+            failed_usernames.add(username)
+            body = response["body"]
+            error = body.get("error", {}) if isinstance(body, dict) else {}
+            self.logger.error(
+                f"Could not {action} for Entra user '[green]{username}[/]'."
+                f" Received status {response['status']}: {error.get('message', '')}"
+            )
+
+        usernames = [str(request_json["mailNickname"]) for request_json, _, _ in users]
+        try:
+            # Check which users already exist
+            user_ids = self.get_ids_from_usernames(usernames)
+            final_verbs = {
+                username: "Update" if user_id else "Create"
+                for username, user_id in user_ids.items()
+            }
+
+            # Create any users that do not already exist
+            responses = self.http_batch(
+                [
+                    {
+                        "id": username,
+                        "method": "POST",
+                        "url": "/users",
+                        "body": request_json,
+                    }
+                    for username, (request_json, _, _) in zip(
+                        usernames, users, strict=True
                     )
+                    if not user_ids[username]
+                ]
+            )
+            for username, response in responses.items():
+                if self.http_is_success(response["status"]):
+                    user_ids[username] = str(response["body"]["id"])
                 else:
-                    self.http_post(
-                        f"https://graph.microsoft.com/beta/users/{user_id}/authentication/emailMethods",
-                        json={"emailAddress": email_address},
-                    )
-            except DataSafeHavenMicrosoftGraphError as exc:
-                msg = f"Failed to add authentication email address '{email_address}'."
-                raise DataSafeHavenMicrosoftGraphError(msg) from exc
+                    fail(username, "create user", response)
+            if responses:
+                self.directory.invalidate("users")
+            existing_users = [
+                (username, str(user_ids[username]), email_address, phone_number)
+                for username, (_, email_address, phone_number) in zip(
+                    usernames, users, strict=True
+                )
+                if user_ids[username]
+            ]
 
-            # Set the authentication phone number
-            try:
-                response = self.http_get(
-                    f"https://graph.microsoft.com/beta/users/{user_id}/authentication/phoneMethods"
+            # Load existing authentication methods
+            # Newly-created users may not yet be visible to these endpoints
+            responses = self.http_batch(
+                [
+                    {
+                        "id": f"{username}/{method}",
+                        "method": "GET",
+                        "url": f"/users/{user_id}/authentication/{method}",
+                    }
+                    for username, user_id, _, _ in existing_users
+                    for method in ("emailMethods", "phoneMethods")
+                ],
+                endpoint=beta_endpoint,
+                retry_status_codes=[requests.codes.NOT_FOUND],
+            )
+
+            # Set authentication methods where needed and ensure users are enabled
+            batch_requests: list[dict[str, Any]] = []
+            for username, user_id, email_address, phone_number in existing_users:
+                for label, method, key, body in (
+                    (
+                        "Email",
+                        "emailMethods",
+                        "emailAddress",
+                        {"emailAddress": email_address},
+                    ),
+                    (
+                        "Phone",
+                        "phoneMethods",
+                        "phoneNumber",
+                        {"phoneNumber": phone_number, "phoneType": "mobile"},
+                    ),
+                ):
+                    response = responses[f"{username}/{method}"]
+                    if not self.http_is_success(response["status"]):
+                        fail(username, f"load {label.lower()} authentication", response)
+                    elif existing := [item[key] for item in response["body"]["value"]]:
+                        self.logger.warning(
+                            f"{label} authentication is already set up for Entra user '[green]{username}[/]' using {existing}."
+                        )
+                    else:
+                        batch_requests.append(
+                            {
+                                "id": f"{username}/{method}",
+                                "method": "POST",
+                                "url": f"/users/{user_id}/authentication/{method}",
+                                "body": body,
+                            }
+                        )
+                batch_requests.append(
+                    {
+                        "id": f"{username}/enable",
+                        "method": "PATCH",
+                        "url": f"/users/{user_id}",
+                        "body": {"accountEnabled": True},
+                    }
                 )
-                if existing_phone_numbers := [
-                    item["phoneNumber"] for item in response.json()["value"]
-                ]:
-                    self.logger.warning(
-                        f"Phone authentication is already set up for Entra user '[green]{username}[/]' using {existing_phone_numbers}."
-                    )
-                else:
-                    self.http_post(
-                        f"https://graph.microsoft.com/beta/users/{user_id}/authentication/phoneMethods",
-                        json={"phoneNumber": phone_number, "phoneType": "mobile"},
+            responses = self.http_batch(batch_requests, endpoint=beta_endpoint)
+            for request_id, response in responses.items():
+                if not self.http_is_success(response["status"]):
+                    username, action = request_id.split("/")
+                    fail(username, f"update {action}", response)
+
+            # Report the outcome for each user
+            for username in usernames:
+                if username not in failed_usernames:
+                    self.logger.info(
+                        f"{final_verbs[username]}d Entra user '[green]{username}[/]'.",
                     )
-            except DataSafeHavenMicrosoftGraphError as exc:
-                msg = f"Failed to add authentication phone number '{phone_number}'."
-                raise DataSafeHavenMicrosoftGraphError(msg) from exc
-            # Ensure user is enabled
-            self.http_patch(
-                f"{self.base_endpoint}/users/{user_id}",
-                json={"accountEnabled": True},
-            )
-            self.logger.info(
-                f"{final_verb}d Entra user '[green]{username}[/]'.",
-            )
+            return failed_usernames
         except DataSafeHavenMicrosoftGraphError as exc:
-            msg = f"Could not {final_verb.lower()} user {username}."
-            raise DataSafeHavenMicrosoftGraphError(msg) from exc
+            self.logger.error(
+                f"Could not create or update Entra users {usernames}: {exc}"
+            )
+            return set(usernames)
 
     def delete_application(
         self,
@@ -493,7 +840,98 @@ class GraphApi:
             msg = f"Could not delete application '{application_name}'."
             raise DataSafeHavenMicrosoftGraphError(msg) from exc
 
+    def ensure_authentication_method(
+        self,
+        user_id: str,
+        username: str,
+        method: str,
+        details: dict[str, str],
+    ) -> None:
+        """Add an authentication method for a user unless one of this type exists
+
+        Args:
+            user_id: the ID of the user
+            username: the username of the user, used for logging
+            method: the type of authentication method, e.g. 'emailMethods'
+            details: the details of the method, starting with the identifying value
+
+        Raises:
+            DataSafeHavenMicrosoftGraphError if the method could not be added
+        """
+        key, value = next(iter(details.items()))
+        endpoint = (
+            f"https://graph.microsoft.com/beta/users/{user_id}/authentication/{method}"
+        )
+        try:
+            # Newly-created users may not yet be visible to this endpoint
+            response = self.http_get(
+                endpoint, retry_status_codes=[requests.codes.NOT_FOUND]
+            )
+            if existing := [item[key] for item in response.json()["value"]]:
+                self.logger.warning(
+                    f"Authentication method '{method}' is already set up for Entra user '[green]{username}[/]' using {existing}."
+                )
+            else:
+                self.http_post(endpoint, json=details)
+        except DataSafeHavenMicrosoftGraphError as exc:
+            msg = f"Failed to add authentication method '{method}' using '{value}'."
+            raise DataSafeHavenMicrosoftGraphError(msg) from exc
+
+    def find_objects(
+        self,
+        resource: str,
+        odata_filter: str,
+        attributes: Sequence[str] | None = None,
+    ) -> Sequence[dict[str, Any]]:
+        """Find objects in a collection using a server-side OData filter
+
+        Filters that are not supported by default are retried as advanced queries,
+        which require the 'ConsistencyLevel: eventual' header.
+
+        Args:
+            resource: the collection to search, for example 'groups'
+            odata_filter: the OData filter expression to apply
+            attributes: the attributes to return for each object (default: all)
+
+        Returns:
+            JSON: A JSON list of matching objects
+
+        Raises:
+            DataSafeHavenMicrosoftGraphError if the filter could not be applied
+        """
+        url = f"{self.base_endpoint}/{resource}"
+        params = {"$filter": odata_filter}
+        if attributes:
+            params["$select"] = ",".join(attributes)
+        try:
+            response = self.http_request("GET", url, params=params)
+            if response.status_code == requests.codes.BAD_REQUEST:
+                response = self.http_request(
+                    "GET",
+                    url,
+                    headers={"ConsistencyLevel": "eventual"},
+                    params=params | {"$count": "true"},
+                )
+            self.http_raise_for_status(response)
+            return [dict(obj) for obj in response.json()["value"]]
+        except (KeyError, requests.exceptions.RequestException) as exc:
+            msg = f"Could not apply filter '{odata_filter}' to Entra {resource}."
+            raise DataSafeHavenMicrosoftGraphError(msg) from exc
+
     def get_application_by_name(self, application_name: str) -> dict[str, Any] | None:
+        try:
+            return next(
+                iter(
+                    self.find_objects(
+                        "applications",
+                        f"displayName eq '{self.odata_escape(application_name)}'",
+                    )
+                ),
+                None,
+            )
+        except DataSafeHavenMicrosoftGraphError:
+            pass
+        # Fall back to searching the full list of applications
         try:
             return next(
                 application
@@ -506,6 +944,19 @@ class GraphApi:
     def get_service_principal_by_name(
         self, service_principal_name: str
     ) -> dict[str, Any] | None:
+        try:
+            return next(
+                iter(
+                    self.find_objects(
+                        "servicePrincipals",
+                        f"displayName eq '{self.odata_escape(service_principal_name)}'",
+                    )
+                ),
+                None,
+            )
+        except DataSafeHavenMicrosoftGraphError:
+            pass
+        # Fall back to searching the full list of service principals
         try:
             return next(
                 service_principal
@@ -516,29 +967,100 @@ class GraphApi:
             return None
 
     def get_id_from_groupname(self, group_name: str) -> str | None:
+        # Use the directory index if it is already loaded
+        if not self.directory.is_fresh("groups"):
+            try:
+                return next(
+                    (
+                        str(group["id"])
+                        for group in self.find_objects(
+                            "groups",
+                            f"displayName eq '{self.odata_escape(group_name)}'",
+                            attributes=["displayName", "id"],
+                        )
+                    ),
+                    None,
+                )
+            except DataSafeHavenMicrosoftGraphError:
+                pass
+        # Fall back to loading the full directory index
         try:
-            return str(
-                next(
-                    group
-                    for group in self.read_groups()
-                    if group["displayName"] == group_name
-                )["id"]
+            group = self.directory.lookup(
+                "groups", "displayName", group_name, self.read_directory_groups
             )
-        except (DataSafeHavenMicrosoftGraphError, StopIteration):
+            return str(group["id"]) if group else None
+        except DataSafeHavenMicrosoftGraphError:
             return None
 
     def get_id_from_username(self, username: str) -> str | None:
+        # Use the directory index if it is already loaded
+        if not self.directory.is_fresh("users"):
+            try:
+                return next(
+                    (
+                        str(user["id"])
+                        for user in self.find_objects(
+                            "users",
+                            "startswith(userPrincipalName,"
+                            f"'{self.odata_escape(username)}@')",
+                            attributes=["id", "userPrincipalName"],
+                        )
+                        if user["userPrincipalName"].split("@")[0] == username
+                    ),
+                    None,
+                )
+            except DataSafeHavenMicrosoftGraphError:
+                pass
+        # Fall back to loading the full directory index
         try:
-            return str(
-                next(
-                    user
-                    for user in self.read_users()
-                    if user["userPrincipalName"].split("@")[0] == username
-                )["id"]
+            user = self.directory.lookup(
+                "users", "username", username, self.read_directory_users
             )
-        except (DataSafeHavenMicrosoftGraphError, StopIteration):
+            return str(user["id"]) if user else None
+        except DataSafeHavenMicrosoftGraphError:
             return None
 
+    def get_ids_from_usernames(self, usernames: Sequence[str]) -> dict[str, str | None]:
+        """Look up the IDs for several usernames using batched requests
+
+        Returns:
+            dict[str, str | None]: Map of username to user ID, or None if the user does not exist
+
+        Raises:
+            DataSafeHavenMicrosoftGraphError if the users could not be loaded
+        """
+        # Use the directory index if it is already loaded
+        if self.directory.is_fresh("users"):
+            return {
+                username: self.get_id_from_username(username) for username in usernames
+            }
+        responses = self.http_batch(
+            [
+                {
+                    "id": username,
+                    "method": "GET",
+                    "url": "/users?$select=id,userPrincipalName&$filter=startswith("
+                    f"userPrincipalName,'{self.odata_escape(username)}@')",
+                }
+                for username in usernames
+            ]
+        )
+        user_ids: dict[str, str | None] = {}
+        for username in usernames:
+            response = responses[username]
+            if not self.http_is_success(response["status"]):
+                msg = f"Could not look up user '{username}'."
+                raise DataSafeHavenMicrosoftGraphError(msg)
+            user_ids[username] = next(
+                (
+                    str(user["id"])
+                    for user in response["body"]["value"]
+                    if user["userPrincipalName"].split("@")[0] == username
+                ),
+                None,
+            )
+        return user_ids
+
     def grant_role_permissions(
         self,
         application_name: str,
@@ -690,6 +1212,175 @@ class GraphApi:
             msg = f"Could not assign delegated role '{application_role_name}' to application '{application_name}'."
             raise DataSafeHavenMicrosoftGraphError(msg) from exc
 
+    def http_batch(
+        self,
+        batch_requests: Sequence[dict[str, Any]],
+        *,
+        endpoint: str | None = None,
+        retry_status_codes: Sequence[int] = (),
+    ) -> dict[str, dict[str, Any]]:
+        """Make several requests using JSON batching
+
+        Each request is a dictionary with an 'id', a 'method' and a 'url' relative to
+        the endpoint (e.g. '/users'), plus an optional 'body' and an optional
+        'dependsOn' list of request IDs. Requests are combined into batches of up to
+        20, keeping dependent requests together. Sub-requests that are throttled,
+        unavailable or whose dependencies failed are retried one at a time.
+
+        See https://learn.microsoft.com/en-us/graph/json-batching for details.
+
+        Args:
+            batch_requests: the requests to make
+            endpoint: the API endpoint to use, defaulting to the v1.0 endpoint
+            retry_status_codes: additional status codes that should be retried
+
+        Returns:
+            dict[str, dict[str, Any]]: Map of request ID to a dictionary containing the 'status', 'headers' and 'body' of the response
+
+        Raises:
+            DataSafeHavenMicrosoftGraphError if the batch could not be executed
+        """
+        endpoint = endpoint or self.base_endpoint
+        responses: dict[str, dict[str, Any]] = {}
+        for chunk in self.http_batch_chunks(batch_requests):
+            json_response = self.http_post(
+                f"{endpoint}/$batch", json={"requests": chunk}
+            ).json()
+            for response in json_response["responses"]:
+                responses[str(response["id"])] = {
+                    "status": int(response["status"]),
+                    "headers": response.get("headers", {}),
+                    "body": response.get("body", {}),
+                }
+
+        # Retry any failed sub-requests one at a time, in their original order
+        for batch_request in batch_requests:
+            request_id = str(batch_request["id"])
+            if (request_id in responses) and not (
+                # Requests whose dependencies failed were never executed
+                responses[request_id]["status"] == requests.codes.FAILED_DEPENDENCY
+                or self.http_is_retryable(
+                    batch_request["method"],
+                    responses[request_id]["status"],
+                    responses[request_id]["headers"],
+                    retry_status_codes=retry_status_codes,
+                )
+            ):
+                continue
+            self.logger.debug(
+                f"Retrying batched {batch_request['method']} request to [green]{batch_request['url']}[/]."
+            )
+            try:
+                response = self.http_request(
+                    batch_request["method"],
+                    f"{endpoint}{batch_request['url']}",
+                    json=batch_request.get("body", None),
+                    retry_status_codes=retry_status_codes,
+                )
+            except requests.exceptions.RequestException as exc:
+                msg = f"Could not execute {batch_request['method']} request to '{batch_request['url']}'."
+                raise DataSafeHavenMicrosoftGraphError(msg) from exc
+            body: Any = {}
+            with suppress(requests.exceptions.JSONDecodeError):
+                body = response.json()
+            responses[request_id] = {
+                "status": response.status_code,
+                "headers": dict(response.headers),
+                "body": body,
+            }
+        return responses
+
+    def http_batch_chunks(
+        self, batch_requests: Sequence[dict[str, Any]]
+    ) -> list[list[dict[str, Any]]]:
+        """Split requests into chunks that can be sent as a single JSON batch
+
+        Requests are kept in the same chunk as any requests that they depend on.
+
+        Raises:
+            DataSafeHavenValueError if the requests cannot be split into valid chunks
+        """
+        # Group each request together with the requests that it depends on
+        group_indices: dict[str, int] = {}
+        groups: list[list[dict[str, Any]]] = []
+        for batch_request in batch_requests:
+            request_id = str(batch_request["id"])
+            try:
+                dependency_indices = {
+                    group_indices[str(dependency)]
+                    for dependency in batch_request.get("dependsOn", [])
+                }
+            except KeyError as exc:
+                msg = f"Request '{request_id}' depends on an unknown request."
+                raise DataSafeHavenValueError(msg) from exc
+            if dependency_indices:
+                group_index = min(dependency_indices)
+                for other_index in sorted(dependency_indices - {group_index}):
+                    for other_request in groups[other_index]:
+                        group_indices[str(other_request["id"])] = group_index
+                    groups[group_index] += groups[other_index]
+                    groups[other_index] = []
+            else:
+                group_index = len(groups)
+                groups.append([])
+            # Construct the JSON representation of this request
+            request_json: dict[str, Any] = {
+                "id": request_id,
+                "method": batch_request["method"],
+                "url": batch_request["url"],
+            }
+            if "body" in batch_request:
+                request_json["body"] = batch_request["body"]
+                request_json["headers"] = {"Content-Type": "application/json"}
+            if "dependsOn" in batch_request:
+                request_json["dependsOn"] = [
+                    str(dependency) for dependency in batch_request["dependsOn"]
+                ]
+            groups[group_index].append(request_json)
+            group_indices[request_id] = group_index
+
+        # Pack groups into chunks that are no larger than the maximum batch size
+        chunks: list[list[dict[str, Any]]] = []
+        for group in filter(None, groups):
+            if len(group) > self.max_batch_size:
+                msg = (
+                    f"Cannot batch more than {self.max_batch_size} dependent requests."
+                )
+                raise DataSafeHavenValueError(msg)
+            if not chunks or len(chunks[-1]) + len(group) > self.max_batch_size:
+                chunks.append([])
+            chunks[-1] += group
+        return chunks
+
+    def http_is_retryable(
+        self,
+        method: str,
+        status_code: int,
+        headers: Any,
+        *,
+        retry_status_codes: Sequence[int] = (),
+    ) -> bool:
+        """Check whether a response should be retried
+
+        POST requests are not idempotent, so unless the caller asks for a status
+        code to be retried they are only retried when they were throttled or when
+        the service was unavailable and said when to retry.
+        """
+        if status_code in retry_status_codes:
+            return True
+        if method.upper() == "POST":
+            return status_code == requests.codes.TOO_MANY_REQUESTS or (
+                status_code == requests.codes.SERVICE_UNAVAILABLE
+                and any(str(name).lower() == "retry-after" for name in headers)
+            )
+        return status_code in self.retry_status_codes
+
+    @staticmethod
+    def http_is_success(status_code: int) -> bool:
+        """Check whether a status code indicates success"""
+        # We do not use response.ok as this allows 3xx codes
+        return bool(requests.codes.OK <= status_code < requests.codes.MULTIPLE_CHOICES)
+
     @staticmethod
     def http_raise_for_status(response: requests.Response) -> None:
         """Check the status of a response
@@ -697,8 +1388,7 @@ class GraphApi:
         Raises:
             RequestException if the response did not succeed
         """
-        # We do not use response.ok as this allows 3xx codes
-        if requests.codes.OK <= response.status_code < requests.codes.MULTIPLE_CHOICES:
+        if GraphApi.http_is_success(response.status_code):
             return
         raise requests.exceptions.RequestException(
             response=response, request=response.request
@@ -714,12 +1404,7 @@ class GraphApi:
             DataSafeHavenMicrosoftGraphError if the request failed
         """
         try:
-            response = requests.delete(
-                url,
-                headers={"Authorization": f"Bearer {self.token}"},
-                timeout=120,
-                **kwargs,
-            )
+            response = self.http_request("DELETE", url, **kwargs)
             self.http_raise_for_status(response)
             return response
 
@@ -739,12 +1424,7 @@ class GraphApi:
             DataSafeHavenMicrosoftGraphError if the request failed
         """
         try:
-            response = requests.get(
-                url,
-                headers={"Authorization": f"Bearer {self.token}"},
-                timeout=120,
-                **kwargs,
-            )
+            response = self.http_request("GET", url, **kwargs)
             self.http_raise_for_status(response)
             return response
         except requests.exceptions.RequestException as exc:
@@ -756,6 +1436,8 @@ class GraphApi:
     def http_get(self, url: str, **kwargs: Any) -> requests.Response:
         """Make a paged HTTP GET request and return all values
 
+        Prefer iter_values when the values do not all need to be held in memory.
+
         Returns:
             requests.Response: The response from the remote server, with all values combined
 
@@ -769,13 +1451,13 @@ class GraphApi:
             # Keep requesting new pages until there are no more
             while True:
                 response = self.http_get_single_page(url, **kwargs)
-                values += response.json()["value"]
-                url = response.json().get("@odata.nextLink", None)
+                json_content = response.json()
+                values += json_content["value"]
+                url = json_content.get("@odata.nextLink", None)
                 if not url:
                     break
 
             # Add previous response values into the content bytes
-            json_content = response.json()
             json_content["value"] = values
             response._content = json.dumps(json_content).encode("utf-8")
 
@@ -789,6 +1471,73 @@ class GraphApi:
             msg += f" Token {self.token}."
             raise DataSafeHavenMicrosoftGraphError(msg) from exc
 
+    def is_group_member(self, user_id: str, group_id: str) -> bool:
+        """Check whether a user is a direct member of a group
+
+        Membership through nested groups does not count, as only direct members can be
+        removed from a group.
+
+        Returns:
+            bool: Whether the user is a direct member of the group
+
+        Raises:
+            DataSafeHavenMicrosoftGraphError if membership could not be checked
+        """
+        try:
+            members = self.find_objects(
+                f"groups/{group_id}/members",
+                f"id eq '{self.odata_escape(user_id)}'",
+                ["id"],
+            )
+            return any(member.get("id") == user_id for member in members)
+        except DataSafeHavenMicrosoftGraphError as exc:
+            msg = f"Could not check whether '{user_id}' is a member of '{group_id}'."
+            raise DataSafeHavenMicrosoftGraphError(msg) from exc
+
+    def iter_pages(
+        self, url: str, *, page_size: int | None = None, **kwargs: Any
+    ) -> Iterator[dict[str, Any]]:
+        """Make a paged HTTP GET request, yielding each page as it is received
+
+        Each page is parsed exactly once and the next page is only requested once the
+        caller has finished with the current one.
+
+        Args:
+            url: URL of the first page
+            page_size: number of values to request per page using '$top'
+
+        Returns:
+            Iterator[dict[str, Any]]: The JSON content of each page
+
+        Raises:
+            DataSafeHavenMicrosoftGraphError if any request failed
+        """
+        if page_size:
+            url += f"{'&' if '?' in url else '?'}$top={page_size}"
+        next_url: str | None = url
+        while next_url:
+            json_content = dict(self.http_get_single_page(next_url, **kwargs).json())
+            next_url = json_content.get("@odata.nextLink", None)
+            yield json_content
+
+    def iter_values(
+        self, url: str, *, page_size: int | None = None, **kwargs: Any
+    ) -> Iterator[dict[str, Any]]:
+        """Make a paged HTTP GET request, yielding each value as it is received
+
+        Args:
+            url: URL of the first page
+            page_size: number of values to request per page using '$top'
+
+        Returns:
+            Iterator[dict[str, Any]]: Each value from each page
+
+        Raises:
+            DataSafeHavenMicrosoftGraphError if any request failed
+        """
+        for page in self.iter_pages(url, page_size=page_size, **kwargs):
+            yield from page["value"]
+
     def http_patch(self, url: str, **kwargs: Any) -> requests.Response:
         """Make an HTTP PATCH request
 
@@ -799,12 +1548,7 @@ class GraphApi:
             DataSafeHavenMicrosoftGraphError if the request failed
         """
         try:
-            response = requests.patch(
-                url,
-                headers={"Authorization": f"Bearer {self.token}"},
-                timeout=120,
-                **kwargs,
-            )
+            response = self.http_request("PATCH", url, **kwargs)
             self.http_raise_for_status(response)
             return response
         except requests.exceptions.RequestException as exc:
@@ -823,16 +1567,8 @@ class GraphApi:
             DataSafeHavenMicrosoftGraphError if the request failed
         """
         try:
-            response = requests.post(
-                url,
-                headers={"Authorization": f"Bearer {self.token}"},
-                timeout=120,
-                **kwargs,
-            )
+            response = self.http_request("POST", url, **kwargs)
             self.http_raise_for_status(response)
-
-            # Wait for operation to complete before returning
-            time.sleep(30)
             return response
         except requests.exceptions.RequestException as exc:
             msg = f"Could not execute POST request to '{url}'."
@@ -840,6 +1576,84 @@ class GraphApi:
                 msg += f" Response content received: '{exc.response.content.decode()}'."
             raise DataSafeHavenMicrosoftGraphError(msg) from exc
 
+    def http_request(
+        self,
+        method: str,
+        url: str,
+        *,
+        max_retries: int | None = None,
+        retry_status_codes: Sequence[int] = (),
+        **kwargs: Any,
+    ) -> requests.Response:
+        """Make an HTTP request using the pooled session, retrying where appropriate
+
+        Throttled or unavailable responses are retried, waiting for the period given
+        by any 'Retry-After' header or otherwise using jittered exponential backoff.
+
+        Args:
+            method: HTTP method to use
+            url: URL to send the request to
+            max_retries: maximum number of retries, if fewer than the default
+            retry_status_codes: additional status codes that should be retried
+
+        Returns:
+            requests.Response: The final response from the remote server
+        """
+        if max_retries is None or max_retries > self.max_retries:
+            max_retries = self.max_retries
+        headers = {"Authorization": f"Bearer {self.token}"} | kwargs.pop("headers", {})
+        attempt = 0
+        while True:
+            start_time = time.monotonic()
+            response = self.session.request(
+                method, url, headers=headers, timeout=120, **kwargs
+            )
+            RequestMetrics.record(
+                "GraphApi",
+                duration=time.monotonic() - start_time,
+                status_code=response.status_code,
+                is_retry=attempt > 0,
+            )
+            if attempt >= max_retries or not self.http_is_retryable(
+                method,
+                response.status_code,
+                response.headers,
+                retry_status_codes=retry_status_codes,
+            ):
+                return response
+            delay = self.http_retry_delay(response, attempt)
+            self.logger.debug(
+                f"Received status {response.status_code} from [green]{url}[/]."
+                f" Retrying {method} request in {delay:.1f} seconds."
+            )
+            time.sleep(delay)
+            attempt += 1
+
+    def http_retry_delay(self, response: requests.Response, attempt: int) -> float:
+        """Calculate how long to wait before retrying a request
+
+        Returns:
+            float: The number of seconds to wait
+        """
+        # Use the server-provided delay if there is one
+        if retry_after := response.headers.get("Retry-After", None):
+            with suppress(ValueError):
+                return min(float(retry_after), self.backoff_max)
+            with suppress(TypeError, ValueError):
+                retry_time = email.utils.parsedate_to_datetime(retry_after)
+                seconds = (
+                    retry_time - datetime.datetime.now(datetime.UTC)
+                ).total_seconds()
+                return min(max(seconds, 0.0), self.backoff_max)
+        # Otherwise use exponential backoff with full jitter
+        backoff = min(self.backoff_base * 2**attempt, self.backoff_max)
+        return random.uniform(0, backoff)  # noqa: S311
+
+    @staticmethod
+    def odata_escape(value: str) -> str:
+        """Escape a string for use inside a quoted OData literal"""
+        return value.replace("'", "''")
+
     def read_applications(self) -> Sequence[dict[str, Any]]:
         """Get list of applications
 
@@ -850,12 +1664,11 @@ class GraphApi:
             DataSafeHavenMicrosoftGraphError if applications could not be loaded
         """
         try:
-            return [
-                dict(obj)
-                for obj in self.http_get(f"{self.base_endpoint}/applications").json()[
-                    "value"
-                ]
-            ]
+            return list(
+                self.iter_values(
+                    f"{self.base_endpoint}/applications", page_size=self.page_size
+                )
+            )
         except Exception as exc:
             msg = "Could not load list of applications."
             raise DataSafeHavenMicrosoftGraphError(msg) from exc
@@ -899,6 +1712,112 @@ class GraphApi:
             msg = "Could not load list of domains."
             raise DataSafeHavenMicrosoftGraphError(msg) from exc
 
+    def read_delta(
+        self, resource: str, attributes: Sequence[str]
+    ) -> Sequence[dict[str, Any]]:
+        """Get details of a collection of Entra objects using a delta query
+
+        A snapshot of the collection is stored in the config directory alongside the
+        delta link returned by Microsoft Graph. Subsequent calls only request the
+        changes since the last call and apply them to this snapshot.
+
+        See https://learn.microsoft.com/en-us/graph/delta-query-overview for details.
+
+        Args:
+            resource: the collection to query, either 'users' or 'groups'
+            attributes: the attributes to return for each object
+
+        Returns:
+            JSON: A JSON list of objects in the collection
+
+        Raises:
+            DataSafeHavenMicrosoftGraphError if the objects could not be loaded
+        """
+        snapshot_path = (
+            config_dir() / f".graph-delta-{self.credential.tenant_id}-{resource}.json"
+        )
+        select = ",".join(sorted(attributes))
+        objects: dict[str, dict[str, Any]] = {}
+        delta_link = None
+
+        # Load the snapshot if it was made recently with the same attributes
+        # Delta links for directory objects expire after seven days
+        with suppress(OSError, ValueError, KeyError):
+            with open(snapshot_path, encoding="utf-8") as f_snapshot:
+                snapshot = json.load(f_snapshot)
+            snapshot_age = time.time() - float(snapshot["timestamp"])
+            if (snapshot["select"] == select) and (snapshot_age < 6 * 24 * 60 * 60):
+                delta_link = str(snapshot["deltaLink"])
+                objects = dict(snapshot["objects"])
+            else:
+                # Snapshots contain personal details so are not kept once expired
+                snapshot_path.unlink(missing_ok=True)
+
+        def apply_changes(url: str) -> str:
+            """Apply each page of changes to the snapshot, returning the delta link"""
+            for page in self.iter_pages(url):
+                for obj in page["value"]:
+                    if "@removed" in obj:
+                        objects.pop(obj["id"], None)
+                    else:
+                        objects[obj["id"]] = objects.get(obj["id"], {}) | obj
+            return str(page["@odata.deltaLink"])
+
+        try:
+            # Request changes since the last snapshot, starting again if there is no
+            # valid delta link
+            next_delta_link = None
+            if delta_link:
+                with suppress(DataSafeHavenMicrosoftGraphError):
+                    next_delta_link = apply_changes(delta_link)
+            if not next_delta_link:
+                self.logger.debug(f"Loading all Entra {resource} using a delta query.")
+                objects.clear()
+                next_delta_link = apply_changes(
+                    f"{self.base_endpoint}/{resource}/delta?$select={select}"
+                )
+
+            # Write the new snapshot, which is only readable by the current user
+            write_private_file(
+                snapshot_path,
+                json.dumps(
+                    {
+                        "deltaLink": next_delta_link,
+                        "objects": objects,
+                        "select": select,
+                        "timestamp": time.time(),
+                    }
+                ),
+            )
+            return list(objects.values())
+        except (KeyError, OSError, DataSafeHavenMicrosoftGraphError) as exc:
+            with suppress(OSError):
+                snapshot_path.unlink(missing_ok=True)
+            msg = f"Could not load changes to Entra {resource}."
+            raise DataSafeHavenMicrosoftGraphError(msg) from exc
+
+    def read_directory_groups(self) -> Sequence[dict[str, Any]]:
+        """Get the attributes of all Entra groups needed for the directory index"""
+        return self.read_groups(attributes=["displayName", "id", "mailNickname"])
+
+    def read_directory_users(self) -> Sequence[dict[str, Any]]:
+        """Get the attributes of all Entra users needed for the directory index
+
+        Raises:
+            DataSafeHavenMicrosoftGraphError if users could not be loaded
+        """
+        try:
+            return list(
+                self.iter_values(
+                    f"{self.base_endpoint}/users"
+                    "?$select=displayName,id,mailNickname,userPrincipalName",
+                    page_size=self.page_size,
+                )
+            )
+        except Exception as exc:
+            msg = "Could not load list of users."
+            raise DataSafeHavenMicrosoftGraphError(msg) from exc
+
     def read_groups(
         self,
         attributes: Sequence[str] | None = None,
@@ -915,24 +1834,56 @@ class GraphApi:
             endpoint = f"{self.base_endpoint}/groups"
             if attributes:
                 endpoint += f"?$select={','.join(attributes)}"
-            return [dict(obj) for obj in self.http_get(endpoint).json()["value"]]
+            return list(self.iter_values(endpoint, page_size=self.page_size))
         except Exception as exc:
             msg = "Could not load list of groups."
             raise DataSafeHavenMicrosoftGraphError(msg) from exc
 
+    def read_groups_delta(
+        self,
+        attributes: Sequence[str] | None = None,
+    ) -> Sequence[dict[str, Any]]:
+        """Get details of Entra groups, only requesting changes since the last call
+
+        Returns:
+            JSON: A JSON list of Entra ID groups
+
+        Raises:
+            DataSafeHavenMicrosoftGraphError if groups could not be loaded
+        """
+        return self.read_delta(
+            "groups", attributes or ["description", "displayName", "id", "mailNickname"]
+        )
+
     def read_service_principals(self) -> Sequence[dict[str, Any]]:
         """Get list of service principals"""
         try:
-            return [
-                dict(obj)
-                for obj in self.http_get(
-                    f"{self.base_endpoint}/servicePrincipals"
-                ).json()["value"]
-            ]
+            return list(
+                self.iter_values(
+                    f"{self.base_endpoint}/servicePrincipals", page_size=self.page_size
+                )
+            )
         except Exception as exc:
             msg = "Could not load list of service principals."
             raise DataSafeHavenMicrosoftGraphError(msg) from exc
 
+    def read_global_administrator_ids(self) -> set[str]:
+        """Get the IDs of all members of the Global Administrator role
+
+        Returns:
+            set[str]: the object IDs of the Global Administrators
+
+        Raises:
+            DataSafeHavenMicrosoftGraphError if the role members could not be loaded
+        """
+        return {
+            admin["id"]
+            for admin in self.iter_values(
+                f"{self.base_endpoint}/directoryRoles/roleTemplateId="
+                f"{self.role_template_ids['Global Administrator']}/members"
+            )
+        }
+
     def read_users(
         self, attributes: Sequence[str] | None = None
     ) -> Sequence[dict[str, Any]]:
@@ -964,25 +1915,61 @@ class GraphApi:
                 "userPrincipalName",
             ]
         )
-        users: Sequence[dict[str, Any]]
         try:
             endpoint = f"{self.base_endpoint}/users"
             if attributes:
                 endpoint += f"?$select={','.join(attributes)}"
-            users = self.http_get(endpoint).json()["value"]
-            administrators = self.http_get(
-                f"{self.base_endpoint}/directoryRoles/roleTemplateId="
-                f"{self.role_template_ids['Global Administrator']}/members"
-            ).json()["value"]
-            for user in users:
-                user["isGlobalAdmin"] = any(
-                    user["id"] == admin["id"] for admin in administrators
-                )
+            administrator_ids = self.read_global_administrator_ids()
+            users = []
+            for user in self.iter_values(endpoint, page_size=self.page_size):
+                user["isGlobalAdmin"] = user["id"] in administrator_ids
+                users.append(user)
             return users
         except Exception as exc:
             msg = "Could not load list of users."
             raise DataSafeHavenMicrosoftGraphError(msg) from exc
 
+    def read_users_delta(
+        self, attributes: Sequence[str] | None = None
+    ) -> Sequence[dict[str, Any]]:
+        """Get details of Entra users, only requesting changes since the last call
+
+        Returns:
+            JSON: A JSON list of Entra users
+
+        Raises:
+            DataSafeHavenMicrosoftGraphError if users could not be loaded
+        """
+        users = self.read_delta(
+            "users",
+            attributes
+            or [
+                "accountEnabled",
+                "businessPhones",
+                "displayName",
+                "givenName",
+                "id",
+                "mail",
+                "mailNickname",
+                "mobilePhone",
+                "onPremisesSamAccountName",
+                "onPremisesSyncEnabled",
+                "surname",
+                "telephoneNumber",
+                "userPrincipalName",
+            ],
+        )
+        # Role membership is not part of the user objects returned by a delta query,
+        # so administrators are looked up again after the changes are applied
+        try:
+            administrator_ids = self.read_global_administrator_ids()
+        except Exception as exc:
+            msg = "Could not load list of users."
+            raise DataSafeHavenMicrosoftGraphError(msg) from exc
+        return [
+            user | {"isGlobalAdmin": user["id"] in administrator_ids} for user in users
+        ]
+
     def remove_user(
         self,
         username: str,
@@ -998,6 +1985,7 @@ class GraphApi:
             self.http_delete(
                 f"{self.base_endpoint}/users/{user_id}",
             )
+            self.directory.invalidate("users")
             return
         except Exception as exc:
             msg = f"Could not remove user '{username}'."
@@ -1016,14 +2004,8 @@ class GraphApi:
         try:
             user_id = self.get_id_from_username(username)
             group_id = self.get_id_from_groupname(group_name)
-            # Check whether user is in group
-            json_response = self.http_get(
-                f"{self.base_endpoint}/groups/{group_id}/members",
-            ).json()
             # Remove user from group if it is a member
-            if user_id in (
-                group_member["id"] for group_member in json_response["value"]
-            ):
+            if user_id and group_id and self.is_group_member(user_id, group_id):
                 self.http_delete(
                     f"{self.base_endpoint}/groups/{group_id}/members/{user_id}/$ref",
                 )
@@ -1038,6 +2020,108 @@ class GraphApi:
             msg = f"Could not remove user '{username}' from group '{group_name}'."
             raise DataSafeHavenMicrosoftGraphError(msg) from exc
 
+    def remove_users(self, usernames: Sequence[str], *, workers: int = 1) -> None:
+        """Remove several users from Entra ID using a pool of worker threads
+
+        Raises:
+            DataSafeHavenMicrosoftGraphError if any user could not be removed
+        """
+        self.run_concurrently(
+            self.remove_user,
+            {username: (username,) for username in usernames},
+            "remove users",
+            workers=workers,
+        )
+
+    def remove_users_from_group(
+        self,
+        usernames: Sequence[str],
+        group_name: str,
+    ) -> None:
+        """Remove several users from an Entra group using batched requests
+
+        Raises:
+            DataSafeHavenMicrosoftGraphError if any user could not be removed
+        """
+        try:
+            if not usernames:
+                return
+            group_id = self.get_id_from_groupname(group_name)
+            if not group_id:
+                msg = f"Could not find group '{group_name}'."
+                raise DataSafeHavenMicrosoftGraphError(msg)
+            user_ids = self.get_ids_from_usernames(usernames)
+            responses = self.http_batch(
+                [
+                    {
+                        "id": username,
+                        "method": "DELETE",
+                        "url": f"/groups/{group_id}/members/{user_id}/$ref",
+                    }
+                    for username, user_id in user_ids.items()
+                    if user_id
+                ]
+            )
+            failed_usernames = []
+            for username in usernames:
+                response = responses.get(username, None)
+                if response and self.http_is_success(response["status"]):
+                    self.logger.info(
+                        f"Removed [green]'{username}'[/] from group [green]'{group_name}'[/]."
+                    )
+                elif not response or response["status"] == requests.codes.NOT_FOUND:
+                    self.logger.info(
+                        f"User [green]'{username}'[/] does not belong to group [green]'{group_name}'[/]."
+                    )
+                else:
+                    failed_usernames.append(username)
+            if failed_usernames:
+                msg = f"Could not remove users {failed_usernames}."
+                raise DataSafeHavenMicrosoftGraphError(msg)
+        except DataSafeHavenMicrosoftGraphError as exc:
+            msg = f"Could not remove users from group '{group_name}'."
+            raise DataSafeHavenMicrosoftGraphError(msg) from exc
+
+    def run_concurrently(
+        self,
+        func: Callable[..., Any],
+        arguments: dict[str, tuple[Any, ...]],
+        description: str,
+        *,
+        workers: int = 1,
+    ) -> None:
+        """Run a GraphApi method for several sets of arguments in worker threads
+
+        Every call is attempted. Each failure has already been logged by the error that
+        it raised, so failures are only collected here.
+
+        Args:
+            func: the GraphApi method to run
+            arguments: map of a name for each call to the arguments for that call
+            description: what the method does, used in error messages
+            workers: the number of calls to make at the same time
+
+        Raises:
+            DataSafeHavenMicrosoftGraphError if any of the calls failed
+        """
+        # Ensure that any interactive authentication happens before starting threads
+        _ = self.token
+        with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+            futures = {
+                name: executor.submit(copy_context().run, func, *args)
+                for name, args in arguments.items()
+            }
+        failures = {
+            name: exc
+            for name, future in futures.items()
+            if (exc := future.exception()) is not None
+        }
+        if failures:
+            msg = f"Could not {description} for {list(failures)}."
+            raise DataSafeHavenMicrosoftGraphError(msg) from next(
+                iter(failures.values())
+            )
+
     def verify_custom_domain(
         self, domain_name: str, expected_nameservers: Sequence[str]
     ) -> None:
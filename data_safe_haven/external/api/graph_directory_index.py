@@ -0,0 +1,83 @@
+"""In-process index of Entra ID directory objects"""
+
+import time
+from collections.abc import Callable, Sequence
+from threading import Lock
+from typing import Any, ClassVar
+
+
+class GraphDirectoryIndex:
+    """
+    Index of Entra ID users and groups keyed by their names
+
+    Each kind of object is loaded in full on first use and indexed by several
+    attributes, so that subsequent lookups by name do not need to contact Microsoft
+    Graph. An index is reloaded once it is older than its time-to-live or after it
+    has been explicitly invalidated.
+    """
+
+    index_keys: ClassVar[dict[str, tuple[str, ...]]] = {
+        "groups": ("displayName", "mailNickname"),
+        "users": ("displayName", "mailNickname", "userPrincipalName", "username"),
+    }
+
+    def __init__(self, ttl: float = 300) -> None:
+        self.ttl = ttl
+        self._indices: dict[str, dict[str, dict[str, dict[str, Any]]]] = {}
+        self._load_times: dict[str, float] = {}
+        self._lock = Lock()
+
+    def invalidate(self, kind: str | None = None) -> None:
+        """Discard the index for one kind of object, or for all of them"""
+        with self._lock:
+            for kind_ in [kind] if kind else list(self._indices.keys()):
+                self._indices.pop(kind_, None)
+                self._load_times.pop(kind_, None)
+
+    def is_fresh(self, kind: str) -> bool:
+        """Whether an index is loaded and has not yet expired"""
+        load_time = self._load_times.get(kind, None)
+        return (load_time is not None) and (time.monotonic() - load_time < self.ttl)
+
+    def lookup(
+        self,
+        kind: str,
+        key: str,
+        value: str,
+        loader: Callable[[], Sequence[dict[str, Any]]],
+    ) -> dict[str, Any] | None:
+        """
+        Find an object of a given kind with a particular attribute value
+
+        Args:
+            kind: the kind of object, either 'groups' or 'users'
+            key: the attribute to match against
+            value: the value of the attribute
+            loader: function that returns all objects of this kind
+
+        Returns:
+            dict[str, Any] | None: the matching object, or None if there is no match
+        """
+        with self._lock:
+            if not self.is_fresh(kind):
+                self._indices[kind] = self.build(kind, loader())
+                self._load_times[kind] = time.monotonic()
+            return self._indices[kind][key].get(value, None)
+
+    def build(
+        self, kind: str, objects: Sequence[dict[str, Any]]
+    ) -> dict[str, dict[str, dict[str, Any]]]:
+        """Construct dictionaries mapping each attribute value to its object"""
+        index: dict[str, dict[str, dict[str, Any]]] = {
+            key: {} for key in self.index_keys[kind]
+        }
+        for obj in objects:
+            # Usernames are the local part of the user principal name
+            attributes = dict(obj)
+            if user_principal_name := obj.get("userPrincipalName", None):
+                attributes["username"] = str(user_principal_name).split("@")[0]
+            for key in self.index_keys[kind]:
+                if value := attributes.get(key, None):
+                    # Keep the first object when several share an attribute value
+                    index[key].setdefault(str(value), obj)
+        return index
@@ -0,0 +1,202 @@
+"""Latency and throttling metrics for requests to remote APIs"""
+
+import functools
+import inspect
+import json
+import os
+import pathlib
+import sys
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager, suppress
+from contextvars import ContextVar
+from datetime import UTC, datetime
+from threading import Lock
+from typing import Any, ClassVar, TypeVar
+
+from azure.core.pipeline import PipelineRequest, PipelineResponse
+from azure.core.pipeline.policies import SansIOHTTPPolicy
+
+from data_safe_haven import console
+from data_safe_haven.directories import log_dir, write_private_file
+
+T = TypeVar("T")
+
+
+class RequestMetrics:
+    """
+    Collect request statistics for each logical operation
+
+    An operation is a public method of an instrumented class, such as
+    'GraphApi.create_user'. Every HTTP request made while that method is running,
+    including any retries, is attributed to it.
+    """
+
+    # Upper bounds in seconds of each bin of the latency histogram
+    latency_bins: ClassVar[tuple[float, ...]] = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+    operation_: ClassVar[ContextVar[str | None]] = ContextVar("operation", default=None)
+    operations_: ClassVar[dict[str, dict[str, Any]]] = {}
+    lock_: ClassVar[Lock] = Lock()
+
+    @classmethod
+    def instrument(cls, service: str) -> Callable[[type[T]], type[T]]:
+        """Class decorator that attributes requests to the public method making them"""
+
+        def decorator(instrumented_cls: type[T]) -> type[T]:
+            for name, method in list(vars(instrumented_cls).items()):
+                if inspect.isfunction(method) and not name.startswith("_"):
+                    setattr(
+                        instrumented_cls, name, cls.wrap(f"{service}.{name}", method)
+                    )
+            return instrumented_cls
+
+        return decorator
+
+    @classmethod
+    def wrap(cls, operation: str, method: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(method)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with cls.operation(operation):
+                return method(*args, **kwargs)
+
+        return wrapper
+
+    @classmethod
+    @contextmanager
+    def operation(cls, name: str) -> Iterator[None]:
+        """Attribute requests to an operation unless an outer operation is active"""
+        if cls.operation_.get():
+            yield
+            return
+        token = cls.operation_.set(name)
+        try:
+            yield
+        finally:
+            cls.operation_.reset(token)
+
+    @classmethod
+    def record(
+        cls,
+        service: str,
+        *,
+        duration: float,
+        status_code: int,
+        is_retry: bool,
+    ) -> None:
+        """Record a single HTTP request"""
+        operation = cls.operation_.get() or f"{service}.<other>"
+        with cls.lock_:
+            metrics = cls.operations_.setdefault(
+                operation,
+                {
+                    "requests": 0,
+                    "retries": 0,
+                    "throttled": 0,
+                    "latency_total": 0.0,
+                    "latency_max": 0.0,
+                    "latency_histogram": [0] * (len(cls.latency_bins) + 1),
+                    "status_codes": {},
+                },
+            )
+            metrics["requests"] += 1
+            metrics["retries"] += int(is_retry)
+            metrics["throttled"] += int(status_code == 429)  # noqa: PLR2004
+            metrics["latency_total"] += duration
+            metrics["latency_max"] = max(metrics["latency_max"], duration)
+            metrics["latency_histogram"][
+                next(
+                    (
+                        idx
+                        for idx, upper in enumerate(cls.latency_bins)
+                        if duration <= upper
+                    ),
+                    len(cls.latency_bins),
+                )
+            ] += 1
+            metrics["status_codes"][str(status_code)] = (
+                metrics["status_codes"].get(str(status_code), 0) + 1
+            )
+
+    @classmethod
+    def reset(cls) -> None:
+        with cls.lock_:
+            cls.operations_.clear()
+
+    @classmethod
+    def report(cls, *, show_table: bool) -> None:
+        """Write recorded metrics next to the log file and optionally display them"""
+        if not cls.operations_:
+            return
+        cls.write(log_dir() / f"{datetime.now(UTC).date()}.metrics.jsonl")
+        if show_table:
+            console.tabulate(
+                [
+                    "Operation",
+                    "Requests",
+                    "Retries",
+                    "Throttled",
+                    "Mean latency (s)",
+                    "Max latency (s)",
+                    "Status codes",
+                ],
+                [
+                    [
+                        operation,
+                        str(metrics["requests"]),
+                        str(metrics["retries"]),
+                        str(metrics["throttled"]),
+                        f"{metrics['latency_total'] / metrics['requests']:.2f}",
+                        f"{metrics['latency_max']:.2f}",
+                        ", ".join(
+                            f"{code}: {count}"
+                            for code, count in sorted(metrics["status_codes"].items())
+                        ),
+                    ]
+                    for operation, metrics in sorted(cls.operations_.items())
+                ],
+            )
+
+    @classmethod
+    def write(cls, path: pathlib.Path) -> None:
+        """
+        Append metrics for this command to a JSON lines file
+
+        Each run is added as a single line. The command line may contain identifiers
+        for users and resources, so the file is only readable by the current user.
+        """
+        line = json.dumps(
+            {
+                "command": " ".join(sys.argv[1:]),
+                "latency_bins": list(cls.latency_bins),
+                "operations": cls.operations_,
+                "pid": os.getpid(),
+                "timestamp": datetime.now(UTC).isoformat(),
+            }
+        )
+        existing = ""
+        with suppress(FileNotFoundError):
+            existing = path.read_text(encoding="utf-8")
+        write_private_file(path, f"{existing}{line}\n")
+
+
+class RequestMetricsPolicy(SansIOHTTPPolicy):  # type: ignore[type-arg]
+    """Azure SDK pipeline policy that records each request attempt"""
+
+    def __init__(self, service: str) -> None:
+        self.service = service
+
+    def on_request(self, request: PipelineRequest) -> None:  # type: ignore[type-arg]
+        request.context["dsh_attempts"] = request.context.get("dsh_attempts", 0) + 1
+        request.context["dsh_start"] = time.monotonic()
+
+    def on_response(
+        self,
+        request: PipelineRequest,  # type: ignore[type-arg]
+        response: PipelineResponse,  # type: ignore[type-arg]
+    ) -> None:
+        RequestMetrics.record(
+            self.service,
+            duration=time.monotonic() - request.context["dsh_start"],
+            status_code=response.http_response.status_code,
+            is_retry=request.context["dsh_attempts"] > 1,
+        )
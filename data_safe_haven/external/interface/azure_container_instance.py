@@ -1,8 +1,6 @@
 import contextlib
-import time
 
 import websocket
-from azure.core.polling import LROPoller
 from azure.mgmt.containerinstance import ContainerInstanceManagementClient
 from azure.mgmt.containerinstance.models import (
     ContainerExecRequest,
@@ -10,7 +8,7 @@ from azure.mgmt.containerinstance.models import (
 )
 
 from data_safe_haven.exceptions import DataSafeHavenAzureError
-from data_safe_haven.external import AzureSdk
+from data_safe_haven.external import AzureLROWaiter, AzureSdk
 from data_safe_haven.logging import get_logger
 
 
@@ -28,16 +26,9 @@ class AzureContainerInstance:
         self.resource_group_name = resource_group_name
         self.container_group_name = container_group_name
 
-    @staticmethod
-    def wait(poller: LROPoller[None]) -> None:
-        while not poller.done():
-            time.sleep(10)
-
     @property
     def current_ip_address(self) -> str:
-        aci_client = ContainerInstanceManagementClient(
-            self.azure_sdk.credential(), self.azure_sdk.subscription_id
-        )
+        aci_client = self.azure_sdk.management_client(ContainerInstanceManagementClient)
         ip_address = aci_client.container_groups.get(
             self.resource_group_name, self.container_group_name
         ).ip_address
@@ -50,8 +41,8 @@ class AzureContainerInstance:
         """Restart the container group"""
         # Connect to Azure clients
         try:
-            aci_client = ContainerInstanceManagementClient(
-                self.azure_sdk.credential(), self.azure_sdk.subscription_id
+            aci_client = self.azure_sdk.management_client(
+                ContainerInstanceManagementClient
             )
             if not target_ip_address:
                 target_ip_address = self.current_ip_address
@@ -68,13 +59,13 @@ class AzureContainerInstance:
                     ).provisioning_state
                     == "Succeeded"
                 ):
-                    self.wait(
+                    AzureLROWaiter().wait(
                         aci_client.container_groups.begin_restart(
                             self.resource_group_name, self.container_group_name
                         )
                     )
                 else:
-                    self.wait(
+                    AzureLROWaiter().wait(
                         aci_client.container_groups.begin_start(
                             self.resource_group_name, self.container_group_name
                         )
@@ -97,9 +88,7 @@ class AzureContainerInstance:
         The most likely use-case is running a script already present in the container.
         """
         # Connect to Azure clients
-        aci_client = ContainerInstanceManagementClient(
-            self.azure_sdk.credential(), self.azure_sdk.subscription_id
-        )
+        aci_client = self.azure_sdk.management_client(ContainerInstanceManagementClient)
 
         # Run command
         cnxn = aci_client.containers.execute_command(
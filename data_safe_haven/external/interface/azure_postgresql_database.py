@@ -5,12 +5,11 @@ from collections.abc import Sequence
 from typing import Any, cast
 
 import psycopg
-from azure.core.polling import LROPoller
 from azure.mgmt.rdbms.postgresql_flexibleservers import PostgreSQLManagementClient
 from azure.mgmt.rdbms.postgresql_flexibleservers.models import FirewallRule, Server
 
 from data_safe_haven.exceptions import DataSafeHavenAzureError, DataSafeHavenValueError
-from data_safe_haven.external import AzureSdk
+from data_safe_haven.external import AzureLROWaiter, AzureSdk
 from data_safe_haven.functions import current_ip_address
 from data_safe_haven.logging import get_logger
 from data_safe_haven.types import PathType
@@ -51,12 +50,6 @@ class AzurePostgreSQLDatabase:
             r"%Y%m%d-%H%M%S"
         )
 
-    @staticmethod
-    def wait(poller: LROPoller[Any]) -> None:
-        """Wait for a polling operation to finish."""
-        while not poller.done():
-            time.sleep(10)
-
     @property
     def connection_string(self) -> str:
         return " ".join(
@@ -74,8 +67,8 @@ class AzurePostgreSQLDatabase:
     def db_client(self) -> PostgreSQLManagementClient:
         """Get the database client."""
         if not self.db_client_:
-            self.db_client_ = PostgreSQLManagementClient(
-                self.azure_sdk.credential(), self.azure_sdk.subscription_id
+            self.db_client_ = self.azure_sdk.management_client(
+                PostgreSQLManagementClient
             )
         return self.db_client_
 
@@ -170,7 +163,7 @@ class AzurePostgreSQLDatabase:
             )
             # NB. We would like to enable public_network_access at this point but this
             # is not currently supported by the flexibleServer API
-            self.wait(
+            AzureLROWaiter().wait(
                 self.db_client.firewall_rules.begin_create_or_update(
                     self.resource_group_name,
                     self.server_name,
@@ -197,14 +190,16 @@ class AzurePostgreSQLDatabase:
                 )
             ]
 
-            # Delete all named firewall rules
+            # Delete all named firewall rules at the same time
             rule_names = [str(rule.name) for rule in rules if rule.name]
-            for rule_name in rule_names:
-                self.wait(
+            AzureLROWaiter().wait(
+                *[
                     self.db_client.firewall_rules.begin_delete(
                         self.resource_group_name, self.server_name, rule_name
                     )
-                )
+                    for rule_name in rule_names
+                ]
+            )
 
             # NB. We would like to disable public_network_access at this point but this
             # is not currently supported by the flexibleServer API
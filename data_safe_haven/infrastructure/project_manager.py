@@ -1,13 +1,19 @@
 """Manage Pulumi projects"""
 
+import hashlib
+import json
 import logging
+import pathlib
 import time
-from contextlib import suppress
+from collections.abc import Iterator
+from contextlib import contextmanager, suppress
+from functools import cache
 from importlib import metadata
-from typing import Any
+from typing import Any, ClassVar
 
 from pulumi import automation
 
+from data_safe_haven import __version__
 from data_safe_haven.config import (
     Context,
     DSHPulumiConfig,
@@ -23,6 +29,7 @@ from data_safe_haven.exceptions import (
 from data_safe_haven.external import AzureSdk, PulumiAccount
 from data_safe_haven.functions import get_key_vault_name, replace_separators
 from data_safe_haven.logging import from_ansi, get_console_handler, get_logger
+from data_safe_haven.resources import resources_path
 
 from .programs import DeclarativeSRE
 
@@ -37,6 +44,11 @@ class ProjectManager:
     including `pulumi up` and `pulumi destroy`.
     """
 
+    # Number of resource operations run at once by refresh and preview when no
+    # parallelism is configured. These have deadlocked when run in parallel, so only
+    # use more when the user asks for it. Update and destroy are unbounded by default.
+    default_parallelism: ClassVar[int] = 1
+
     def __init__(
         self,
         context: Context,
@@ -45,6 +57,7 @@ class ProjectManager:
         program: DeclarativeSRE,
         *,
         create_project: bool,
+        parallelism: int | None = None,
     ) -> None:
         self._options: dict[str, tuple[str, bool, bool]] = {}
         self._pulumi_project: DSHPulumiProject | None = None
@@ -58,6 +71,7 @@ class ProjectManager:
         self.context = context
         self.create_project = create_project
         self.logger = get_logger()
+        self.parallelism = parallelism or context.pulumi_parallelism
         self.program = program
         self.project_name = replace_separators(context.tags["project"].lower(), "-")
         self.pulumi_config = pulumi_config
@@ -182,7 +196,10 @@ class ProjectManager:
     def cleanup(self) -> None:
         """Cleanup deployed infrastructure."""
         try:
-            azure_sdk = AzureSdk(self.context.subscription_name)
+            azure_sdk = AzureSdk(
+                self.context.subscription_name,
+                entra_storage_auth=self.context.entra_storage_auth,
+            )
             # Remove stack JSON
             try:
                 self.logger.debug(f"Removing Pulumi stack [green]{self.stack_name}[/].")
@@ -238,30 +255,73 @@ class ProjectManager:
             msg = "Pulumi destroy failed."
             raise DataSafeHavenPulumiError(msg) from exc
 
-    def deploy(self, *, force: bool = False) -> None:
-        """Deploy the infrastructure with Pulumi."""
+    def deploy(
+        self, *, fast: bool = False, force: bool = False, preview: bool = True
+    ) -> None:
+        """
+        Deploy the infrastructure with Pulumi.
+
+        In fast mode, refresh and preview are skipped if nothing has changed since the
+        last successful deployment and the stack has not been modified since then.
+        """
         try:
             self.apply_config_options()
             if force:
                 self.cancel()
-            self.refresh()
-            self.preview()
+            fingerprint = self.deploy_fingerprint()
+            if (
+                fast
+                and not force
+                and self.pulumi_project.deploy_fingerprint == fingerprint
+                and self.last_update_succeeded()
+            ):
+                self.logger.info(
+                    f"Stack [green]{self.stack_name}[/] is unchanged since its last deployment, skipping refresh and preview."
+                )
+            else:
+                self.refresh()
+                if preview:
+                    self.preview()
             self.update()
+            self.pulumi_project.deploy_fingerprint = self.deploy_fingerprint()
         except Exception as exc:
             msg = "Pulumi deployment failed."
             raise DataSafeHavenPulumiError(msg) from exc
 
+    def deploy_fingerprint(self) -> str:
+        """
+        Fingerprint of the inputs to a deployment
+
+        This combines the stack config, the SRE config, the package version and the
+        files that resources are rendered from.
+        """
+        fingerprint = hashlib.sha256()
+        fingerprint.update(__version__.encode("utf-8"))
+        fingerprint.update(
+            json.dumps(
+                self.pulumi_project.stack_config, default=str, sort_keys=True
+            ).encode("utf-8")
+        )
+        fingerprint.update(self.program.config.to_yaml().encode("utf-8"))
+        fingerprint.update(source_fingerprint().encode("utf-8"))
+        return fingerprint.hexdigest()
+
     def destroy(self) -> None:
         """Destroy deployed infrastructure."""
         try:
+            # Forget cached outputs, as a failed destroy may still remove resources
+            self.update_stack_outputs(None, None)
             # Note that the first iteration can fail due to failure to delete container NICs
             # See https://github.com/MicrosoftDocs/azure-docs/issues/20737 for details
             while True:
                 try:
-                    result = self.stack.destroy(
-                        **self.pulumi_extra_args,
-                    )
+                    with self.timed("Destroying", self.parallelism):
+                        result = self.stack.destroy(
+                            parallel=self.parallelism,
+                            **self.pulumi_extra_args,
+                        )
                     self.evaluate(result.summary.result)
+                    self.update_stack_outputs({}, None)
                     break
                 except automation.CommandError as exc:
                     if any(
@@ -308,6 +368,17 @@ class ProjectManager:
             msg = "Installing Pulumi plugins failed.."
             raise DataSafeHavenPulumiError(msg) from exc
 
+    def last_update_succeeded(self) -> bool:
+        """Whether the most recent operation on the stack was a successful update"""
+        with suppress(automation.CommandError):
+            history = self.stack.history(page_size=1)
+            return bool(
+                history
+                and history[0].kind == "update"
+                and history[0].result == "succeeded"
+            )
+        return False
+
     def log_exception(self, exc: automation.CommandError) -> None:
         with suppress(IndexError):
             stderr = str(exc).split("\n")[3].replace(" stderr: ", "")
@@ -317,8 +388,21 @@ class ProjectManager:
         return from_ansi(self.logger, message)
 
     def output(self, name: str) -> Any:
-        """Get a named output value from a stack"""
-        if not self._stack_outputs:
+        """
+        Get a named output value from a stack
+
+        Outputs cached by the last successful update are used where possible, so that
+        reading them does not need a Pulumi workspace. Every other operation that can
+        change the stack clears this cache before it runs, so the recorded version is
+        trusted without checking the stack history.
+        """
+        if (
+            self._stack_outputs is None
+            and self.pulumi_project.stack_outputs_version is not None
+            and name in self.pulumi_project.stack_outputs
+        ):
+            return self.pulumi_project.stack_outputs[name]
+        if self._stack_outputs is None:
             self._stack_outputs = self.stack.outputs()
         return self._stack_outputs[name].value
 
@@ -328,11 +412,14 @@ class ProjectManager:
             self.logger.info(
                 f"Previewing changes for stack [green]{self.stack.name}[/]."
             )
-            with suppress(automation.CommandError):
-                # Note that we disable parallelisation which can cause deadlock
+            parallelism = self.parallelism or self.default_parallelism
+            with (
+                suppress(automation.CommandError),
+                self.timed("Previewing", parallelism),
+            ):
                 self.stack.preview(
                     diff=True,
-                    parallel=1,
+                    parallel=parallelism,
                     **self.pulumi_extra_args,
                 )
         except Exception as exc:
@@ -343,8 +430,9 @@ class ProjectManager:
         """Refresh the Pulumi stack."""
         try:
             self.logger.info(f"Refreshing stack [green]{self.stack.name}[/].")
-            # Note that we disable parallelisation which can cause deadlock
-            self.stack.refresh(parallel=1, **self.pulumi_extra_args)
+            parallelism = self.parallelism or self.default_parallelism
+            with self.timed("Refreshing", parallelism):
+                self.stack.refresh(parallel=parallelism, **self.pulumi_extra_args)
         except automation.CommandError as exc:
             self.log_exception(exc)
             msg = "Pulumi refresh failed."
@@ -353,6 +441,8 @@ class ProjectManager:
     def run_pulumi_command(self, command: str) -> str:
         """Run a Pulumi non-interactive CLI command using this project and stack."""
         try:
+            # Arbitrary commands may change the stack outputs, even if they fail
+            self.update_stack_outputs(None, None)
             result = self.stack._run_pulumi_cmd_sync(command.split())
             return str(result.stdout)
         except automation.CommandError as exc:
@@ -387,15 +477,32 @@ class ProjectManager:
             msg = "Tearing down Pulumi infrastructure failed.."
             raise DataSafeHavenPulumiError(msg) from exc
 
+    @contextmanager
+    def timed(self, operation: str, parallelism: int | None) -> Iterator[None]:
+        """Log how long a Pulumi operation takes at a given level of parallelism"""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.logger.info(
+                f"{operation} stack [green]{self.stack_name}[/] took {time.monotonic() - start:.0f} seconds"
+                f" with parallelism [green]{parallelism or 'unbounded'}[/]."
+            )
+
     def update(self) -> None:
         """Update deployed infrastructure."""
         try:
             self.logger.info(f"Applying changes to stack [green]{self.stack.name}[/].")
-            result = self.stack.up(
-                **self.pulumi_extra_args,
-            )
+            # Forget cached outputs unless this update succeeds
+            self.update_stack_outputs(None, None)
+            with self.timed("Updating", self.parallelism):
+                result = self.stack.up(
+                    parallel=self.parallelism,
+                    **self.pulumi_extra_args,
+                )
             self.evaluate(result.summary.result)
             self.update_dsh_pulumi_project()
+            self.update_stack_outputs(result.outputs, result.summary.version)
         except automation.CommandError as exc:
             self.log_exception(exc)
             msg = "Pulumi update failed."
@@ -408,6 +515,18 @@ class ProjectManager:
         }
         self.pulumi_project.stack_config = all_config_dict
 
+    def update_stack_outputs(
+        self, outputs: automation.OutputMap | None, version: int | None
+    ) -> None:
+        """Cache non-secret stack outputs in the DSHPulumiProject object"""
+        self._stack_outputs = outputs
+        self.pulumi_project.stack_outputs = {
+            name: item.value
+            for name, item in (outputs or {}).items()
+            if not item.secret
+        }
+        self.pulumi_project.stack_outputs_version = version
+
     def update_dsh_pulumi_encrypted_key(self, workspace: automation.Workspace) -> None:
         """Update encrypted key in the DSHPulumiProject object"""
         stack_key = workspace.stack_settings(stack_name=self.stack_name).encrypted_key
@@ -419,6 +538,19 @@ class ProjectManager:
             raise DataSafeHavenPulumiError(msg)
 
 
+@cache
+def source_fingerprint() -> str:
+    """Fingerprint of the resource files and the infrastructure code that renders them"""
+    fingerprint = hashlib.sha256()
+    infrastructure_path = pathlib.Path(__file__).parent.resolve()
+    for root in (resources_path, infrastructure_path):
+        for path in sorted(root.rglob("*")):
+            if path.is_file() and "__pycache__" not in path.parts:
+                fingerprint.update(str(path.relative_to(root)).encode("utf-8"))
+                fingerprint.update(path.read_bytes())
+    return fingerprint.hexdigest()
+
+
 class SREProjectManager(ProjectManager):
     """Interact with an SRE using Pulumi"""
 
@@ -430,6 +562,7 @@ class SREProjectManager(ProjectManager):
         *,
         create_project: bool = False,
         graph_api_token: str | None = None,
+        parallelism: int | None = None,
     ) -> None:
         """Constructor"""
         token = graph_api_token or ""
@@ -439,4 +572,5 @@ class SREProjectManager(ProjectManager):
             config.name,
             DeclarativeSRE(context, config, token),
             create_project=create_project,
+            parallelism=parallelism,
         )
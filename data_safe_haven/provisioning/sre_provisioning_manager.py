@@ -73,8 +73,10 @@ class SREProvisioningManager:
 
     def create_security_groups(self) -> None:
         """Create groups in Entra ID"""
-        for group_name in self.security_group_params.values():
-            self.graph_api.create_group(group_name)
+        self.graph_api.create_groups(
+            list(self.security_group_params.values()),
+            workers=len(self.security_group_params),
+        )
 
     def restart_remote_desktop_containers(self) -> None:
         """Restart the Guacamole container group"""
@@ -1,5 +1,6 @@
 """A YAMLSerialisableModel that can be serialised to and from Azure"""
 
+from contextlib import suppress
 from typing import Any, ClassVar, TypeVar
 
 from data_safe_haven.exceptions import (
@@ -7,7 +8,7 @@ from data_safe_haven.exceptions import (
     DataSafeHavenAzureStorageError,
     DataSafeHavenError,
 )
-from data_safe_haven.external import AzureSdk
+from data_safe_haven.external import AzureBlobCache, AzureSdk
 
 from .context_base import ContextBase
 from .yaml_serialisable_model import YAMLSerialisableModel
@@ -33,7 +34,10 @@ class AzureSerialisableModel(YAMLSerialisableModel):
             DataSafeHavenAzureStorageError: if the storage account does not exist
         """
         try:
-            azure_sdk = AzureSdk(subscription_name=context.subscription_name)
+            azure_sdk = AzureSdk(
+                subscription_name=context.subscription_name,
+                entra_storage_auth=context.entra_storage_auth,
+            )
             config_yaml = azure_sdk.download_blob(
                 filename or cls.default_filename,
                 context.resource_group_name,
@@ -56,6 +60,14 @@ class AzureSerialisableModel(YAMLSerialisableModel):
         Construct an AzureSerialisableModel from a YAML file in Azure storage, or from
         default arguments if no such file exists.
         """
+        # A cached copy can be revalidated without first checking that the file exists
+        if AzureBlobCache.read(
+            context.storage_account_name,
+            context.storage_container_name,
+            cls.default_filename,
+        ):
+            with suppress(DataSafeHavenAzureError):
+                return cls.from_remote(context)
         if cls.remote_exists(context):
             return cls.from_remote(context)
         else:
@@ -66,8 +78,14 @@ class AzureSerialisableModel(YAMLSerialisableModel):
         cls: type[T], context: ContextBase, *, filename: str | None = None
     ) -> bool:
         """Check whether a remote instance of this model exists."""
-        azure_sdk = AzureSdk(subscription_name=context.subscription_name)
-        if azure_sdk.storage_exists(context.storage_account_name):
+        azure_sdk = AzureSdk(
+            subscription_name=context.subscription_name,
+            entra_storage_auth=context.entra_storage_auth,
+        )
+        if azure_sdk.storage_exists(
+            context.storage_account_name,
+            resource_group_name=context.resource_group_name,
+        ):
             return azure_sdk.blob_exists(
                 filename or cls.default_filename,
                 context.resource_group_name,
@@ -91,7 +109,10 @@ class AzureSerialisableModel(YAMLSerialisableModel):
 
     def upload(self: T, context: ContextBase, *, filename: str | None = None) -> None:
         """Serialise an AzureSerialisableModel to a YAML file in Azure storage."""
-        azure_sdk = AzureSdk(subscription_name=context.subscription_name)
+        azure_sdk = AzureSdk(
+            subscription_name=context.subscription_name,
+            entra_storage_auth=context.entra_storage_auth,
+        )
         azure_sdk.upload_blob(
             self.to_yaml(),
             filename or self.default_filename,
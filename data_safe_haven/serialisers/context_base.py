@@ -6,6 +6,7 @@ from data_safe_haven.types import AzureSubscriptionName, EntraGroupName
 
 class ContextBase(ABC):
     admin_group_name: EntraGroupName
+    entra_storage_auth: bool
     subscription_name: AzureSubscriptionName
     storage_container_name: ClassVar[str]
 
@@ -24,6 +24,7 @@ class AzureSdkCredentialScope(str, Enum):
     DEFAULT = "https://management.azure.com/.default"
     GRAPH_API = "https://graph.microsoft.com/.default"
     KEY_VAULT = "https://vault.azure.net"
+    STORAGE = "https://storage.azure.com/.default"
 
 
 @verify(UNIQUE)
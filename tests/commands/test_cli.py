@@ -1,4 +1,7 @@
+import pytest
+
 from data_safe_haven.commands import application
+from data_safe_haven.commands.cli import main
 from data_safe_haven.version import __version__
 
 
@@ -33,3 +36,28 @@ class TestVersion:
         result = runner.invoke(application, ["--version"])
         assert result.exit_code == 0
         assert f"Data Safe Haven {__version__}" in result.stdout
+
+
+class TestMain:
+    def test_metrics_write_failure(self, mocker, caplog):
+        mocker.patch("data_safe_haven.commands.cli.application")
+        mocker.patch(
+            "data_safe_haven.commands.cli.RequestMetrics.report",
+            side_effect=PermissionError("Permission denied"),
+        )
+        with caplog.at_level("DEBUG"):
+            main()
+        assert "Could not write request metrics: Permission denied" in caplog.text
+
+    def test_metrics_write_failure_keeps_exit_code(self, mocker):
+        mocker.patch(
+            "data_safe_haven.commands.cli.application",
+            side_effect=SystemExit(1),
+        )
+        mocker.patch(
+            "data_safe_haven.commands.cli.RequestMetrics.report",
+            side_effect=OSError("No space left on device"),
+        )
+        with pytest.raises(SystemExit) as exc_info:
+            main()
+        assert exc_info.value.code == 1
@@ -185,6 +185,26 @@ class TestUpdate:
         assert result.exit_code == 0
         assert "Description: New Name" in result.stdout
 
+    def test_update_pulumi_parallelism(self, runner):
+        result = runner.invoke(
+            context_command_group, ["update", "--pulumi-parallelism", "32"]
+        )
+        assert result.exit_code == 0
+        result = runner.invoke(context_command_group, ["show"])
+        assert result.exit_code == 0
+        assert "Pulumi parallelism: 32" in result.stdout
+
+    def test_update_entra_storage_auth(self, runner):
+        result = runner.invoke(context_command_group, ["show"])
+        assert "Entra storage authentication: False" in result.stdout
+        result = runner.invoke(
+            context_command_group, ["update", "--entra-storage-auth"]
+        )
+        assert result.exit_code == 0
+        result = runner.invoke(context_command_group, ["show"])
+        assert result.exit_code == 0
+        assert "Entra storage authentication: True" in result.stdout
+
     def test_no_context_file(self, runner_no_context_file):
         result = runner_no_context_file.invoke(
             context_command_group, ["update", "--description", "New Name"]
@@ -10,6 +10,7 @@ class TestRun:
         mock_install_plugins,  # noqa: ARG002
         mock_key_vault_key,  # noqa: ARG002
         mock_pulumi_config_no_key_from_remote,  # noqa: ARG002
+        mock_pulumi_config_upload,  # noqa: ARG002
         mock_shm_config_from_remote,  # noqa: ARG002
         mock_sre_config_from_remote,  # noqa: ARG002
         offline_pulumi_account,  # noqa: ARG002
@@ -1,4 +1,5 @@
 from data_safe_haven.commands.sre import sre_command_group
+from data_safe_haven.external import AzureVmSkuCatalogue
 
 
 class TestDeploySRE:
@@ -18,6 +19,43 @@ class TestDeploySRE:
         assert "mock deploy" in result.stdout
         assert "mock deploy error" in result.stdout
 
+    def test_deploy_unavailable_workspace_sku(
+        self,
+        runner,
+        sre_config,
+        mock_graph_api_token,  # noqa: ARG002
+        mock_ip_1_2_3_4,  # noqa: ARG002
+        mock_pulumi_config_from_remote_or_create,  # noqa: ARG002
+        mock_shm_config_from_remote,  # noqa: ARG002
+        mock_sre_config_from_remote,  # noqa: ARG002
+    ):
+        sre_config.sre.workspace_skus = ["Standard_D2s_v4", "Standard_NC6s_v3"]
+        AzureVmSkuCatalogue.write("uksouth", {"Standard_D2s_v4": {"vCPUs": "2"}})
+        result = runner.invoke(sre_command_group, ["deploy", "sandbox"])
+        assert result.exit_code == 1
+        assert "Workspace SKUs ['Standard_NC6s_v3'] are not" in result.stdout
+
+    def test_deploy_stale_sku_catalogue(
+        self,
+        mocker,
+        runner,
+        sre_config,
+        mock_graph_api_token,  # noqa: ARG002
+        mock_ip_1_2_3_4,  # noqa: ARG002
+        mock_pulumi_config_from_remote_or_create,  # noqa: ARG002
+        mock_pulumi_config_upload,  # noqa: ARG002
+        mock_shm_config_from_remote,  # noqa: ARG002
+        mock_sre_config_from_remote,  # noqa: ARG002
+        mock_sre_project_manager_deploy_then_exit,  # noqa: ARG002
+    ):
+        sre_config.sre.workspace_skus = ["Standard_NC6s_v3"]
+        AzureVmSkuCatalogue.write("uksouth", {"Standard_D2s_v4": {"vCPUs": "2"}})
+        mocker.patch.object(AzureVmSkuCatalogue, "ttl", -1)
+        result = runner.invoke(sre_command_group, ["deploy", "sandbox"])
+        # Stale catalogues do not block the deployment
+        assert "Could not check workspace SKUs" in result.stdout
+        assert "mock deploy" in result.stdout
+
     def test_no_context_file(self, runner_no_context_file):
         result = runner_no_context_file.invoke(sre_command_group, ["deploy", "sandbox"])
         assert result.exit_code == 1
@@ -44,6 +82,13 @@ class TestDeploySRE:
         assert result.exit_code == 1
         assert "mock from_remote failure" in out
 
+    def test_name_and_names(self, runner):
+        result = runner.invoke(
+            sre_command_group, ["deploy", "sandbox", "--names", "sandbox,other"]
+        )
+        assert result.exit_code == 1
+        assert "Specify exactly one of an SRE name" in result.stdout
+
 
 class TestTeardownSRE:
     def test_teardown(
@@ -0,0 +1,81 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from pytest import fixture, raises
+
+from data_safe_haven.commands.sre_fleet import SREFleet
+from data_safe_haven.config import DSHPulumiConfig, SHMConfig
+from data_safe_haven.exceptions import (
+    DataSafeHavenConfigError,
+    DataSafeHavenPulumiError,
+)
+
+
+@fixture
+def fleet(mocker, context, tmp_path):
+    mocker.patch(
+        "data_safe_haven.commands.sre_fleet.log_dir", return_value=tmp_path / "logs"
+    )
+    sre_fleet = SREFleet(context, "graph-api-token", max_workers=2)
+    mocker.patch.object(
+        sre_fleet, "executor", return_value=ThreadPoolExecutor(max_workers=2)
+    )
+    return sre_fleet
+
+
+class TestSREFleet:
+    def test_deploy(
+        self,
+        mocker,
+        fleet,
+        pulumi_config,
+        shm_config,
+    ):
+        mocker.patch.object(
+            DSHPulumiConfig, "from_remote_or_create", return_value=pulumi_config
+        )
+        mocker.patch.object(SHMConfig, "from_remote", return_value=shm_config)
+
+        def deploy_sre(_context, _shm_config, name, _token, **kwargs):
+            kwargs["on_stage"]("deploying infrastructure")
+            if name == "failing":
+                msg = "mock deploy error"
+                raise DataSafeHavenConfigError(msg)
+
+        mock_deploy_sre = mocker.patch(
+            "data_safe_haven.commands.sre_fleet.deploy_sre", side_effect=deploy_sre
+        )
+
+        with raises(DataSafeHavenPulumiError, match=r"\['failing'\]"):
+            fleet.deploy(["sandbox", "failing"], fast=True)
+
+        assert mock_deploy_sre.call_count == 2
+        assert mock_deploy_sre.call_args.kwargs["fast"]
+        assert "mock deploy error" in (fleet.log_directory / "failing.log").read_text()
+        assert fleet.log_directory.parent == fleet.log_directory.parent.parent / "logs"
+
+    def test_deploy_first_fails(
+        self,
+        mocker,
+        fleet,
+        pulumi_config,
+        shm_config,
+    ):
+        # Without an encryption key, the first SRE is deployed on its own
+        pulumi_config.encrypted_key = None
+        mocker.patch.object(
+            DSHPulumiConfig, "from_remote_or_create", return_value=pulumi_config
+        )
+        mocker.patch.object(SHMConfig, "from_remote", return_value=shm_config)
+        mock_deploy_sre = mocker.patch(
+            "data_safe_haven.commands.sre_fleet.deploy_sre",
+            side_effect=DataSafeHavenConfigError("mock deploy error"),
+        )
+
+        with raises(
+            DataSafeHavenPulumiError,
+            match=r"\['failing'\]\. SREs \['other', 'sandbox'\] were not run\.",
+        ):
+            fleet.deploy(["failing", "sandbox", "other"])
+
+        mock_deploy_sre.assert_called_once()
+        assert mock_deploy_sre.call_args.args[2] == "failing"
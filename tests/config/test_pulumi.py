@@ -1,4 +1,5 @@
-from pytest import raises
+import yaml
+from pytest import fixture, raises
 
 from data_safe_haven.config import DSHPulumiConfig, DSHPulumiProject
 from data_safe_haven.exceptions import (
@@ -8,6 +9,38 @@ from data_safe_haven.exceptions import (
 from data_safe_haven.external import AzureSdk
 
 
+class MockBlobs:
+    def __init__(self):
+        self.contents = {}
+        self.updated = []
+
+    def download_blob(self, _sdk, blob_name, *_location):
+        return self.contents[blob_name]
+
+    def update_blob(self, _sdk, blob_name, *location_and_update):
+        update = location_and_update[-1]
+        current = self.contents.get(blob_name)
+        if (blob_data := update(current)) == current:
+            return
+        self.updated.append(blob_name)
+        if blob_data is None:
+            del self.contents[blob_name]
+        else:
+            self.contents[blob_name] = blob_data
+
+
+@fixture
+def mock_blobs(mocker):
+    blobs = MockBlobs()
+    mocker.patch.object(
+        AzureSdk, "download_blob", autospec=True, side_effect=blobs.download_blob
+    )
+    mocker.patch.object(
+        AzureSdk, "update_blob", autospec=True, side_effect=blobs.update_blob
+    )
+    return blobs
+
+
 class TestDSHPulumiProject:
     def test_pulumi_project(self, pulumi_project):
         assert isinstance(pulumi_project.stack_config, dict)
@@ -119,18 +152,140 @@ class TestDSHPulumiConfig:
         ):
             DSHPulumiConfig.from_yaml(not_valid)
 
-    def test_upload(self, mocker, pulumi_config, context):
-        mock_method = mocker.patch.object(AzureSdk, "upload_blob", return_value=None)
+    def test_upload(self, mock_blobs, pulumi_config, context):
         pulumi_config.upload(context)
 
-        mock_method.assert_called_once_with(
-            pulumi_config.to_yaml(),
+        assert set(mock_blobs.contents) == {
             DSHPulumiConfig.default_filename,
-            context.resource_group_name,
-            context.storage_account_name,
-            context.storage_container_name,
+            "pulumi-acmedeployment.yaml",
+            "pulumi-otherproject.yaml",
+        }
+        index = yaml.safe_load(mock_blobs.contents[DSHPulumiConfig.default_filename])
+        assert index["encrypted_key"] == pulumi_config.encrypted_key
+        assert index["project_names"] == ["acmedeployment", "other_project"]
+        assert (
+            DSHPulumiProject.from_yaml(
+                mock_blobs.contents["pulumi-acmedeployment.yaml"]
+            )
+            == pulumi_config["acmedeployment"]
         )
 
+        # Only changed projects are uploaded again
+        mock_blobs.updated.clear()
+        del pulumi_config["other_project"]
+        pulumi_config.upload(context)
+        assert mock_blobs.updated == [
+            DSHPulumiConfig.default_filename,
+            "pulumi-otherproject.yaml",
+        ]
+        assert "pulumi-otherproject.yaml" not in mock_blobs.contents
+
+    def test_upload_merge(
+        self,
+        mock_blobs,  # noqa: ARG002
+        pulumi_config,
+        context,
+    ):
+        pulumi_config.upload(context)
+        first = DSHPulumiConfig.from_remote(context)
+        second = DSHPulumiConfig.from_remote(context)
+        # Two clients change different settings and projects concurrently
+        first["acmedeployment"].stack_config["first"] = 1
+        second["acmedeployment"].stack_config["second"] = 2
+        second.create_or_select_project("new_project")
+        first.upload(context)
+        second.upload(context)
+
+        merged = DSHPulumiConfig.from_remote(context)
+        assert merged.project_names == [
+            "acmedeployment",
+            "new_project",
+            "other_project",
+        ]
+        assert merged["acmedeployment"].stack_config["first"] == 1
+        assert merged["acmedeployment"].stack_config["second"] == 2
+
+    def test_upload_older_version(
+        self,
+        mock_blobs,
+        pulumi_config,
+        context,
+    ):
+        pulumi_config.upload(context)
+        first = DSHPulumiConfig.from_remote(context)
+        second = DSHPulumiConfig.from_remote(context)
+        first["acmedeployment"].stack_config["first"] = 1
+        second["acmedeployment"].stack_config["second"] = 2
+        first.upload(context)
+        second.upload(context)
+
+        # Older versions only read the 'projects' mapping in the index
+        index_yaml = mock_blobs.contents[DSHPulumiConfig.default_filename]
+        older = DSHPulumiConfig.from_yaml(index_yaml)
+        assert older.projects == DSHPulumiConfig.from_remote(context).projects
+        assert older["acmedeployment"].stack_config["first"] == 1
+        assert older["acmedeployment"].stack_config["second"] == 2
+
+        # Changes written inline by an older version replace the project files
+        older["acmedeployment"].stack_config["older"] = 3
+        mock_blobs.contents[DSHPulumiConfig.default_filename] = yaml.dump(
+            {
+                "encrypted_key": older.encrypted_key,
+                "projects": {
+                    name: {"stack_config": project.stack_config}
+                    for name, project in older.projects.items()
+                },
+            }
+        )
+        newer = DSHPulumiConfig.from_remote(context)
+        assert newer["acmedeployment"].stack_config["older"] == 3
+        newer.upload(context)
+        assert (
+            DSHPulumiProject.from_yaml(
+                mock_blobs.contents["pulumi-acmedeployment.yaml"]
+            ).stack_config["older"]
+            == 3
+        )
+
+    def test_upload_merge_outputs(
+        self,
+        mock_blobs,  # noqa: ARG002
+        pulumi_config,
+        context,
+    ):
+        pulumi_config.upload(context)
+        first = DSHPulumiConfig.from_remote(context)
+        second = DSHPulumiConfig.from_remote(context)
+        # Outputs from the most recent update are kept
+        first["acmedeployment"].stack_outputs = {"data": "new"}
+        first["acmedeployment"].stack_outputs_version = 2
+        second["acmedeployment"].stack_outputs = {"data": "old"}
+        second["acmedeployment"].stack_outputs_version = 1
+        first.upload(context)
+        second.upload(context)
+
+        merged = DSHPulumiConfig.from_remote(context)
+        assert merged["acmedeployment"].stack_outputs == {"data": "new"}
+        assert merged["acmedeployment"].stack_outputs_version == 2
+
+    def test_upload_conflict(
+        self,
+        mock_blobs,  # noqa: ARG002
+        pulumi_config,
+        context,
+    ):
+        pulumi_config.upload(context)
+        first = DSHPulumiConfig.from_remote(context)
+        second = DSHPulumiConfig.from_remote(context)
+        first["acmedeployment"].stack_config["data-safe-haven:variable"] = 1
+        second["acmedeployment"].stack_config["data-safe-haven:variable"] = 2
+        first.upload(context)
+        with raises(
+            DataSafeHavenConfigError,
+            match=r"Setting 'data-safe-haven:variable' of Pulumi project 'acmedeployment' was changed by another client\.",
+        ):
+            second.upload(context)
+
     def test_from_remote(self, mocker, pulumi_config_yaml, context):
         mock_method = mocker.patch.object(
             AzureSdk, "download_blob", return_value=pulumi_config_yaml
@@ -177,6 +332,7 @@ class TestDSHPulumiConfig:
 
         mock_storage_exists.assert_called_once_with(
             context.storage_account_name,
+            resource_group_name=context.resource_group_name,
         )
 
     def test_from_remote_or_create_create(
@@ -199,6 +355,7 @@ class TestDSHPulumiConfig:
 
         mock_storage_exists.assert_called_once_with(
             context.storage_account_name,
+            resource_group_name=context.resource_group_name,
         )
 
     def test_create_or_select_project(self, pulumi_config, pulumi_project):
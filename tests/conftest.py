@@ -27,7 +27,15 @@ from data_safe_haven.config.config_sections import (
     ConfigSubsectionRemoteDesktopOpts,
 )
 from data_safe_haven.exceptions import DataSafeHavenAzureError
-from data_safe_haven.external import AzureSdk, PulumiAccount
+from data_safe_haven.external import (
+    AzureBlobCache,
+    AzureSdk,
+    AzureVmSkuCatalogue,
+    GraphApi,
+    PulumiAccount,
+    RequestMetrics,
+)
+from data_safe_haven.external.api.azure_subscription_cache import AzureSubscriptionCache
 from data_safe_haven.external.api.credentials import AzureSdkCredential
 from data_safe_haven.infrastructure import SREProjectManager
 from data_safe_haven.infrastructure.project_manager import ProjectManager
@@ -155,6 +163,64 @@ def local_pulumi_login():
     run([pulumi_path, "logout"], check=False)
 
 
+@fixture(autouse=True)
+def reset_graph_api_directory_indices(mocker):
+    mocker.patch.dict(GraphApi.directory_indices_, clear=True)
+
+
+@fixture(autouse=True)
+def reset_azure_blob_cache(mocker, tmp_path):
+    mocker.patch.object(
+        AzureBlobCache,
+        "path",
+        side_effect=lambda account, container, blob: tmp_path
+        / "cache"
+        / account
+        / container
+        / f"{blob}.json",
+    )
+
+
+@fixture(autouse=True)
+def reset_azure_sdk_clients(mocker):
+    mocker.patch.dict(AzureSdk.clients_, clear=True)
+    mocker.patch.dict(AzureSdk.credentials_, clear=True)
+    mocker.patch.dict(AzureSdk.blob_service_clients_, clear=True)
+    mocker.patch.dict(AzureSdk.storage_keys_, clear=True)
+    mocker.patch.object(AzureSdk, "storage_exists_", set())
+    mocker.patch.dict(AzureSdk.vm_command_locks_, clear=True)
+
+
+@fixture(autouse=True)
+def reset_azure_subscription_cache(mocker, tmp_path):
+    mocker.patch.dict(AzureSubscriptionCache.entries_, clear=True)
+    mocker.patch.object(
+        AzureSubscriptionCache,
+        "path",
+        return_value=tmp_path / AzureSubscriptionCache.filename,
+    )
+    mocker.patch.object(
+        AzureSubscriptionCache,
+        "profile_path",
+        return_value=tmp_path / "azure" / "azureProfile.json",
+    )
+
+
+@fixture(autouse=True)
+def reset_azure_vm_sku_catalogue(mocker, tmp_path):
+    mocker.patch.dict(AzureVmSkuCatalogue.catalogues_, clear=True)
+    mocker.patch.object(
+        AzureVmSkuCatalogue,
+        "path",
+        side_effect=lambda location: tmp_path / f"vm-skus-{location}.json",
+    )
+
+
+@fixture(autouse=True)
+def reset_request_metrics(mocker):
+    mocker.patch.dict(RequestMetrics.operations_, clear=True)
+
+
 @fixture(autouse=True, scope="session")
 def log_directory(session_mocker, tmp_path_factory):
     session_mocker.patch.object(
@@ -429,9 +495,7 @@ def shm_config_yaml(request):
         admin_group_id: guid_admin
         entra_tenant_id: guid_entra
         fqdn: shm.acme.com
-    """.replace(
-            "guid_admin", request.config.guid_admin
-        )
+    """.replace("guid_admin", request.config.guid_admin)
         .replace("guid_entra", request.config.guid_entra)
         .replace("guid_subscription", request.config.guid_subscription)
         .replace("guid_tenant", request.config.guid_tenant)
@@ -503,9 +567,7 @@ def sre_config_yaml(request):
         software_packages: none
         timezone: Europe/London
         workspace_skus: []
-    """.replace(
-        "guid_subscription", request.config.guid_subscription
-    ).replace(
+    """.replace("guid_subscription", request.config.guid_subscription).replace(
         "guid_tenant", request.config.guid_tenant
     )
     return yaml.dump(yaml.safe_load(content))
@@ -0,0 +1,130 @@
+import asyncio
+
+import aiohttp
+import pytest
+from azure.core.exceptions import ResourceNotFoundError
+from azure.keyvault.secrets.aio import SecretClient
+from azure.mgmt.dns.v2018_05_01.aio import DnsManagementClient
+
+import data_safe_haven.external.api.async_azure_sdk
+from data_safe_haven.exceptions import DataSafeHavenAzureError
+from data_safe_haven.external import AsyncAzureSdk
+
+
+@pytest.fixture
+def run_until_complete():
+    # Use a separate event loop, as asyncio.run would unset the current event loop
+    # that other tests rely on
+    loop = asyncio.new_event_loop()
+    yield loop.run_until_complete
+    loop.close()
+
+
+@pytest.fixture
+def mock_async_dns_management_client(mocker):
+    dns_client = mocker.Mock()
+    dns_client.close = mocker.AsyncMock()
+    dns_client.record_sets.create_or_update = mocker.AsyncMock(
+        side_effect=lambda **kwargs: kwargs["parameters"]
+    )
+    dns_client.record_sets.delete = mocker.AsyncMock()
+    dns_client.record_sets.get = mocker.AsyncMock(
+        side_effect=ResourceNotFoundError("Record not found.")
+    )
+    mocker.patch.object(
+        data_safe_haven.external.api.async_azure_sdk,
+        "DnsManagementClient",
+        return_value=dns_client,
+    )
+    return dns_client
+
+
+class TestAsyncAzureSdk:
+    def test_dns_records(
+        self,
+        run_until_complete,
+        mock_async_dns_management_client,
+        mock_azuresdk_get_subscription,  # noqa: ARG002
+    ):
+        async def run():
+            async with AsyncAzureSdk("subscription name") as azure_sdk:
+                record_sets = await asyncio.gather(
+                    *(
+                        azure_sdk.ensure_dns_txt_record(
+                            f"record-{idx}", "value", "resource_group", "example.com"
+                        )
+                        for idx in range(3)
+                    )
+                )
+                await azure_sdk.remove_dns_txt_record(
+                    "missing", "resource_group", "example.com"
+                )
+                # Clients are shared between requests
+                assert len(azure_sdk.clients_) == 1
+            return record_sets
+
+        record_sets = run_until_complete(run())
+
+        assert [record_set.txt_records[0].value for record_set in record_sets] == [
+            ["value"]
+        ] * 3
+        mock_async_dns_management_client.record_sets.delete.assert_not_called()
+        mock_async_dns_management_client.close.assert_awaited_once()
+
+    def test_get_keyvault_secret(self, mocker, run_until_complete):
+        secret_client = mocker.Mock()
+        secret_client.close = mocker.AsyncMock()
+        secret_client.get_secret = mocker.AsyncMock(
+            side_effect=lambda name: mocker.Mock(value=f"value-{name}" if name else "")
+        )
+        mock_secret_client = mocker.patch.object(
+            data_safe_haven.external.api.async_azure_sdk,
+            "SecretClient",
+            return_value=secret_client,
+        )
+
+        async def run():
+            async with AsyncAzureSdk("subscription name") as azure_sdk:
+                assert (
+                    await azure_sdk.get_keyvault_secret("key-vault", "secret")
+                    == "value-secret"
+                )
+                with pytest.raises(
+                    DataSafeHavenAzureError, match=r"Secret  has no value\."
+                ):
+                    await azure_sdk.get_keyvault_secret("key-vault", "")
+
+        run_until_complete(run())
+
+        assert (
+            mock_secret_client.call_args.kwargs["vault_url"]
+            == "https://key-vault.vault.azure.net"
+        )
+
+    def test_shared_session(
+        self,
+        run_until_complete,
+        mock_azuresdk_get_subscription,  # noqa: ARG002
+    ):
+        async def run():
+            async with AsyncAzureSdk("subscription name") as azure_sdk:
+                dns_client = await azure_sdk.management_client(DnsManagementClient)
+                secret_client = azure_sdk.keyvault_client(SecretClient, "key-vault")
+                session = azure_sdk.session_
+                # Clients are reused and share one aiohttp session
+                assert await azure_sdk.management_client(DnsManagementClient) is (
+                    dns_client
+                )
+                assert azure_sdk.keyvault_client(SecretClient, "key-vault") is (
+                    secret_client
+                )
+                assert isinstance(session, aiohttp.ClientSession)
+                assert azure_sdk.transport().session is session
+            return azure_sdk, session
+
+        azure_sdk, session = run_until_complete(run())
+
+        # Closing the SDK closes every client and the session
+        assert session.closed
+        assert azure_sdk.clients_ == {}
+        assert azure_sdk.session_ is None
@@ -0,0 +1,60 @@
+import pytest
+
+from data_safe_haven.exceptions import DataSafeHavenAzureError
+from data_safe_haven.external import AzureLROWaiter
+
+
+class MockPoller:
+    def __init__(self, n_polls):
+        self.n_polls = n_polls
+        self.timeouts = []
+
+    def done(self):
+        return len(self.timeouts) >= self.n_polls
+
+    def wait(self, timeout):
+        self.timeouts.append(timeout)
+
+
+class TestAzureLROWaiter:
+    def test_intervals(self):
+        waiter = AzureLROWaiter(initial_interval=0.5, max_interval=3)
+        intervals = waiter.intervals()
+        assert [next(intervals) for _ in range(5)] == [0.5, 1, 2, 3, 3]
+
+    def test_wait(self):
+        pollers = [MockPoller(0), MockPoller(1), MockPoller(3)]
+        AzureLROWaiter(max_interval=5).wait(*pollers)
+        assert all(poller.done() for poller in pollers)
+        assert pollers[2].timeouts == [5, 5, 5]
+
+    def test_wait_timeout(self, mocker):
+        mocker.patch(
+            "data_safe_haven.external.api.azure_lro_waiter.time.monotonic",
+            side_effect=[0, 1, 20],
+        )
+        with pytest.raises(
+            DataSafeHavenAzureError,
+            match=r"Timed out after 10 seconds waiting for operation to finish\.",
+        ):
+            AzureLROWaiter(timeout=10).wait(MockPoller(5))
+
+    def test_until(self, mocker):
+        mock_sleep = mocker.patch(
+            "data_safe_haven.external.api.azure_lro_waiter.time.sleep"
+        )
+        results = iter([False, False, False, True])
+        AzureLROWaiter(initial_interval=1).until(lambda: next(results), "condition")
+        assert [call.args[0] for call in mock_sleep.call_args_list] == [1, 2, 4]
+
+    def test_until_timeout(self, mocker):
+        mocker.patch("data_safe_haven.external.api.azure_lro_waiter.time.sleep")
+        mocker.patch(
+            "data_safe_haven.external.api.azure_lro_waiter.time.monotonic",
+            side_effect=[0, 1, 2, 11],
+        )
+        with pytest.raises(
+            DataSafeHavenAzureError,
+            match=r"Timed out after 10 seconds waiting for certificate to be purged\.",
+        ):
+            AzureLROWaiter(timeout=10).until(lambda: False, "certificate to be purged")
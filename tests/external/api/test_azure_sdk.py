@@ -1,6 +1,19 @@
 import pytest
-from azure.core.exceptions import ClientAuthenticationError, ResourceNotFoundError
+from azure.core import MatchConditions
+from azure.core.exceptions import (
+    ClientAuthenticationError,
+    HttpResponseError,
+    ResourceExistsError,
+    ResourceNotFoundError,
+    ResourceNotModifiedError,
+)
+from azure.mgmt.keyvault.v2021_06_01_preview.models import (
+    Sku,
+    Vault,
+    VaultProperties,
+)
 from azure.mgmt.keyvault.v2023_07_01.models import DeletedVault
+from azure.mgmt.resource.resources.v2021_04_01.models import ResourceGroup
 from azure.mgmt.resource.subscriptions import SubscriptionClient
 from azure.mgmt.resource.subscriptions.models import Subscription
 from azure.mgmt.storage.v2021_08_01.models import (
@@ -15,7 +28,7 @@ from data_safe_haven.exceptions import (
     DataSafeHavenAzureStorageError,
     DataSafeHavenValueError,
 )
-from data_safe_haven.external import AzureSdk, GraphApi
+from data_safe_haven.external import AzureSdk, AzureVmSkuCatalogue, GraphApi
 
 
 @fixture
@@ -119,6 +132,12 @@ def mock_storage_management_client(monkeypatch):
             self.name = name
 
     class MockStorageAccountsOperations:
+        def get_properties(self, resource_group_name, account_name):  # noqa: ARG002
+            if account_name in ("shmstorageaccount", "shmstorageaccounter"):
+                return MockStorageAccount(account_name)
+            msg = f"Storage account {account_name} was not found."
+            raise ResourceNotFoundError(msg)
+
         def list(self):
             return [
                 MockStorageAccount("shmstorageaccount"),
@@ -205,6 +224,7 @@ class TestAzureSdk:
 
         mock_storage_exists.assert_called_once_with(
             "storage_account",
+            resource_group_name="resource_group",
         )
 
     def test_blob_exists_no_storage(
@@ -234,8 +254,203 @@ class TestAzureSdk:
 
         mock_storage_exists.assert_called_once_with(
             "storage_account",
+            resource_group_name="resource_group",
+        )
+
+    def test_download_blob_cached(self, mocker):
+        blob_client = mocker.Mock(blob_name="config.yaml")
+        blob_client.download_blob.side_effect = [
+            mocker.Mock(
+                properties=mocker.Mock(etag='"etag-1"'),
+                readall=mocker.Mock(return_value="content: 1"),
+            ),
+            ResourceNotModifiedError(
+                response=mocker.Mock(status_code=304, reason="Not Modified")
+            ),
+            mocker.Mock(
+                properties=mocker.Mock(etag='"etag-3"'),
+                readall=mocker.Mock(return_value="content: 3"),
+            ),
+        ]
+        blob_client.upload_blob.return_value = {"etag": '"etag-2"'}
+        mocker.patch.object(AzureSdk, "blob_client", return_value=blob_client)
+        sdk = AzureSdk("subscription name")
+        blob = ("config.yaml", "resource_group", "storage_account", "container")
+
+        assert sdk.download_blob(*blob) == "content: 1"
+        sdk.upload_blob("content: 2", *blob)
+        # The unchanged blob is not downloaded again
+        assert sdk.download_blob(*blob) == "content: 2"
+        sdk.remove_blob(*blob)
+        assert sdk.download_blob(*blob) == "content: 3"
+
+        assert [call.kwargs for call in blob_client.download_blob.call_args_list] == [
+            {"encoding": "utf-8"},
+            {
+                "encoding": "utf-8",
+                "etag": '"etag-2"',
+                "match_condition": MatchConditions.IfModified,
+            },
+            {"encoding": "utf-8"},
+        ]
+
+    def test_update_blob_retry(self, mocker):
+        blob_client = mocker.Mock(blob_name="config.yaml")
+        blob_client.download_blob.side_effect = [
+            ResourceNotFoundError("Blob not found."),
+            mocker.Mock(
+                properties=mocker.Mock(etag='"etag-1"'),
+                readall=mocker.Mock(return_value="a"),
+            ),
+        ]
+        blob_client.upload_blob.side_effect = [
+            ResourceExistsError("Blob already exists."),
+            {"etag": '"etag-2"'},
+        ]
+        mocker.patch.object(AzureSdk, "blob_client", return_value=blob_client)
+        sdk = AzureSdk("subscription name")
+        sdk.update_blob(
+            "config.yaml",
+            "resource_group",
+            "storage_account",
+            "container",
+            lambda current: (current or "") + "b",
         )
 
+        assert [call.args[0] for call in blob_client.upload_blob.call_args_list] == [
+            "b",
+            "ab",
+        ]
+        assert blob_client.upload_blob.call_args_list[0].kwargs == {
+            "overwrite": True,
+            "match_condition": MatchConditions.IfMissing,
+        }
+        assert blob_client.upload_blob.call_args_list[1].kwargs == {
+            "overwrite": True,
+            "etag": '"etag-1"',
+            "match_condition": MatchConditions.IfNotModified,
+        }
+
+    def test_blob_service_client(
+        self,
+        mocker,
+        mock_azuresdk_get_subscription,  # noqa: ARG002
+    ):
+        mock_get_storage_account_keys = mocker.patch.object(
+            AzureSdk,
+            "get_storage_account_keys",
+            return_value=[mocker.Mock(value="a2V5")],
+        )
+        sdk = AzureSdk("subscription name", entra_storage_auth=False)
+        client = sdk.blob_service_client("resource_group", "storage_account")
+        # Clients are reused by other instances until they expire
+        other_sdk = AzureSdk("subscription name", entra_storage_auth=False)
+        assert client is other_sdk.blob_service_client(
+            "resource_group", "storage_account"
+        )
+        mock_get_storage_account_keys.assert_called_once_with(
+            "resource_group", "storage_account"
+        )
+        # Expired clients are replaced
+        mocker.patch.object(AzureSdk, "storage_cache_ttl", 0)
+        client = sdk.blob_service_client("resource_group", "other_account")
+        assert client is not sdk.blob_service_client("resource_group", "other_account")
+
+    def test_blob_service_client_entra_auth(
+        self,
+        mocker,
+        mock_azuresdk_get_subscription,  # noqa: ARG002
+    ):
+        mock_get_storage_account_keys = mocker.patch.object(
+            AzureSdk, "get_storage_account_keys"
+        )
+        sdk = AzureSdk("subscription name", entra_storage_auth=True)
+        client = sdk.blob_service_client("resource_group", "storage_account")
+        assert client.url == "https://storage_account.blob.core.windows.net/"
+        mock_get_storage_account_keys.assert_not_called()
+
+    @pytest.mark.parametrize(
+        "existing_tags,created",
+        [({"component": "SHM"}, False), ({"component": "other"}, True)],
+    )
+    def test_ensure_resource_group(self, mocker, existing_tags, created):
+        sdk = AzureSdk("subscription name")
+        resource_client = mocker.Mock()
+        resource_client.resource_groups.get.return_value = ResourceGroup(
+            location="uksouth", tags=existing_tags
+        )
+        resource_client.resource_groups.create_or_update.return_value = ResourceGroup(
+            location="uksouth", tags={"component": "SHM"}
+        )
+        mocker.patch.object(sdk, "management_client", return_value=resource_client)
+
+        resource_group = sdk.ensure_resource_group(
+            "UK South", "resource_group", tags={"component": "SHM"}
+        )
+
+        assert resource_group.location == "uksouth"
+        resource_client.resource_groups.get.assert_called_once_with("resource_group")
+        assert resource_client.resource_groups.create_or_update.called == created
+        resource_client.resource_groups.list.assert_not_called()
+
+    @pytest.mark.parametrize(
+        "existing_sku,created",
+        [
+            (Sku(name="Standard", family="A"), False),
+            (Sku(name="premium", family="A"), True),
+        ],
+    )
+    def test_ensure_keyvault(self, mocker, existing_sku, created):
+        sdk = AzureSdk("subscription name")
+        key_vault_client = mocker.Mock()
+        mocker.patch.object(sdk, "management_client", return_value=key_vault_client)
+        tenant_id = "00000000-0000-0000-0000-000000000000"
+
+        def ensure_keyvault():
+            sdk.ensure_keyvault(
+                "admin_group_id",
+                "key_vault_name",
+                "uksouth",
+                mocker.Mock(principal_id="principal_id"),
+                "resource_group",
+                tags={"component": "SHM"},
+                tenant_id=tenant_id,
+            )
+
+        # Create the key vault
+        key_vault_client.vaults.get.side_effect = ResourceNotFoundError("Not found.")
+        ensure_keyvault()
+        parameters = key_vault_client.vaults.begin_create_or_update.call_args.args[2]
+
+        # Only update it if the SKU has changed
+        key_vault_client.reset_mock()
+        key_vault_client.vaults.get.side_effect = None
+        key_vault_client.vaults.get.return_value = Vault(
+            location="uksouth",
+            properties=VaultProperties(
+                access_policies=parameters.properties.access_policies,
+                sku=existing_sku,
+                tenant_id=tenant_id,
+            ),
+            tags={"component": "SHM"},
+        )
+        ensure_keyvault()
+        assert key_vault_client.vaults.begin_create_or_update.called == created
+
+    def test_ensure_storage_blob_container_missing(self, mocker):
+        sdk = AzureSdk("subscription name")
+        storage_client = mocker.Mock()
+        storage_client.blob_containers.get.side_effect = ResourceNotFoundError(
+            "Container not found."
+        )
+        mocker.patch.object(sdk, "management_client", return_value=storage_client)
+
+        sdk.ensure_storage_blob_container(
+            "container", "resource_group", "storage_account"
+        )
+
+        storage_client.blob_containers.create.assert_called_once()
+
     def test_get_keyvault_key(self, mock_key_client):  # noqa: ARG002
         sdk = AzureSdk("subscription name")
         key = sdk.get_keyvault_key("exists", "key vault name")
@@ -285,7 +500,7 @@ class TestAzureSdk:
             sdk.get_subscription("Subscription 3")
 
     def test_get_subscription_authentication_error(self, mocker):
-        def raise_client_authentication_error(*args):  # noqa: ARG001
+        def raise_client_authentication_error(*args, **kwargs):  # noqa: ARG001
             raise ClientAuthenticationError
 
         mocker.patch.object(
@@ -298,6 +513,63 @@ class TestAzureSdk:
         ):
             sdk.get_subscription("Subscription 1")
 
+    def test_list_available_vm_skus(self, mocker):
+        sdk = AzureSdk("subscription name")
+        compute_client = mocker.Mock()
+        compute_client.resource_skus.list.return_value = [
+            mocker.Mock(
+                capabilities=[
+                    mocker.Mock(value="2"),
+                    mocker.Mock(value="8"),
+                    mocker.Mock(value="Standard"),
+                ],
+                resource_type="virtualMachines",
+            ),
+            mocker.Mock(capabilities=None, resource_type="disks"),
+        ]
+        # Mock objects use 'name' for their own name so set it separately
+        compute_client.resource_skus.list.return_value[0].name = "Standard_D2s_v4"
+        for capability, name in zip(
+            compute_client.resource_skus.list.return_value[0].capabilities,
+            ["vCPUs", "MemoryGB", "Tier"],
+            strict=True,
+        ):
+            capability.name = name
+        compute_client.resource_skus.list.return_value[1].name = "Premium_LRS"
+        mocker.patch.object(sdk, "management_client", return_value=compute_client)
+
+        skus = sdk.list_available_vm_skus("uksouth")
+        assert skus == {"Standard_D2s_v4": {"GPUs": 0, "MemoryGB": "8", "vCPUs": "2"}}
+        compute_client.resource_skus.list.assert_called_once_with(
+            filter="location eq 'uksouth'"
+        )
+        # Later lookups, including by other processes, use the cached catalogue
+        AzureVmSkuCatalogue.catalogues_.clear()
+        assert AzureSdk("subscription name").list_available_vm_skus("uksouth") == skus
+        compute_client.resource_skus.list.assert_called_once()
+
+    def test_management_client(
+        self,
+        mock_storage_management_client,  # noqa: ARG002
+        mock_azuresdk_get_subscription,  # noqa: ARG002
+    ):
+        sdk = AzureSdk("subscription name")
+        client = sdk.management_client(
+            data_safe_haven.external.api.azure_sdk.StorageManagementClient
+        )
+        # Clients are shared between instances for the same subscription
+        assert client is AzureSdk("subscription name").management_client(
+            data_safe_haven.external.api.azure_sdk.StorageManagementClient
+        )
+        assert sdk.credential() is AzureSdk("subscription name").credential()
+        # Clients are not shared with instances using a different credential
+        other_sdk = AzureSdk("subscription name", disable_logging=True)
+        other_client = other_sdk.management_client(
+            data_safe_haven.external.api.azure_sdk.StorageManagementClient
+        )
+        assert other_client is not client
+        assert other_sdk.credential() is not sdk.credential()
+
     def test_purge_keyvault(
         self,
         mock_azuresdk_get_subscription,  # noqa: ARG002
@@ -312,6 +584,60 @@ class TestAzureSdk:
         assert "Purging deleted key vault key_vault_name in location" in stdout
         assert "Purged Key Vault key_vault_name" in stdout
 
+    def test_run_remote_script_waiting(self, mocker):
+        sdk = AzureSdk("subscription name")
+        mock_sleep = mocker.patch("data_safe_haven.external.api.azure_sdk.time.sleep")
+        conflict = DataSafeHavenAzureError("Failed to run command on 'vm'.")
+        conflict.__cause__ = HttpResponseError(
+            "The request failed due to conflict with a concurrent request."
+        )
+        mocker.patch.object(
+            sdk, "run_remote_script", side_effect=[conflict, conflict, "output"]
+        )
+
+        assert sdk.run_remote_script_waiting("rg", "script", {}, "vm") == "output"
+        assert [call.args[0] for call in mock_sleep.call_args_list] == [1, 2]
+
+    def test_run_remote_scripts(self, mocker):
+        sdk = AzureSdk("subscription name")
+
+        def run_remote_script_waiting(
+            resource_group_name, script, script_parameters, vm_name  # noqa: ARG001
+        ):
+            if vm_name == "vm-broken" and script_parameters["name"] == "packages":
+                msg = f"Failed to run command on '{vm_name}'."
+                raise DataSafeHavenAzureError(msg)
+            return f"{vm_name}: {script} {script_parameters['name']}"
+
+        mock_run = mocker.patch.object(
+            sdk, "run_remote_script_waiting", side_effect=run_remote_script_waiting
+        )
+        outputs = []
+        scripts = [
+            ("check", {"name": "mounts"}),
+            ("check", {"name": "packages"}),
+            ("check", {"name": "users"}),
+        ]
+
+        results = sdk.run_remote_scripts(
+            "rg",
+            {"vm-1": scripts, "vm-broken": scripts, "vm-2": scripts[:1]},
+            on_output=lambda _, output: outputs.append(output),
+        )
+
+        # A failure on one VM does not stop the scripts on the others
+        assert list(results) == ["vm-1", "vm-broken", "vm-2"]
+        assert results["vm-1"] == [
+            "vm-1: check mounts",
+            "vm-1: check packages",
+            "vm-1: check users",
+        ]
+        assert results["vm-2"] == ["vm-2: check mounts"]
+        assert isinstance(results["vm-broken"], DataSafeHavenAzureError)
+        assert "vm-broken: check mounts" in outputs
+        # Scripts queued after the failure on the same VM are not run
+        assert mock_run.call_count == 6
+
     @pytest.mark.parametrize(
         "storage_account_name,exists",
         [("shmstorageaccount", True), ("shmstoragenonexistent", False)],
@@ -326,3 +652,72 @@ class TestAzureSdk:
         sdk = AzureSdk("subscription name")
 
         assert sdk.storage_exists(storage_account_name) == exists
+
+    @pytest.mark.parametrize(
+        "storage_account_name,exists",
+        [("shmstorageaccount", True), ("shmstoragenonexistent", False)],
+    )
+    def test_storage_exists_resource_group(
+        self,
+        mocker,
+        storage_account_name,
+        exists,
+        mock_storage_management_client,  # noqa: ARG002
+        mock_azuresdk_get_subscription,  # noqa: ARG002
+    ):
+        sdk = AzureSdk("subscription name")
+        storage_client = sdk.management_client(
+            data_safe_haven.external.api.azure_sdk.StorageManagementClient
+        )
+        mock_get_properties = mocker.spy(
+            storage_client.storage_accounts, "get_properties"
+        )
+        mock_list = mocker.spy(storage_client.storage_accounts, "list")
+
+        for _ in range(2):
+            assert (
+                sdk.storage_exists(
+                    storage_account_name, resource_group_name="resource_group"
+                )
+                == exists
+            )
+        # A second AzureSdk instance reuses a remembered result
+        assert (
+            AzureSdk("subscription name").storage_exists(storage_account_name) == exists
+        )
+
+        if exists:
+            mock_get_properties.assert_called_once_with(
+                "resource_group", storage_account_name
+            )
+            mock_list.assert_not_called()
+        else:
+            # Missing storage accounts are looked up again every time
+            assert mock_get_properties.call_count == 2
+            mock_list.assert_called_once()
+
+    def test_storage_exists_created_later(
+        self,
+        mocker,
+        mock_storage_management_client,  # noqa: ARG002
+        mock_azuresdk_get_subscription,  # noqa: ARG002
+    ):
+        sdk = AzureSdk("subscription name")
+        storage_client = sdk.management_client(
+            data_safe_haven.external.api.azure_sdk.StorageManagementClient
+        )
+        mocker.patch.object(
+            storage_client.storage_accounts,
+            "get_properties",
+            side_effect=[ResourceNotFoundError(), mocker.Mock()],
+        )
+
+        assert not sdk.storage_exists(
+            "shmstoragelater", resource_group_name="resource_group"
+        )
+        # The storage account is found once another process has created it
+        assert sdk.storage_exists(
+            "shmstoragelater", resource_group_name="resource_group"
+        )
+        assert sdk.storage_exists("shmstoragelater")
+        assert storage_client.storage_accounts.get_properties.call_count == 2
@@ -0,0 +1,92 @@
+import json
+import time
+
+import pytest
+
+from data_safe_haven.external import AzureSdk
+from data_safe_haven.external.api.azure_subscription_cache import (
+    AzureSubscriptionCache,
+)
+
+
+class TestAzureSubscriptionCache:
+    def loader(self):
+        self.n_loads += 1
+        return ("subscription-id", "tenant-id")
+
+    def login(self, user_name, tenant_id):
+        profile_path = AzureSubscriptionCache.profile_path()
+        profile_path.parent.mkdir(parents=True, exist_ok=True)
+        profile = {
+            "subscriptions": [
+                {"isDefault": False, "tenantId": "other", "user": {"name": "other"}},
+                {"isDefault": True, "tenantId": tenant_id, "user": {"name": user_name}},
+            ]
+        }
+        # The Azure CLI writes its profile with a byte order mark
+        with open(profile_path, "w", encoding="utf-8-sig") as f_profile:
+            json.dump(profile, f_profile)
+
+    def setup_method(self):
+        self.n_loads = 0
+
+    def test_lookup(self):
+        ids = AzureSubscriptionCache.lookup("Subscription", self.loader)
+        assert ids == ("subscription-id", "tenant-id")
+        with open(AzureSubscriptionCache.path(), encoding="utf-8") as f_cache:
+            entries = json.load(f_cache)
+        assert entries["/Subscription"]["subscription_id"] == "subscription-id"
+        assert entries["/Subscription"]["tenant_id"] == "tenant-id"
+        assert AzureSubscriptionCache.path().stat().st_mode & 0o777 == 0o600
+        # Lookups in another process use the file without contacting Azure
+        AzureSubscriptionCache.entries_.clear()
+        assert AzureSubscriptionCache.lookup("Subscription", self.loader) == ids
+        assert self.n_loads == 1
+
+    def test_lookup_account(self):
+        self.login("alice@example.com", "tenant-a")
+        AzureSubscriptionCache.lookup("Subscription", self.loader)
+        self.login("bob@example.com", "tenant-b")
+        AzureSubscriptionCache.lookup("Subscription", self.loader)
+        # Each account has its own entry for a subscription with the same name
+        assert self.n_loads == 2
+        assert set(AzureSubscriptionCache.read()) == {
+            "alice@example.com@tenant-a/Subscription",
+            "bob@example.com@tenant-b/Subscription",
+        }
+
+    def test_lookup_stale(self, mocker):
+        key = AzureSubscriptionCache.key("Subscription")
+        AzureSubscriptionCache.write(key, ("old-id", "old-tenant"))
+        mocker.patch.object(AzureSubscriptionCache, "ttl", -1)
+        ids = AzureSubscriptionCache.lookup("Subscription", self.loader)
+        # Stale values are looked up again before they are used
+        assert ids == ("subscription-id", "tenant-id")
+        assert self.n_loads == 1
+        assert AzureSubscriptionCache.read()[key]["tenant_id"] == "tenant-id"
+        assert AzureSubscriptionCache.entries_[key] == ids
+
+    def test_lookup_missing(self, mocker):
+        def loader():
+            msg = "Could not find subscription 'Subscription'"
+            raise ValueError(msg)
+
+        key = AzureSubscriptionCache.key("Subscription")
+        AzureSubscriptionCache.write(key, ("old-id", "old-tenant"))
+        mocker.patch.object(AzureSubscriptionCache, "ttl", -1)
+        with pytest.raises(ValueError, match="Could not find subscription"):
+            AzureSubscriptionCache.lookup("Subscription", loader)
+        assert key not in AzureSubscriptionCache.read()
+
+    def test_azure_sdk(
+        self, mocker, request, mock_azuresdk_get_subscription  # noqa: ARG002
+    ):
+        mock_get_subscription = mocker.spy(AzureSdk, "get_subscription")
+        assert AzureSdk("Data Safe Haven Acme").tenant_id == request.config.guid_tenant
+        assert (
+            AzureSdk("Data Safe Haven Acme").subscription_id
+            == request.config.guid_subscription
+        )
+        mock_get_subscription.assert_called_once_with("Data Safe Haven Acme")
+        key = AzureSubscriptionCache.key("Data Safe Haven Acme")
+        assert time.time() - AzureSubscriptionCache.read()[key]["timestamp"] < 60
@@ -1,4 +1,8 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import pytest
+from azure.core.credentials import AccessToken
 from azure.identity import (
     AzureCliCredential,
     DeviceCodeCredential,
@@ -67,6 +71,25 @@ class TestDeferredCredential:
         ):
             credential.decode_token(credential.token)
 
+    def test_get_token_single_flight(self, mocker):
+        mocker.patch.dict(DeferredCredential.tokens_, clear=True)
+        mock_get_credential = mocker.patch.object(
+            AzureSdkCredential,
+            "get_credential",
+            side_effect=lambda: time.sleep(0.1)
+            or mocker.Mock(
+                get_token=mocker.Mock(
+                    return_value=AccessToken("token", int(time.time()) + 3600)
+                )
+            ),
+        )
+        credential = AzureSdkCredential(skip_confirmation=True)
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            tokens = list(executor.map(lambda _: credential.token, range(8)))
+
+        assert tokens == ["token"] * 8
+        mock_get_credential.assert_called_once()
+
 
 class TestAzureSdkCredential:
     def test_get_credential(self, mock_azureclicredential_get_token):  # noqa: ARG002
@@ -1,6 +1,10 @@
+import threading
+import time
+
 import pytest
 import requests
 
+from data_safe_haven.directories import config_dir
 from data_safe_haven.exceptions import (
     DataSafeHavenMicrosoftGraphError,
     DataSafeHavenValueError,
@@ -69,6 +73,638 @@ class TestGraphApi:
         ):
             api.http_get(url)
 
+    def test_http_post_retry_after(
+        self,
+        request,
+        requests_mock,
+        mocker,
+        mock_graphapicredential_get_token,  # noqa: ARG002
+    ):
+        url = "https://example.com"
+        requests_mock.post(
+            url,
+            [
+                {"status_code": 429, "headers": {"Retry-After": "7"}},
+                {"status_code": 503, "headers": {"Retry-After": "2"}},
+                {"status_code": 201, "json": {"id": "new-object"}},
+            ],
+        )
+        mock_sleep = mocker.patch("time.sleep")
+        api = GraphApi.from_scopes(scopes=[], tenant_id=request.config.guid_tenant)
+        response = api.http_post(url, json={})
+        assert response.json() == {"id": "new-object"}
+        assert requests_mock.call_count == 3
+        assert [call.args[0] for call in mock_sleep.call_args_list] == [7.0, 2.0]
+
+    def test_http_post_no_retry(
+        self,
+        request,
+        requests_mock,
+        mocker,
+        mock_graphapicredential_get_token,  # noqa: ARG002
+    ):
+        url = "https://example.com"
+        requests_mock.post(
+            url,
+            [
+                {"status_code": 503},
+                {"status_code": 500},
+                {"status_code": 201, "json": {"id": "new-object"}},
+            ],
+        )
+        mocker.patch("time.sleep")
+        api = GraphApi.from_scopes(scopes=[], tenant_id=request.config.guid_tenant)
+        # POST requests may already have been processed, so are not retried
+        with pytest.raises(DataSafeHavenMicrosoftGraphError):
+            api.http_post(url, json={})
+        assert requests_mock.call_count == 1
+        # unless the caller asks for this
+        response = api.http_post(url, json={}, max_retries=1, retry_status_codes=[500])
+        assert response.json() == {"id": "new-object"}
+        assert requests_mock.call_count == 3
+
+    def test_http_get_retry_backoff(
+        self,
+        request,
+        requests_mock,
+        mocker,
+        mock_graphapicredential_get_token,  # noqa: ARG002
+    ):
+        url = "https://example.com"
+        requests_mock.get(url, status_code=429)
+        mock_sleep = mocker.patch("time.sleep")
+        api = GraphApi.from_scopes(scopes=[], tenant_id=request.config.guid_tenant)
+        api.max_retries = 3
+        with pytest.raises(
+            DataSafeHavenMicrosoftGraphError,
+            match=r"Could not execute GET request to 'https://example\.com'\.",
+        ):
+            api.http_get(url)
+        assert requests_mock.call_count == 4
+        delays = [call.args[0] for call in mock_sleep.call_args_list]
+        assert len(delays) == 3
+        assert all(0 <= delay <= 2**idx for idx, delay in enumerate(delays))
+
+    def test_http_get_no_retry(
+        self,
+        request,
+        requests_mock,
+        mocker,
+        mock_graphapicredential_get_token,  # noqa: ARG002
+    ):
+        url = "https://example.com"
+        requests_mock.get(url, status_code=404)
+        mock_sleep = mocker.patch("time.sleep")
+        api = GraphApi.from_scopes(scopes=[], tenant_id=request.config.guid_tenant)
+        with pytest.raises(DataSafeHavenMicrosoftGraphError):
+            api.http_get_single_page(url)
+        assert requests_mock.call_count == 1
+        mock_sleep.assert_not_called()
+
+    def test_iter_values(
+        self,
+        request,
+        requests_mock,
+        mock_graphapicredential_get_token,  # noqa: ARG002
+    ):
+        next_link = "https://graph.microsoft.com/v1.0/groups?$skiptoken=abc"
+        requests_mock.get(
+            "https://graph.microsoft.com/v1.0/groups?$select=id&$top=2",
+            complete_qs=True,
+            json={
+                "value": [{"id": "id-1"}, {"id": "id-2"}],
+                "@odata.nextLink": next_link,
+            },
+        )
+        requests_mock.get(next_link, complete_qs=True, json={"value": [{"id": "id-3"}]})
+        api = GraphApi.from_scopes(scopes=[], tenant_id=request.config.guid_tenant)
+        values = api.iter_values(
+            "https://graph.microsoft.com/v1.0/groups?$select=id", page_size=2
+        )
+        # Pages are only requested when they are needed
+        assert next(values) == {"id": "id-1"}
+        assert requests_mock.call_count == 1
+        assert [value["id"] for value in values] == ["id-2", "id-3"]
+        assert requests_mock.call_count == 2
+
+    def test_http_batch(
+        self,
+        request,
+        requests_mock,
+        mock_graphapicredential_get_token,  # noqa: ARG002
+    ):
+        def batch_callback(batch_request, _):
+            return {
+                "responses": [
+                    {"id": sub_request["id"], "status": 200, "body": {"n": idx}}
+                    for idx, sub_request in enumerate(batch_request.json()["requests"])
+                ]
+            }
+
+        requests_mock.post(
+            "https://graph.microsoft.com/v1.0/$batch", json=batch_callback
+        )
+        api = GraphApi.from_scopes(scopes=[], tenant_id=request.config.guid_tenant)
+        responses = api.http_batch(
+            [
+                {"id": f"request-{idx}", "method": "GET", "url": f"/users/{idx}"}
+                for idx in range(25)
+            ]
+        )
+        assert requests_mock.call_count == 2
+        assert len(requests_mock.request_history[0].json()["requests"]) == 20
+        assert len(requests_mock.request_history[1].json()["requests"]) == 5
+        assert len(responses) == 25
+        assert responses["request-21"] == {
+            "status": 200,
+            "headers": {},
+            "body": {"n": 1},
+        }
+
+    def test_http_batch_chunks_dependencies(self, request):
+        api = GraphApi.from_scopes(scopes=[], tenant_id=request.config.guid_tenant)
+        batch_requests = [
+            {"id": str(idx), "method": "GET", "url": "/users"} for idx in range(19)
+        ]
+        batch_requests += [
+            {"id": "create", "method": "POST", "url": "/users", "body": {}},
+            {
+                "id": "update",
+                "method": "PATCH",
+                "url": "/users/1",
+                "dependsOn": ["create"],
+            },
+        ]
+        chunks = api.http_batch_chunks(batch_requests)
+        assert [len(chunk) for chunk in chunks] == [19, 2]
+        assert chunks[1][0]["headers"] == {"Content-Type": "application/json"}
+        assert chunks[1][1]["dependsOn"] == ["create"]
+
+    def test_http_batch_chunks_unknown_dependency(self, request):
+        api = GraphApi.from_scopes(scopes=[], tenant_id=request.config.guid_tenant)
+        with pytest.raises(
+            DataSafeHavenValueError,
+            match=r"Request 'update' depends on an unknown request\.",
+        ):
+            api.http_batch_chunks(
+                [{"id": "update", "method": "GET", "url": "/", "dependsOn": ["x"]}]
+            )
+
+    def test_http_batch_retry(
+        self,
+        request,
+        requests_mock,
+        mocker,
+        mock_graphapicredential_get_token,  # noqa: ARG002
+    ):
+        requests_mock.post(
+            "https://graph.microsoft.com/v1.0/$batch",
+            json={
+                "responses": [
+                    {"id": "1", "status": 204},
+                    {"id": "2", "status": 429, "headers": {"Retry-After": "1"}},
+                    {"id": "3", "status": 424},
+                ]
+            },
+        )
+        requests_mock.delete(
+            "https://graph.microsoft.com/v1.0/users/2", status_code=204
+        )
+        requests_mock.patch(
+            "https://graph.microsoft.com/v1.0/users/3", json={"id": "3"}
+        )
+        mocker.patch("time.sleep")
+        api = GraphApi.from_scopes(scopes=[], tenant_id=request.config.guid_tenant)
+        responses = api.http_batch(
+            [
+                {"id": "1", "method": "DELETE", "url": "/users/1"},
+                {"id": "2", "method": "DELETE", "url": "/users/2"},
+                {
+                    "id": "3",
+                    "method": "PATCH",
+                    "url": "/users/3",
+                    "body": {},
+                    "dependsOn": ["2"],
+                },
+            ]
+        )
+        assert [responses[idx]["status"] for idx in ("1", "2", "3")] == [204, 204, 200]
+        assert responses["3"]["body"] == {"id": "3"}
+        assert requests_mock.call_count == 3
+
+    def test_add_users_to_group(
+        self,
+        request,
+        requests_mock,
+        mocker,
+        mock_graphapicredential_get_token,  # noqa: ARG002
+    ):
+        api = GraphApi.from_scopes(scopes=[], tenant_id=request.config.guid_tenant)
+        mocker.patch.object(api, "get_id_from_groupname", return_value="group-id")
+        mocker.patch.object(
+            api,
+            "get_ids_from_usernames",
+            return_value={"harry.lime": "id-1", "ada.lovelace": "id-2"},
+        )
+        requests_mock.post(
+            "https://graph.microsoft.com/v1.0/$batch",
+            json={
+                "responses": [
+                    {"id": "harry.lime", "status": 204},
+                    {
+                        "id": "ada.lovelace",
+                        "status": 400,
+                        "body": {
+                            "error": {
+                                "message": "One or more added object references already exist"
+                            }
+                        },
+                    },
+                ]
+            },
+        )
+        requests_mock.patch(
+            "https://graph.microsoft.com/v1.0/groups/group-id", status_code=400
+        )
+        api.add_users_to_group(["harry.lime", "ada.lovelace"], "Group")
+        # Rejected chunks are retried one user at a time
+        assert requests_mock.request_history[0].json() == {
+            "members@odata.bind": [
+                "https://graph.microsoft.com/v1.0/directoryObjects/id-1",
+                "https://graph.microsoft.com/v1.0/directoryObjects/id-2",
+            ]
+        }
+        sub_requests = requests_mock.last_request.json()["requests"]
+        assert [sub_request["url"] for sub_request in sub_requests] == [
+            "/groups/group-id/members/$ref",
+            "/groups/group-id/members/$ref",
+        ]
+        assert sub_requests[0]["body"] == {
+            "@odata.id": "https://graph.microsoft.com/v1.0/directoryObjects/id-1"
+        }
+
+    def test_add_users_to_group_chunks(
+        self,
+        request,
+        requests_mock,
+        mocker,
+        mock_graphapicredential_get_token,  # noqa: ARG002
+    ):
+        api = GraphApi.from_scopes(scopes=[], tenant_id=request.config.guid_tenant)
+        mocker.patch.object(api, "get_id_from_groupname", return_value="group-id")
+        mocker.patch.object(
+            api,
+            "get_ids_from_usernames",
+            return_value={f"user{idx}": f"id-{idx}" for idx in range(45)},
+        )
+        requests_mock.patch(
+            "https://graph.microsoft.com/v1.0/groups/group-id", status_code=204
+        )
+        api.add_users_to_group([f"user{idx}" for idx in range(45)], "Group")
+        assert [
+            len(patch_request.json()["members@odata.bind"])
+            for patch_request in requests_mock.request_history
+        ] == [20, 20, 5]
+        # Chunks can also be added at the same time
+        requests_mock.reset_mock()
+        api.add_users_to_group([f"user{idx}" for idx in range(45)], "Group", workers=3)
+        assert sorted(
+            len(patch_request.json()["members@odata.bind"])
+            for patch_request in requests_mock.request_history
+        ) == [5, 20, 20]
+
+    def test_create_groups_failure(
+        self,
+        capsys,
+        graph_api_token,
+        mocker,
+        mock_graphapicredential_get_token,  # noqa: ARG002
+    ):
+        def create_group(group_name):
+            if group_name == "Group 2":
+                msg = "Could not create group."
+                raise DataSafeHavenMicrosoftGraphError(msg)
+
+        api = GraphApi.from_token(graph_api_token)
+        mocker.patch.object(api, "create_group", side_effect=create_group)
+        with pytest.raises(
+            DataSafeHavenMicrosoftGraphError,
+            match=r"Could not create groups for \['Group 2'\]\.",
+        ) as exc_info:
+            api.create_groups(["Group 1", "Group 2", "Group 3"], workers=3)
+        # The underlying error is chained and only logged once
+        assert str(exc_info.value.__cause__) == "Could not create group."
+        assert capsys.readouterr().out.count("Could not create group.") == 1
+
+    def test_remove_users_workers(
+        self,
+        graph_api_token,
+        mocker,
+        mock_graphapicredential_get_token,  # noqa: ARG002
+    ):
+        lock = threading.Lock()
+        in_flight = []
+        max_in_flight = []
+
+        def remove_user(username):
+            with lock:
+                in_flight.append(username)
+                max_in_flight.append(len(in_flight))
+            time.sleep(0.01)
+            with lock:
+                in_flight.remove(username)
+
+        api = GraphApi.from_token(graph_api_token)
+        mock_remove_user = mocker.patch.object(
+            api, "remove_user", side_effect=remove_user
+        )
+        api.remove_users([f"user{idx}" for idx in range(10)], workers=3)
+        assert mock_remove_user.call_count == 10
+        assert max(max_in_flight) <= 3
+
+    def test_is_group_member(
+        self,
+        request,
+        requests_mock,
+        mock_graphapicredential_get_token,  # noqa: ARG002
+    ):
+        requests_mock.get(
+            "https://graph.microsoft.com/v1.0/groups/group-1/members",
+            json={"value": [{"id": "user-id"}]},
+        )
+        requests_mock.get(
+            "https://graph.microsoft.com/v1.0/groups/group-2/members",
+            json={"value": []},
+        )
+        api = GraphApi.from_scopes(scopes=[], tenant_id=request.config.guid_tenant)
+        assert api.is_group_member("user-id", "group-1")
+        assert requests_mock.last_request.qs["$filter"] == ["id eq 'user-id'"]
+        assert not api.is_group_member("user-id", "group-2")
+
+    def test_add_user_to_group_nested_member(
+        self,
+        mocker,
+        request,
+        requests_mock,
+        mock_graphapicredential_get_token,  # noqa: ARG002
+    ):
+        api = GraphApi.from_scopes(scopes=[], tenant_id=request.config.guid_tenant)
+        mocker.patch.object(api, "get_id_from_username", return_value="user-id")
+        mocker.patch.object(api, "get_id_from_groupname", return_value="group-id")
+        # The user only belongs to the group through a nested group
+        requests_mock.post(
+            "https://graph.microsoft.com/v1.0/directoryObjects/user-id/checkMemberGroups",
+            json={"value": ["group-id"]},
+        )
+        requests_mock.get(
+            "https://graph.microsoft.com/v1.0/groups/group-id/members",
+            json={"value": []},
+        )
+        mock_add = requests_mock.post(
+            "https://graph.microsoft.com/v1.0/groups/group-id/members/$ref",
+            status_code=204,
+        )
+        mock_remove = requests_mock.delete(
+            "https://graph.microsoft.com/v1.0/groups/group-id/members/user-id/$ref",
+            status_code=404,
+        )
+
+        api.add_user_to_group("user", "Group")
+        api.remove_user_from_group("user", "Group")
+
+        assert mock_add.call_count == 1
+        assert mock_remove.call_count == 0
+
+    def test_create_user(
+        self,
+        request,
+        requests_mock,
+        mocker,
+        mock_graphapicredential_get_token,  # noqa: ARG002
+    ):
+        api = GraphApi.from_scopes(scopes=[], tenant_id=request.config.guid_tenant)
+        mocker.patch.object(api, "get_id_from_username", return_value="user-id")
+        beta_endpoint = "https://graph.microsoft.com/beta/users/user-id/authentication"
+        requests_mock.get(
+            f"{beta_endpoint}/emailMethods",
+            json={"value": [{"emailAddress": "harry.lime@example.com"}]},
+        )
+        requests_mock.get(f"{beta_endpoint}/phoneMethods", json={"value": []})
+        mock_post_phone = requests_mock.post(f"{beta_endpoint}/phoneMethods")
+        mock_patch = requests_mock.patch(
+            "https://graph.microsoft.com/v1.0/users/user-id"
+        )
+        api.create_user(
+            {"mailNickname": "harry.lime"}, "harry.lime@example.com", "+44 12345678"
+        )
+        assert mock_post_phone.last_request.json() == {
+            "phoneNumber": "+44 12345678",
+            "phoneType": "mobile",
+        }
+        assert mock_patch.last_request.json() == {"accountEnabled": True}
+        # No email method is added as one already exists
+        assert not any(
+            history.method == "POST" and history.url.endswith("emailMethods")
+            for history in requests_mock.request_history
+        )
+
+    def test_create_users_failures(
+        self,
+        request,
+        mocker,
+        mock_graphapicredential_get_token,  # noqa: ARG002
+    ):
+        api = GraphApi.from_scopes(scopes=[], tenant_id=request.config.guid_tenant)
+        mock_create_users_batch = mocker.patch.object(
+            api,
+            "create_users_batch",
+            side_effect=lambda batch: {
+                user[0]["mailNickname"]
+                for user in batch
+                if user[0]["mailNickname"] in ("user3", "user30")
+            },
+        )
+        users = [({"mailNickname": f"user{idx}"}, "", "") for idx in range(45)]
+        with pytest.raises(
+            DataSafeHavenMicrosoftGraphError,
+            match=r"Could not create/update users \['user3', 'user30'\].",
+        ):
+            api.create_users(users, workers=3)
+        assert mock_create_users_batch.call_count == 3
+
+    def test_create_users_batch_error(
+        self,
+        capsys,
+        request,
+        mocker,
+        mock_graphapicredential_get_token,  # noqa: ARG002
+    ):
+        api = GraphApi.from_scopes(scopes=[], tenant_id=request.config.guid_tenant)
+        mocker.patch.object(
+            api,
+            "get_ids_from_usernames",
+            side_effect=DataSafeHavenMicrosoftGraphError("mock lookup error"),
+        )
+        users = [
+            ({"mailNickname": "user1"}, "", ""),
+            ({"mailNickname": "user2"}, "", ""),
+        ]
+        assert api.create_users_batch(users) == {"user1", "user2"}
+        stdout, _ = capsys.readouterr()
+        assert "Could not create or update Entra users" in stdout
+        assert "mock lookup error" in stdout
+
+    def test_get_id_from_groupname(
+        self,
+        request,
+        requests_mock,
+        mock_graphapicredential_get_token,  # noqa: ARG002
+    ):
+        requests_mock.get(
+            "https://graph.microsoft.com/v1.0/groups",
+            [
+                {"status_code": 400},
+                {"json": {"value": [{"displayName": "Group's name", "id": "id-1"}]}},
+            ],
+        )
+        api = GraphApi.from_scopes(scopes=[], tenant_id=request.config.guid_tenant)
+        assert api.get_id_from_groupname("Group's name") == "id-1"
+        # Unsupported filters are retried as advanced queries
+        first_request, second_request = requests_mock.request_history
+        assert first_request.qs["$filter"] == ["displayname eq 'group''s name'"]
+        assert "ConsistencyLevel" not in first_request.headers
+        assert second_request.headers["ConsistencyLevel"] == "eventual"
+        assert second_request.qs["$count"] == ["true"]
+
+    def test_get_id_from_username(
+        self,
+        request,
+        requests_mock,
+        mock_graphapicredential_get_token,  # noqa: ARG002
+    ):
+        requests_mock.get(
+            "https://graph.microsoft.com/v1.0/users",
+            json={
+                "value": [
+                    {"id": "id-1", "userPrincipalName": "harry.lime@example.com"},
+                    {"id": "id-2", "userPrincipalName": "harry.lime2@example.com"},
+                ]
+            },
+        )
+        api = GraphApi.from_scopes(scopes=[], tenant_id=request.config.guid_tenant)
+        assert api.get_id_from_username("harry.lime") == "id-1"
+        assert requests_mock.last_request.qs == {
+            "$filter": ["startswith(userprincipalname,'harry.lime@')"],
+            "$select": ["id,userprincipalname"],
+        }
+
+    def test_get_id_from_username_directory_index(
+        self,
+        request,
+        requests_mock,
+        mock_graphapicredential_get_token,  # noqa: ARG002
+    ):
+        requests_mock.get(
+            "https://graph.microsoft.com/v1.0/users",
+            json={
+                "value": [
+                    {"id": "id-1", "userPrincipalName": "harry.lime@example.com"},
+                    {"id": "id-2", "userPrincipalName": "ada.lovelace@example.com"},
+                ]
+            },
+        )
+        api = GraphApi.from_scopes(scopes=[], tenant_id=request.config.guid_tenant)
+        api.directory.lookup("users", "username", "", api.read_directory_users)
+        # The directory index is shared with other instances
+        other_api = GraphApi.from_scopes(
+            scopes=[], tenant_id=request.config.guid_tenant
+        )
+        assert other_api.get_id_from_username("ada.lovelace") == "id-2"
+        assert other_api.get_id_from_username("orson.welles") is None
+        assert requests_mock.call_count == 1
+
+    def test_read_groups_delta(
+        self,
+        request,
+        requests_mock,
+        mock_graphapicredential_get_token,  # noqa: ARG002
+        tmp_config_dir,  # noqa: ARG002
+    ):
+        delta_link = "https://graph.microsoft.com/v1.0/groups/delta?$deltatoken=abc"
+        requests_mock.get(
+            "https://graph.microsoft.com/v1.0/groups/delta",
+            json={
+                "value": [
+                    {"id": "id-1", "displayName": "Group 1"},
+                    {"id": "id-2", "displayName": "Group 2"},
+                ],
+                "@odata.deltaLink": delta_link,
+            },
+        )
+        api = GraphApi.from_scopes(scopes=[], tenant_id=request.config.guid_tenant)
+        groups = api.read_groups_delta(attributes=["displayName", "id"])
+        assert [group["displayName"] for group in groups] == ["Group 1", "Group 2"]
+        # The snapshot is only readable by the current user
+        (snapshot_path,) = config_dir().glob(".graph-delta-*-groups.json")
+        assert snapshot_path.stat().st_mode & 0o777 == 0o600
+
+        # Only changes are requested once a delta link is available
+        requests_mock.get(
+            delta_link,
+            json={
+                "value": [
+                    {"id": "id-1", "@removed": {"reason": "changed"}},
+                    {"id": "id-2", "displayName": "Group 2 (renamed)"},
+                    {"id": "id-3", "displayName": "Group 3"},
+                ],
+                "@odata.deltaLink": delta_link,
+            },
+        )
+        groups = api.read_groups_delta(attributes=["displayName", "id"])
+        assert requests_mock.last_request.url == delta_link
+        assert [group["displayName"] for group in groups] == [
+            "Group 2 (renamed)",
+            "Group 3",
+        ]
+
+    def test_read_users_delta_global_admin(
+        self,
+        request,
+        requests_mock,
+        mock_graphapicredential_get_token,  # noqa: ARG002
+        tmp_config_dir,  # noqa: ARG002
+    ):
+        delta_link = "https://graph.microsoft.com/v1.0/users/delta?$deltatoken=abc"
+        administrators_url = (
+            "https://graph.microsoft.com/v1.0/directoryRoles/roleTemplateId="
+            f"{GraphApi.role_template_ids['Global Administrator']}/members"
+        )
+        requests_mock.get(
+            "https://graph.microsoft.com/v1.0/users/delta",
+            json={
+                "value": [
+                    {"id": "id-1", "userPrincipalName": "harry.lime@example.com"},
+                    {"id": "id-2", "userPrincipalName": "ada.lovelace@example.com"},
+                ],
+                "@odata.deltaLink": delta_link,
+            },
+        )
+        requests_mock.get(administrators_url, json={"value": [{"id": "id-1"}]})
+        api = GraphApi.from_scopes(scopes=[], tenant_id=request.config.guid_tenant)
+        users = api.read_users_delta()
+        assert [user["isGlobalAdmin"] for user in users] == [True, False]
+        # Administrator status is not stored in the snapshot
+        (snapshot_path,) = config_dir().glob(".graph-delta-*-users.json")
+        assert "isGlobalAdmin" not in snapshot_path.read_text()
+
+        # Administrator status is current even when the users have not changed
+        requests_mock.get(
+            delta_link, json={"value": [], "@odata.deltaLink": delta_link}
+        )
+        requests_mock.get(administrators_url, json={"value": [{"id": "id-2"}]})
+        users = api.read_users_delta()
+        assert [user["isGlobalAdmin"] for user in users] == [False, True]
+
     def test_token(
         self,
         graph_api_token,
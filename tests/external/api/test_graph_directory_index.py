@@ -0,0 +1,67 @@
+from data_safe_haven.external.api.graph_directory_index import GraphDirectoryIndex
+
+
+class TestGraphDirectoryIndex:
+    users = (
+        {
+            "displayName": "Harry Lime",
+            "id": "id-harry",
+            "mailNickname": "harry.lime",
+            "userPrincipalName": "harry.lime@example.com",
+        },
+        {
+            "displayName": "Ada Lovelace",
+            "id": "id-ada",
+            "mailNickname": "ada",
+            "userPrincipalName": "ada.lovelace@example.com",
+        },
+    )
+
+    def loader(self):
+        self.n_loads += 1
+        return self.users
+
+    def setup_method(self):
+        self.n_loads = 0
+
+    def test_lookup(self):
+        index = GraphDirectoryIndex()
+        assert (
+            index.lookup("users", "username", "ada.lovelace", self.loader)["id"]
+            == "id-ada"
+        )
+        assert (
+            index.lookup("users", "mailNickname", "ada", self.loader)["id"] == "id-ada"
+        )
+        assert (
+            index.lookup(
+                "users", "userPrincipalName", "harry.lime@example.com", self.loader
+            )["id"]
+            == "id-harry"
+        )
+        assert (
+            index.lookup("users", "displayName", "Harry Lime", self.loader)["id"]
+            == "id-harry"
+        )
+        assert index.lookup("users", "username", "nobody", self.loader) is None
+        assert self.n_loads == 1
+
+    def test_invalidate(self):
+        index = GraphDirectoryIndex()
+        index.lookup("users", "username", "ada.lovelace", self.loader)
+        assert index.is_fresh("users")
+        index.invalidate("users")
+        assert not index.is_fresh("users")
+        index.lookup("users", "username", "ada.lovelace", self.loader)
+        assert self.n_loads == 2
+
+    def test_ttl(self, mocker):
+        mock_monotonic = mocker.patch("time.monotonic", return_value=1000)
+        index = GraphDirectoryIndex(ttl=60)
+        index.lookup("users", "username", "ada.lovelace", self.loader)
+        mock_monotonic.return_value = 1059
+        index.lookup("users", "username", "ada.lovelace", self.loader)
+        assert self.n_loads == 1
+        mock_monotonic.return_value = 1061
+        index.lookup("users", "username", "ada.lovelace", self.loader)
+        assert self.n_loads == 2
@@ -0,0 +1,63 @@
+import json
+
+from data_safe_haven.external import GraphApi, RequestMetrics
+
+
+class TestRequestMetrics:
+    def test_operation(self):
+        with RequestMetrics.operation("outer"):
+            with RequestMetrics.operation("inner"):
+                RequestMetrics.record(
+                    "Service", duration=0.2, status_code=200, is_retry=False
+                )
+        RequestMetrics.record("Service", duration=12, status_code=429, is_retry=True)
+        outer = RequestMetrics.operations_["outer"]
+        assert outer["requests"] == 1
+        assert outer["latency_histogram"][1] == 1
+        other = RequestMetrics.operations_["Service.<other>"]
+        assert other["retries"] == 1
+        assert other["throttled"] == 1
+        assert other["status_codes"] == {"429": 1}
+
+    def test_graph_api(
+        self,
+        request,
+        requests_mock,
+        mocker,
+        mock_graphapicredential_get_token,  # noqa: ARG002
+    ):
+        mocker.patch("time.sleep")
+        requests_mock.get(
+            "https://graph.microsoft.com/v1.0/domains",
+            [{"status_code": 429}, {"json": {"value": []}}],
+        )
+        api = GraphApi.from_scopes(scopes=[], tenant_id=request.config.guid_tenant)
+        api.read_domains()
+        metrics = RequestMetrics.operations_["GraphApi.read_domains"]
+        assert metrics["requests"] == 2
+        assert metrics["retries"] == 1
+        assert metrics["throttled"] == 1
+        assert metrics["status_codes"] == {"200": 1, "429": 1}
+
+    def test_report(self, mocker, tmp_path, capsys):
+        mocker.patch(
+            "data_safe_haven.external.api.request_metrics.log_dir",
+            return_value=tmp_path,
+        )
+        RequestMetrics.report(show_table=True)
+        assert not list(tmp_path.iterdir())
+
+        with RequestMetrics.operation("AzureSdk.get_subscription"):
+            RequestMetrics.record(
+                "AzureSdk", duration=0.5, status_code=200, is_retry=False
+            )
+        RequestMetrics.report(show_table=True)
+        RequestMetrics.report(show_table=False)
+        stdout, _ = capsys.readouterr()
+        assert "200: 1" in stdout
+        (metrics_path,) = tmp_path.iterdir()
+        assert metrics_path.stat().st_mode & 0o777 == 0o600
+        with open(metrics_path) as f_metrics:
+            runs = [json.loads(line) for line in f_metrics]
+        assert len(runs) == 2
+        assert runs[0]["operations"]["AzureSdk.get_subscription"]["requests"] == 1
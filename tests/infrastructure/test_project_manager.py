@@ -1,5 +1,7 @@
 from pulumi.automation import (
+    CommandError,
     LocalWorkspace,
+    OutputValue,
     ProjectSettings,
     Stack,
     StackSettings,
@@ -145,3 +147,104 @@ class TestSREProjectManager:
         stack_config = sre_project_manager.pulumi_project.stack_config
         assert "data-safe-haven:new-key" in stack_config
         assert stack_config.get("data-safe-haven:new-key") == "hello"
+
+    def test_parallelism(self, mocker, sre_project_manager):
+        mock_stack = mocker.Mock()
+        mock_stack.up.return_value = mocker.Mock(
+            outputs={}, summary=mocker.Mock(result="succeeded", version=1)
+        )
+        mocker.patch.object(
+            ProjectManager, "stack", new_callable=mocker.PropertyMock
+        ).return_value = mock_stack
+        mocker.patch.object(ProjectManager, "update_dsh_pulumi_project")
+
+        # Refresh and preview run one operation at a time by default, but update does not
+        sre_project_manager.refresh()
+        sre_project_manager.preview()
+        sre_project_manager.update()
+        assert mock_stack.refresh.call_args.kwargs["parallel"] == 1
+        assert mock_stack.preview.call_args.kwargs["parallel"] == 1
+        assert mock_stack.up.call_args.kwargs["parallel"] is None
+
+        sre_project_manager.parallelism = 32
+        sre_project_manager.refresh()
+        sre_project_manager.update()
+        assert mock_stack.refresh.call_args.kwargs["parallel"] == 32
+        assert mock_stack.up.call_args.kwargs["parallel"] == 32
+
+    def test_deploy_fast(self, mocker, sre_project_manager):
+        mock_stack = mocker.Mock()
+        mock_stack.history.return_value = [
+            mocker.Mock(kind="update", result="succeeded")
+        ]
+        mocker.patch.object(
+            ProjectManager, "stack", new_callable=mocker.PropertyMock
+        ).return_value = mock_stack
+        for method in ("apply_config_options", "refresh", "preview", "update"):
+            mocker.patch.object(ProjectManager, method)
+
+        # The first deployment records a fingerprint
+        sre_project_manager.deploy(fast=True)
+        assert sre_project_manager.pulumi_project.deploy_fingerprint
+        assert ProjectManager.refresh.call_count == 1
+        assert ProjectManager.preview.call_count == 1
+
+        # Unchanged deployments skip refresh and preview
+        sre_project_manager.deploy(fast=True)
+        assert ProjectManager.refresh.call_count == 1
+        assert ProjectManager.update.call_count == 2
+
+        # Changes to the SRE config or to the stack prevent this
+        sre_project_manager.program.config.description = "Changed"
+        sre_project_manager.deploy(fast=True, preview=False)
+        mock_stack.history.return_value = [
+            mocker.Mock(kind="refresh", result="succeeded")
+        ]
+        sre_project_manager.deploy(fast=True, preview=False)
+        assert ProjectManager.refresh.call_count == 3
+        assert ProjectManager.preview.call_count == 1
+
+    def test_output_cached(self, mocker, sre_project_manager):
+        mock_stack = mocker.Mock()
+        mock_stack.up.return_value = mocker.Mock(
+            outputs={
+                "data": OutputValue(value={"key_vault_name": "kv"}, secret=False),
+                "password": OutputValue(value="secret", secret=True),
+            },
+            summary=mocker.Mock(result="succeeded", version=3),
+        )
+        mock_stack.outputs.return_value = mock_stack.up.return_value.outputs
+        mock_stack_property = mocker.patch.object(
+            ProjectManager, "stack", new_callable=mocker.PropertyMock
+        )
+        mock_stack_property.return_value = mock_stack
+        mocker.patch.object(ProjectManager, "update_dsh_pulumi_project")
+
+        # Non-secret outputs are cached after an update
+        sre_project_manager.update()
+        pulumi_project = sre_project_manager.pulumi_project
+        assert pulumi_project.stack_outputs == {"data": {"key_vault_name": "kv"}}
+        assert pulumi_project.stack_outputs_version == 3
+
+        # Cached outputs are read without loading a Pulumi workspace
+        mock_stack_property.reset_mock()
+        sre_project_manager._stack_outputs = None
+        assert sre_project_manager.output("data") == {"key_vault_name": "kv"}
+        mock_stack_property.assert_not_called()
+        mock_stack.outputs.assert_not_called()
+        assert sre_project_manager.output("password") == "secret"
+        mock_stack.outputs.assert_called_once()
+
+        # Cached outputs are forgotten when a command is run on the stack
+        sre_project_manager.run_pulumi_command("stack tag set key value")
+        assert pulumi_project.stack_outputs == {}
+        assert pulumi_project.stack_outputs_version is None
+
+        # Cached outputs are forgotten if an update fails
+        sre_project_manager.update()
+        assert pulumi_project.stack_outputs_version == 3
+        mock_stack.up.side_effect = CommandError("mock up error")
+        with raises(DataSafeHavenPulumiError, match=r"Pulumi update failed\."):
+            sre_project_manager.update()
+        assert pulumi_project.stack_outputs == {}
+        assert pulumi_project.stack_outputs_version is None
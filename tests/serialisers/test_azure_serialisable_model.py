@@ -4,7 +4,7 @@ from data_safe_haven.exceptions import (
     DataSafeHavenConfigError,
     DataSafeHavenTypeError,
 )
-from data_safe_haven.external import AzureSdk
+from data_safe_haven.external import AzureBlobCache, AzureSdk
 from data_safe_haven.serialisers import AzureSerialisableModel
 
 
@@ -137,3 +137,20 @@ class TestAzureSerialisableModel:
             context.storage_account_name,
             context.storage_container_name,
         )
+
+    def test_from_remote_or_create_cached(self, mocker, context, example_config_yaml):
+        AzureBlobCache.write(
+            context.storage_account_name,
+            context.storage_container_name,
+            "file.yaml",
+            content=example_config_yaml,
+            etag='"etag"',
+        )
+        mocker.patch.object(AzureSdk, "download_blob", return_value=example_config_yaml)
+        mock_remote_exists = mocker.patch.object(
+            ExampleAzureSerialisableModel, "remote_exists"
+        )
+        example_config = ExampleAzureSerialisableModel.from_remote_or_create(context)
+
+        assert example_config.string == "hello"
+        mock_remote_exists.assert_not_called()